@@ -10,15 +10,23 @@ from flask_limiter import Limiter
 from flask_limiter.errors import RateLimitExceeded
 from flask_limiter.util import get_remote_address
 from flask_login import LoginManager, current_user
-from flask_session import Session
 from flask_wtf import CSRFProtect
 from flask_wtf.csrf import CSRFError
 from itsdangerous import URLSafeTimedSerializer
 from werkzeug.exceptions import HTTPException
 
-from data_source.user_queries import get_user_by_id, get_user_session_token
+from data_source import db_session, session_store
+from data_source.user_queries import get_session_token, get_session_user
+from domain.control import (
+    image_pipeline,
+    mail_outbox,
+    maintenance,
+    static_assets,
+    upload_ingest,
+)
 from domain.entity.user import User
 from presentation.controller.admin_controller import admin_bp
+from presentation.controller.avatar_controller import avatar_bp
 from presentation.controller.bulletin_controller import bulletin_bp
 from presentation.controller.login_controller import login_bp
 from presentation.controller.profile_controller import profile_bp
@@ -96,18 +104,33 @@ def create_app():
     setup_logging(app, error_log_file, warning_log_file, info_log_file)
 
     app.config["SECRET_KEY"] = os.getenv("FLASK_SECRET_KEY", "")
-    app.config["SESSION_TYPE"] = "filesystem"
     app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(
         minutes=30
     )  # Browser cookie timeout
 
     app.config["MAX_CONTENT_LENGTH"] = 2 * 1024 * 1024
+    # File uploads are spooled to disk and rejected as soon as their header
+    # shows they are not an acceptable image (see UPLOAD_MAX_* in the README)
+    upload_ingest.init_app(app)
 
     app.config["SESSION_COOKIE_SECURE"] = True
     app.config["SESSION_COOKIE_HTTPONLY"] = True
     app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
 
-    Session(app)
+    # Server-side sessions: MySQL by default, see SESSION_BACKEND in the README
+    session_store.init_app(app)
+
+    # One pooled DB connection per request, committed before the response is sent
+    db_session.init_app(app)
+
+    # Purges expired lockout, reset-link and session rows in the background
+    maintenance.init_app(app)
+    # Sends queued verification and reset emails off the request thread
+    mail_outbox.init_app(app)
+    # Resizes uploaded post images in the background; adds the srcset filter
+    image_pipeline.init_app(app)
+    # asset_url() for fingerprinted, immutably cached static URLs
+    static_assets.init_app(app)
 
     login_manager = LoginManager()
     login_manager.login_view = "login.login"
@@ -125,12 +148,13 @@ def create_app():
 
     @login_manager.user_loader
     def load_user(user_id):
-        user_data = get_user_by_id(user_id)
+        # Cached per worker; the password hash is never loaded for current_user
+        user_data = get_session_user(user_id)
         if user_data:
             return User(
                 id=user_data["id"],
                 name=user_data["name"],
-                password=user_data["password"],
+                password="",
                 email=user_data["email"],
                 role=user_data.get("role", "user"),
                 profile_picture=user_data.get("profile_picture", ""),
@@ -144,6 +168,9 @@ def create_app():
     app.register_blueprint(bulletin_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(profile_bp)
+    app.register_blueprint(avatar_bp)
+    # A feed page can show dozens of avatars; treat them like static files
+    limiter.exempt(avatar_bp)
 
     # --- SESSION TIMEOUT HANDLER ---
     IDLE_TIMEOUT = timedelta(seconds=15 * 60)  # 15 minutes
@@ -175,7 +202,8 @@ def create_app():
             return redirect(url_for(LOGIN_VIEW))
 
         if hasattr(current_user, "is_authenticated") and current_user.is_authenticated:
-            user_token = get_user_session_token(current_user.id)
+            # Cached from the load_user lookup; no extra query per request
+            user_token = get_session_token(current_user.id)
             if session.get("session_token") != user_token:
                 session.clear()
                 flash(
@@ -183,8 +211,11 @@ def create_app():
                     "warning",
                 )
                 return redirect(url_for(LOGIN_VIEW))
-        # Update last activity
-        session["last_activity"] = now.isoformat()
+        # Update last activity, but only once per granularity window so that
+        # most requests leave the session unmodified and nothing is written
+        session_store.record_activity(
+            session, now, app.config["SESSION_ACTIVITY_GRANULARITY"]
+        )
 
     # Configuration for email verification
     app.config["SERIALIZER"] = URLSafeTimedSerializer(app.config["SECRET_KEY"])
@@ -232,6 +263,9 @@ def create_app():
         if isinstance(e, HTTPException):
             code = e.code
             message = e.description
+        else:
+            # Don't commit half-finished writes from a request that blew up
+            db_session.mark_rollback()
 
         # Log the error with traceback
         app.logger.error(f"Exception occurred: {exception_type}: {message}\n{tb}")
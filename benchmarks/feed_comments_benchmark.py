@@ -0,0 +1,114 @@
+"""
+Query count / latency of loading the social feed with comments.
+
+Compares the old per-post comment query (N+1) with the batched loader in
+data_source.social_feed_queries. The database is simulated: every statement
+costs one round trip of ROUND_TRIP_SECONDS, which is what dominates in
+production.
+
+Run from the repository root:
+    python -m benchmarks.feed_comments_benchmark
+"""
+
+import time
+
+from data_source import social_feed_queries
+
+ROUND_TRIP_SECONDS = 0.0005
+COMMENTS_PER_POST = 3
+POST_COUNTS = [10, 100, 1000, 5000]
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def execute(self, query, params=()):
+        self.db.queries += 1
+        time.sleep(ROUND_TRIP_SECONDS)
+        if "FROM comments" in query:
+            feed_ids = set(params)
+            self.rows = [c for c in self.db.comments if c["feed_id"] in feed_ids]
+        elif "FROM feed" in query:
+            self.rows = list(self.db.posts)
+        else:
+            self.rows = [{"like_count": 0}]
+
+    def fetchall(self):
+        return [dict(r) for r in self.rows]
+
+    def fetchone(self):
+        return dict(self.rows[0]) if self.rows else None
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self, post_count):
+        self.queries = 0
+        self.posts = [
+            {
+                "id": i,
+                "user_id": 1,
+                "caption": f"post {i}",
+                "image_path": None,
+                "like_count": 0,
+                "user_name": "bench",
+                "profile_picture": "",
+            }
+            for i in range(post_count, 0, -1)
+        ]
+        self.comments = [
+            {
+                "id": i * COMMENTS_PER_POST + n,
+                "feed_id": i,
+                "comments": "nice",
+                "user_name": "bench",
+                "profile_picture": "",
+            }
+            for i in range(1, post_count + 1)
+            for n in range(COMMENTS_PER_POST)
+        ]
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self)
+
+    def close(self):
+        pass
+
+
+def load_comments_per_post(connection, posts):
+    """The previous implementation: one comments query per post."""
+    for post in posts:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT ... FROM comments c WHERE c.feed_id = %s", (post["id"],))
+        post["comments"] = cursor.fetchall()
+        cursor.close()
+
+
+def measure(loader, post_count):
+    db = FakeDatabase(post_count)
+    cursor = db.cursor(dictionary=True)
+    start = time.perf_counter()
+    cursor.execute("SELECT ... FROM feed f")
+    loader(db, cursor.fetchall())
+    return db.queries, time.perf_counter() - start
+
+
+def main():
+    print(
+        f"{'posts':>6} | {'N+1 queries':>11} {'N+1 ms':>9} | {'batched queries':>15} {'batched ms':>10}"
+    )
+    for post_count in POST_COUNTS:
+        old_queries, old_time = measure(load_comments_per_post, post_count)
+        new_queries, new_time = measure(social_feed_queries.attach_comments, post_count)
+        print(
+            f"{post_count:>6} | {old_queries:>11} {old_time * 1000:>9.1f} | "
+            f"{new_queries:>15} {new_time * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
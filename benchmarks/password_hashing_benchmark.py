@@ -0,0 +1,85 @@
+"""
+Login latency / throughput with concurrent password checks.
+
+Compares bcrypt.checkpw called inline on each request thread with the
+bounded PasswordHasher pool in domain.control.auth_management. A burst of
+CLIENTS logins arrives at once, as in a credential-stuffing attempt; the
+pool runs at most WORKERS hashes and refuses what does not fit in its
+queue instead of letting every request wait.
+
+Run from the repository root:
+    python -m benchmarks.password_hashing_benchmark
+"""
+
+import os
+import statistics
+import threading
+import time
+
+import bcrypt
+
+from domain.control.auth_management import PasswordHasher, PasswordHasherBusy
+
+ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "10"))
+WORKERS = os.cpu_count() or 2
+QUEUE = WORKERS * 8
+CLIENT_COUNTS = sorted({1, WORKERS, WORKERS * 4, WORKERS * 16})
+PASSWORD = "correct horse battery staple"
+
+
+def check_inline(hashed):
+    return bcrypt.checkpw(PASSWORD.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def measure(check, clients):
+    latencies = []
+    refused = [0]
+    lock = threading.Lock()
+    start_gate = threading.Barrier(clients)
+
+    def login():
+        start_gate.wait()
+        started = time.perf_counter()
+        try:
+            check()
+        except PasswordHasherBusy:
+            with lock:
+                refused[0] += 1
+            return
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=login) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = statistics.median(latencies) if latencies else 0
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+    return len(latencies) / elapsed, p50, p95, refused[0]
+
+
+def main():
+    hashed = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(ROUNDS)).decode()
+    hasher = PasswordHasher(rounds=ROUNDS, workers=WORKERS, max_queue=QUEUE)
+    print(f"bcrypt cost {ROUNDS}, pool of {WORKERS} threads, queue {QUEUE}")
+    print(
+        f"{'clients':>7} | {'inline/s':>8} {'p50 ms':>7} {'p95 ms':>7} | "
+        f"{'pool/s':>7} {'p50 ms':>7} {'p95 ms':>7} {'refused':>7}"
+    )
+    for clients in CLIENT_COUNTS:
+        inline = measure(lambda: check_inline(hashed), clients)
+        pooled = measure(lambda: hasher.verify(PASSWORD, hashed), clients)
+        print(
+            f"{clients:>7} | {inline[0]:>8.1f} {inline[1] * 1000:>7.1f} "
+            f"{inline[2] * 1000:>7.1f} | {pooled[0]:>7.1f} {pooled[1] * 1000:>7.1f} "
+            f"{pooled[2] * 1000:>7.1f} {pooled[3]:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Session store writes per request for a logged-in user clicking around.
+
+Compares the old before_request hook, which rewrote session["last_activity"]
+on every request, with session_store.record_activity, which only moves it
+once per SESSION_ACTIVITY_GRANULARITY. The store is simulated: every write
+is counted and costs one round trip of ROUND_TRIP_SECONDS.
+
+Run from the repository root:
+    python -m benchmarks.session_writes_benchmark
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask, session
+
+from data_source.session_store import RedisSessionInterface, record_activity
+
+ROUND_TRIP_SECONDS = 0.0005
+GRANULARITY = 60
+SESSION_MINUTES = 14
+REQUEST_INTERVALS = [1, 5, 15, 30]
+START = datetime(2026, 1, 1)
+
+
+class CountingStore:
+    """Redis GET/SET/DEL stand-in that counts writes."""
+
+    def __init__(self):
+        self.data = {}
+        self.writes = 0
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, name, value, ex=None):
+        self.writes += 1
+        time.sleep(ROUND_TRIP_SECONDS)
+        self.data[name] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class UnthrottledSessionInterface(RedisSessionInterface):
+    """The store as it behaved before: every modified session is written."""
+
+    def needs_write(self, session):
+        return session.modified
+
+
+def record_activity_every_request(session, now, granularity):
+    """The previous implementation."""
+    session["last_activity"] = now.isoformat()
+
+
+def make_app(interface_class, touch, store, clock):
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = "bench"
+    app.config["SESSION_REFRESH_EACH_REQUEST"] = False
+    app.session_interface = interface_class(app, store)
+    app.session_interface.activity_granularity = GRANULARITY
+
+    @app.before_request
+    def enforce_session_timeouts():
+        if session.get("user_id"):
+            touch(session, clock[0], GRANULARITY)
+
+    @app.route("/login")
+    def login():
+        session["user_id"] = 1
+        session["created_at"] = clock[0].isoformat()
+        session["last_activity"] = clock[0].isoformat()
+        return "ok"
+
+    @app.route("/page")
+    def page():
+        return "ok"
+
+    return app
+
+
+def measure(interface_class, touch, interval):
+    store = CountingStore()
+    clock = [START]
+    http = make_app(interface_class, touch, store, clock).test_client()
+    http.get("/login")
+    store.writes = 0
+
+    requests = SESSION_MINUTES * 60 // interval
+    start = time.perf_counter()
+    for n in range(1, requests + 1):
+        clock[0] = START + timedelta(seconds=n * interval)
+        http.get("/page")
+    return requests, store.writes, time.perf_counter() - start
+
+
+def main():
+    print(
+        f"{'every':>6} {'requests':>8} | {'old writes':>10} {'old ms':>8} | "
+        f"{'new writes':>10} {'new ms':>8} | {'writes/request':>14}"
+    )
+    for interval in REQUEST_INTERVALS:
+        requests, old_writes, old_time = measure(
+            UnthrottledSessionInterface, record_activity_every_request, interval
+        )
+        _, new_writes, new_time = measure(
+            RedisSessionInterface, record_activity, interval
+        )
+        print(
+            f"{interval:>5}s {requests:>8} | {old_writes:>10} {old_time * 1000:>8.1f} | "
+            f"{new_writes:>10} {new_time * 1000:>8.1f} | "
+            f"{old_writes / requests:>5.2f} -> {new_writes / requests:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,11 @@ def delete_sports_activity(activity_id: int):
 def get_social_post_by_id(post_id: int):
     connection = get_connection()
     cursor = connection.cursor()
-    cursor.execute("SELECT * FROM feed WHERE id = %s", (post_id,))
+    cursor.execute(
+        "SELECT id, user_id, image_path, caption, like_count, image_variants "
+        "FROM feed WHERE id = %s",
+        (post_id,),
+    )
     post = cursor.fetchone()
     cursor.close()
     connection.close()
@@ -0,0 +1,76 @@
+"""Reference counts for content-addressed image files (image_blob table)"""
+
+from data_source.db_connection import get_connection
+
+DB_CONN_ERROR = "[DB ERROR] Could not connect to database."
+
+
+def acquire_blob(digest, ext):
+    """
+    Count one more reference to a blob, creating its row on first use.
+
+    Returns:
+        bool: True if the reference was recorded
+    """
+    connection = get_connection()
+    if connection is None:
+        print(DB_CONN_ERROR)
+        return False
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            """
+            INSERT INTO image_blob (sha256, ext, ref_count) VALUES (%s, %s, 1)
+            ON DUPLICATE KEY UPDATE ref_count = ref_count + 1
+            """,
+            (digest, ext),
+        )
+        connection.commit()
+        return True
+    except Exception as e:
+        print(f"[DB ERROR] Error acquiring image blob: {e}")
+        return False
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def release_blob(digest):
+    """
+    Drop one reference to a blob; the row is deleted with its last reference.
+
+    Returns:
+        int: References left (0 means the file can go), or None if the blob
+        is unknown or the release failed
+    """
+    connection = get_connection()
+    if connection is None:
+        print(DB_CONN_ERROR)
+        return None
+    cursor = connection.cursor()
+    try:
+        # The row lock orders this against a concurrent acquire_blob
+        cursor.execute(
+            "SELECT ref_count FROM image_blob WHERE sha256 = %s FOR UPDATE",
+            (digest,),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        if row[0] <= 1:
+            cursor.execute("DELETE FROM image_blob WHERE sha256 = %s", (digest,))
+            remaining = 0
+        else:
+            cursor.execute(
+                "UPDATE image_blob SET ref_count = ref_count - 1 WHERE sha256 = %s",
+                (digest,),
+            )
+            remaining = row[0] - 1
+        connection.commit()
+        return remaining
+    except Exception as e:
+        print(f"[DB ERROR] Error releasing image blob: {e}")
+        return None
+    finally:
+        cursor.close()
+        connection.close()
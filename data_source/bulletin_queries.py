@@ -2,6 +2,19 @@ from flask_login import current_user
 
 from data_source.db_connection import get_connection
 
+# Columns the bulletin listings need; the filter keeps full and past
+# activities out of the result set instead of dropping them in Python
+BULLETIN_COLUMNS = (
+    "id, user_id, activity_name, activity_type, skills_req, date, location, "
+    "max_pax, participant_count"
+)
+OPEN_ACTIVITY_FILTER = "date >= CURDATE() AND participant_count < max_pax"
+
+# Must match the server's ngram_token_size (MySQL default: 2)
+NGRAM_TOKEN_SIZE = 2
+FULLTEXT_OPERATORS = set('+-<>()~*"@')
+SEARCH_LIMIT = 100
+
 
 def get_host_id(activity_id: int):
     connection = get_connection()
@@ -16,20 +29,71 @@ def get_host_id(activity_id: int):
 def get_all_bulletin():
     connection = get_connection()
     cursor = connection.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM sports_activity WHERE date >= CURDATE()")
+    cursor.execute(f"""
+        SELECT {BULLETIN_COLUMNS} FROM sports_activity
+        WHERE {OPEN_ACTIVITY_FILTER}
+        ORDER BY date, id
+        """)
     bulletin_data = cursor.fetchall()
     cursor.close()
     connection.close()
     return bulletin_data
 
 
-def get_bulletin_via_name(activity_name: str):
+def build_fulltext_query(term: str) -> str:
+    """
+    Turn a user's search text into a BOOLEAN MODE query for the ngram index.
+
+    Each word becomes a quoted phrase, so "foot ball" matches rows containing
+    "foot" or "ball" as contiguous text rather than any shared bigram. Words
+    shorter than the ngram token size cannot be looked up in the index and are
+    dropped; operator characters are stripped so user input cannot change the
+    query's meaning.
+    """
+    words = [
+        "".join(c for c in word if c not in FULLTEXT_OPERATORS) for word in term.split()
+    ]
+    return " ".join(f'"{word}"' for word in words if len(word) >= NGRAM_TOKEN_SIZE)
+
+
+def search_activities(term: str, limit: int = SEARCH_LIMIT):
+    """
+    Open activities matching term in their name, location or required skills,
+    most relevant first.
+
+    Uses the idx_sports_activity_search FULLTEXT (ngram) index. Terms too
+    short for the index fall back to a LIKE scan.
+    """
     connection = get_connection()
     cursor = connection.cursor(dictionary=True)
-    cursor.execute(
-        "SELECT * FROM sports_activity WHERE activity_name LIKE %s AND date >= CURDATE()",
-        (f"%{activity_name}%",),
-    )
+    fulltext_query = build_fulltext_query(term or "")
+    if fulltext_query:
+        cursor.execute(
+            f"""
+            SELECT {BULLETIN_COLUMNS},
+                   MATCH(activity_name, location, skills_req)
+                       AGAINST (%s IN BOOLEAN MODE) AS relevance
+            FROM sports_activity
+            WHERE MATCH(activity_name, location, skills_req)
+                      AGAINST (%s IN BOOLEAN MODE)
+              AND {OPEN_ACTIVITY_FILTER}
+            ORDER BY relevance DESC, date, id
+            LIMIT %s
+            """,
+            (fulltext_query, fulltext_query, limit),
+        )
+    else:
+        pattern = f"%{(term or '').strip()}%"
+        cursor.execute(
+            f"""
+            SELECT {BULLETIN_COLUMNS} FROM sports_activity
+            WHERE (activity_name LIKE %s OR location LIKE %s OR skills_req LIKE %s)
+              AND {OPEN_ACTIVITY_FILTER}
+            ORDER BY date, id
+            LIMIT %s
+            """,
+            (pattern, pattern, pattern, limit),
+        )
     bulletin_data = cursor.fetchall()
     cursor.close()
     connection.close()
@@ -49,20 +113,88 @@ def get_sports_activity_by_id(activity_id: int):
     return activity_data
 
 
-def update_sports_activity(activity_id: int, user_id_list_join: str) -> bool:
+# Outcomes of add_participant
+JOINED = "joined"
+ALREADY_JOINED = "already_joined"
+ACTIVITY_FULL = "full"
+
+
+def add_participant(activity_id: int, user_id: int) -> str:
+    """
+    Join an activity, enforcing capacity and de-duplication in the database.
+
+    The conditional UPDATE claims a slot and row-locks the activity, so
+    concurrent joins to one activity are serialised by InnoDB and can never
+    push participant_count past max_pax. The participant row is inserted in
+    the same transaction while the lock is held.
+
+    Returns:
+        str: JOINED, ALREADY_JOINED or ACTIVITY_FULL (also returned for
+             past or unknown activities).
+    """
     connection = get_connection()
     cursor = connection.cursor()
-    query = """
-        UPDATE sports_activity
-        SET user_id_list_join = %s
-        WHERE id = %s
-    """
-    cursor.execute(query, (user_id_list_join, activity_id))
-    connection.commit()
-    success = cursor.rowcount > 0  # True if at least one row was updated
-    cursor.close()
-    connection.close()
-    return success
+    try:
+        cursor.execute(
+            """
+            UPDATE sports_activity
+            SET participant_count = participant_count + 1
+            WHERE id = %s AND participant_count < max_pax AND date >= CURDATE()
+            """,
+            (activity_id,),
+        )
+        if cursor.rowcount == 0:
+            return ACTIVITY_FULL
+        # The (activity_id, user_id) primary key rejects a repeated join
+        cursor.execute(
+            "INSERT IGNORE INTO activity_participant (activity_id, user_id) VALUES (%s, %s)",
+            (activity_id, user_id),
+        )
+        outcome = JOINED
+        if cursor.rowcount == 0:
+            # Hand the claimed slot back. A ROLLBACK would also discard
+            # anything else the request has written (see db_session)
+            cursor.execute(
+                "UPDATE sports_activity SET participant_count = participant_count - 1 WHERE id = %s",
+                (activity_id,),
+            )
+            outcome = ALREADY_JOINED
+        connection.commit()
+        return outcome
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def remove_participant(activity_id: int, user_id: int) -> bool:
+    connection = get_connection()
+    cursor = connection.cursor()
+    try:
+        # Lock the activity row before touching its participants, in the same
+        # order as add_participant, so a concurrent join and leave cannot deadlock
+        cursor.execute(
+            "SELECT id FROM sports_activity WHERE id = %s FOR UPDATE", (activity_id,)
+        )
+        cursor.fetchall()
+        cursor.execute(
+            "DELETE FROM activity_participant WHERE activity_id = %s AND user_id = %s",
+            (activity_id, user_id),
+        )
+        success = cursor.rowcount > 0  # False if the user had not joined
+        if success:
+            cursor.execute(
+                """
+                UPDATE sports_activity
+                SET participant_count = GREATEST(participant_count - 1, 0)
+                WHERE id = %s
+                """,
+                (activity_id,),
+            )
+        connection.commit()
+        return success
+    finally:
+        cursor.close()
+        connection.close()
 
 
 def insert_new_activity(activity_data):
@@ -95,11 +227,17 @@ def insert_new_activity(activity_data):
 
 
 def get_bulletin_by_types(activity_types):
+    if not activity_types:
+        return []
     connection = get_connection()
     cursor = connection.cursor(dictionary=True)
 
     format_strings = ",".join(["%s"] * len(activity_types))
-    query = f"SELECT * FROM sports_activity WHERE activity_type IN ({format_strings}) AND date >= CURDATE()"
+    query = f"""
+        SELECT {BULLETIN_COLUMNS} FROM sports_activity
+        WHERE activity_type IN ({format_strings}) AND {OPEN_ACTIVITY_FILTER}
+        ORDER BY date, id
+    """
 
     cursor.execute(query, tuple(activity_types))
     data = cursor.fetchall()
@@ -117,13 +255,12 @@ def update_sports_activity_details(
     date,
     location,
     max_pax,
-    user_id_list_join,
 ):
     connection = get_connection()
     cursor = connection.cursor()
     query = """
         UPDATE sports_activity
-        SET activity_name=%s, activity_type=%s, skills_req=%s, date=%s, location=%s, max_pax=%s, user_id_list_join=%s
+        SET activity_name=%s, activity_type=%s, skills_req=%s, date=%s, location=%s, max_pax=%s
         WHERE id=%s
     """
     cursor.execute(
@@ -135,7 +272,6 @@ def update_sports_activity_details(
             date,
             location,
             max_pax,
-            user_id_list_join,
             activity_id,
         ),
     )
@@ -150,35 +286,25 @@ def get_joined_user_names_by_activity_id(activity_id: int):
     cursor = connection.cursor(dictionary=True)
     # Check if current user is the host
     cursor.execute(
-        "SELECT user_id, user_id_list_join FROM sports_activity WHERE id = %s",
+        "SELECT user_id FROM sports_activity WHERE id = %s",
         (activity_id,),
     )
     result = cursor.fetchone()
-    if not result:
-        cursor.close()
-        connection.close()
-        return []
     # Only allow the host to see the joined users
-    if str(result["user_id"]) != str(current_user.get_id()):
+    if not result or str(result["user_id"]) != str(current_user.get_id()):
         cursor.close()
         connection.close()
         return []
-    # Get the user_id_list_join for the activity
-    if not result.get("user_id_list_join"):
-        cursor.close()
-        connection.close()
-        return []
-    user_id_list = [
-        uid.strip() for uid in result["user_id_list_join"].split(",") if uid.strip()
-    ]
-    if not user_id_list:
-        cursor.close()
-        connection.close()
-        return []
-    # Fetch only user names for these IDs
-    format_strings = ",".join(["%s"] * len(user_id_list))
-    query = f"SELECT name FROM user WHERE id IN ({format_strings})"
-    cursor.execute(query, tuple(user_id_list))
+    cursor.execute(
+        """
+        SELECT u.name
+        FROM activity_participant ap
+        JOIN user u ON u.id = ap.user_id
+        WHERE ap.activity_id = %s
+        ORDER BY ap.joined_at, ap.user_id
+        """,
+        (activity_id,),
+    )
     users = cursor.fetchall()
     cursor.close()
     connection.close()
@@ -209,8 +335,9 @@ def get_joined_activities(user_id):
     cursor.execute(
         """
         SELECT sa.id, sa.activity_name, sa.activity_type, sa.skills_req, sa.date, sa.location, sa.max_pax
-        FROM sports_activity sa
-        WHERE sa.user_id != %s AND sa.date >= CURDATE() AND FIND_IN_SET(%s, sa.user_id_list_join)
+        FROM activity_participant ap
+        JOIN sports_activity sa ON sa.id = ap.activity_id
+        WHERE ap.user_id = %s AND sa.user_id != %s AND sa.date >= CURDATE()
         """,
         (user_id, user_id),
     )
@@ -1,20 +1,95 @@
 import os
+import threading
 
 import mysql.connector
+from flask import has_request_context
 from mysql.connector import Error
 
+from data_source.db_pool import ConnectionPool, PoolTimeoutError
+from data_source.db_session import get_request_connection
 
-def get_connection():
+# Upper bound for a single worker's pool when DB_POOL_SIZE is not set.
+# Each of a gunicorn worker's request threads (GUNICORN_THREADS, 8 by default)
+# uses one connection at a time; the rest are spare for background threads.
+MAX_DEFAULT_POOL_SIZE = 10
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _connect():
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        user=os.getenv("DB_USER", ""),
+        password=os.getenv("DB_PASSWORD", ""),
+        database=os.getenv("DB_NAME", ""),
+        # Connections are reused across queries, so drain any rows a caller
+        # left unread instead of failing the next statement
+        consume_results=True,
+    )
+
+
+def get_pool_size():
+    """
+    Pool size for this worker process.
+
+    DB_POOL_SIZE wins if set. Otherwise the DB_MAX_CONNECTIONS budget is split
+    across the gunicorn workers (WEB_CONCURRENCY) so that all workers together
+    stay below MySQL's max_connections.
+    """
+    explicit = os.getenv("DB_POOL_SIZE")
+    if explicit:
+        return max(1, int(explicit))
+    budget = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    return max(1, min(MAX_DEFAULT_POOL_SIZE, budget // workers))
+
+
+def get_pool():
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _connect,
+                    size=get_pool_size(),
+                    timeout=float(os.getenv("DB_POOL_TIMEOUT", "5")),
+                    max_idle=float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+                    max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+                )
+    return _pool
+
+
+def get_pool_stats():
+    """Checkout/wait/timeout counters for the current worker's pool."""
+    return get_pool().stats()
+
+
+def _acquire():
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            user=os.getenv("DB_USER", ""),
-            password=os.getenv("DB_PASSWORD", ""),
-            database=os.getenv("DB_NAME", ""),
-        )
-        if connection.is_connected():
-            return connection
-        return None  # Return None if not connected
-    except Error as e:
+        return get_pool().acquire()
+    except (Error, PoolTimeoutError) as e:
         print(f"[DB ERROR] {e}")
-        return None
+        return None  # Return None if not connected
+
+
+def get_connection():
+    """
+    A connection for one query function; callers always close() it.
+
+    Outside a request this is a pooled connection, and commit() commits.
+
+    Inside a request every query shares one connection and one transaction,
+    and commit() only marks the request's unit of work as dirty. The real
+    COMMIT runs once the view returns, before the response is sent; if it
+    fails the request becomes a 500. An unhandled exception (mark_rollback())
+    or a query function calling rollback() discards every write of the
+    request, so a query function returning success does not by itself mean
+    the write is durable. Side effects that must only happen once it is (waking the mail
+    worker, writing blob files, submitting images for processing) go through
+    data_source.db_session.call_after_commit.
+    """
+    if has_request_context():
+        return get_request_connection(_acquire)
+    return _acquire()
@@ -0,0 +1,184 @@
+"""Bounded, fork-aware connection pool used by data_source.db_connection"""
+
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+class PooledConnection:
+    """
+    Thin proxy around a raw connection handed out by ConnectionPool.
+
+    Everything is delegated to the underlying connection except close(),
+    which gives the connection back to the pool instead of dropping it, so
+    existing `connection.close()` call sites keep working unchanged.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._raw is not None:
+            self._pool._release(self)
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise AttributeError(f"Connection already returned to pool ({name})")
+        return getattr(raw, name)
+
+
+class ConnectionPool:
+    """
+    A bounded pool of database connections.
+
+    Args:
+        connect (callable): Factory returning a new raw connection.
+        size (int): Maximum number of open connections (idle + in use).
+        timeout (float): Seconds to wait for a free connection before failing.
+        max_idle (float): Idle connections older than this are closed.
+        max_lifetime (float): Connections older than this are recycled.
+    """
+
+    def __init__(self, connect, size=5, timeout=5.0, max_idle=300, max_lifetime=1800):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = deque()  # (raw, created_at, last_used); newest on the right
+        self._total = 0
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "created": 0,
+            "discarded": 0,
+        }
+
+    def _check_fork(self):
+        # A forked worker must never reuse (or close) sockets inherited from
+        # the parent; simply forget them and start with an empty pool.
+        if os.getpid() != self._pid:
+            self._reset_state()
+
+    def acquire(self):
+        """Check out a healthy connection, opening a new one if under the limit."""
+        self._check_fork()
+        deadline = time.monotonic() + self.timeout
+        with self._available:
+            self._stats["checkouts"] += 1
+            waited = False
+            while True:
+                self._evict_idle()
+                while self._idle:
+                    raw, created_at, _ = self._idle.pop()
+                    if self._is_expired(created_at) or not self._is_healthy(raw):
+                        self._discard(raw)
+                        continue
+                    return PooledConnection(self, raw, created_at)
+
+                if self._total < self.size:
+                    self._total += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.timeout}s waiting for a DB connection"
+                    )
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                self._available.wait(remaining)
+
+        # Open the new connection outside the lock so other threads can proceed
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._available:
+                self._total -= 1
+                self._available.notify()
+            raise
+        with self._lock:
+            self._stats["created"] += 1
+        return PooledConnection(self, raw, time.monotonic())
+
+    def _release(self, pooled):
+        raw, created_at = pooled._raw, pooled._created_at
+        pooled._raw = None
+        if os.getpid() != self._pid:
+            return
+        reusable = not self._is_expired(created_at)
+        if reusable:
+            try:
+                # Never hand an open transaction to the next borrower
+                raw.rollback()
+            except Exception:
+                reusable = False
+        with self._available:
+            if reusable:
+                self._idle.append((raw, created_at, time.monotonic()))
+            else:
+                self._discard(raw)
+            self._available.notify()
+
+    def _is_expired(self, created_at):
+        return time.monotonic() - created_at > self.max_lifetime
+
+    @staticmethod
+    def _is_healthy(raw):
+        try:
+            return raw.is_connected()
+        except Exception:
+            return False
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][2] > self.max_idle:
+            raw, _, _ = self._idle.popleft()
+            self._discard(raw)
+
+    def _discard(self, raw):
+        # Caller holds the lock
+        self._total -= 1
+        self._stats["discarded"] += 1
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        """Return a snapshot of pool counters."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["size"] = self.size
+            snapshot["open"] = self._total
+            snapshot["idle"] = len(self._idle)
+            snapshot["in_use"] = self._total - len(self._idle)
+        return snapshot
+
+    def close_all(self):
+        """Close every idle connection (in-use ones are closed on release)."""
+        with self._available:
+            while self._idle:
+                raw, _, _ = self._idle.pop()
+                self._discard(raw)
+            self._available.notify_all()
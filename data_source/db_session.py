@@ -0,0 +1,157 @@
+"""Request-scoped unit of work: one pooled connection shared by a whole request"""
+
+from flask import current_app, g, has_request_context
+from flask import session as user_session
+
+SESSION_KEY = "_db_session"
+
+
+class TransactionRolledBack(Exception):
+    """A query function rolled back the transaction the whole request shares."""
+
+
+class RequestConnection:
+    """
+    Connection wrapper stored on flask.g for the duration of one request.
+
+    Query functions keep calling commit() and close() as before, but:
+      - close() is a no-op, the connection is given back when the request ends
+      - commit() only marks the unit of work as dirty; the real COMMIT is
+        issued once after the view returns (or ROLLBACK if the request failed)
+      - rollback() rolls back everything the request has written so far and
+        raises TransactionRolledBack, so the request fails instead of
+        reporting success for writes that were discarded
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.dirty = False
+        self.rollback_only = False
+        self.after_commit = []
+
+    def commit(self):
+        self.dirty = True
+
+    def rollback(self):
+        # Earlier query functions may already have returned success for
+        # writes this discards; the request must not carry on as if they held
+        self._connection.rollback()
+        self.dirty = False
+        self.rollback_only = True
+        raise TransactionRolledBack("The request's transaction was rolled back")
+
+    def close(self):
+        pass
+
+    def finish(self, commit=True):
+        """
+        Commit or roll back the unit of work and return the connection.
+
+        Returns:
+            bool: True if the writes were committed.
+        """
+        committed = False
+        try:
+            if commit and self.dirty and not self.rollback_only:
+                self._connection.commit()
+                committed = True
+            else:
+                self._connection.rollback()
+        finally:
+            self._connection.close()
+            self._connection = None
+        return committed
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def get_request_connection(open_connection):
+    """
+    Return the connection for the current request, checking one out on first use.
+
+    Args:
+        open_connection (callable): Returns a pooled connection, or None on failure.
+    """
+    session = g.get(SESSION_KEY)
+    if session is None:
+        connection = open_connection()
+        if connection is None:
+            return None
+        session = RequestConnection(connection)
+        setattr(g, SESSION_KEY, session)
+    return session
+
+
+def mark_rollback():
+    """Make the current request's unit of work roll back instead of commit."""
+    if has_request_context():
+        session = g.get(SESSION_KEY)
+        if session is not None:
+            session.rollback_only = True
+
+
+def call_after_commit(callback):
+    """
+    Run callback once the current request's writes are committed.
+
+    Outside a request (or before the request has used the database) writes
+    are committed by the caller straight away, so callback runs immediately.
+    Callbacks are dropped if the request rolls back.
+    """
+    session = g.get(SESSION_KEY) if has_request_context() else None
+    if session is None:
+        callback()
+        return
+    session.after_commit.append(callback)
+
+
+def _run_after_commit(session):
+    for callback in session.after_commit:
+        try:
+            callback()
+        except Exception as e:
+            current_app.logger.error(f"After-commit callback failed: {e}")
+
+
+def commit_request_session(response):
+    """
+    after_request handler: commit the unit of work before the response is sent.
+
+    A failed COMMIT is raised, so the request ends in the 500 error handler
+    rather than with the view's redirect or success message for writes that
+    were lost. Row locks taken by the request are released here too.
+    """
+    session = g.pop(SESSION_KEY, None)
+    if session is None:
+        return response
+    try:
+        committed = session.finish()
+    except Exception as e:
+        current_app.logger.error(
+            f"[DB ERROR] Failed to commit request transaction: {e}"
+        )
+        # Whatever the view flashed described the writes that were just lost
+        user_session.pop("_flashes", None)
+        raise
+    if committed:
+        _run_after_commit(session)
+    return response
+
+
+def end_request_session(exc=None):
+    """Teardown handler: roll back and release a connection after_request missed."""
+    session = g.pop(SESSION_KEY, None)
+    if session is None:
+        return
+    try:
+        session.finish(commit=False)
+    except Exception as e:
+        current_app.logger.error(
+            f"[DB ERROR] Failed to roll back request transaction: {e}"
+        )
+
+
+def init_app(app):
+    app.after_request(commit_request_session)
+    app.teardown_request(end_request_session)
@@ -0,0 +1,107 @@
+"""Cache invalidation messages shared between gunicorn workers"""
+
+import threading
+from collections import defaultdict
+
+from data_source.redis_client import get_redis_client
+
+CHANNEL_PREFIX = "invalidate:"
+
+
+class LocalInvalidationBus:
+    """
+    In-process stand-in for a pub/sub channel.
+
+    publish() calls every subscriber of the channel in this worker only, so
+    other workers rely on their caches' TTLs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(list)
+
+    def subscribe(self, channel, callback):
+        """Call callback(key) whenever key is published on channel."""
+        with self._lock:
+            self._subscribers[channel].append(callback)
+
+    def publish(self, channel, key):
+        self._deliver(channel, key)
+
+    def _deliver(self, channel, key):
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            callback(key)
+
+
+class RedisInvalidationBus(LocalInvalidationBus):
+    """
+    Redis pub/sub bus: a publish reaches every worker of every container.
+
+    The local subscribers are called straight away as well, so the
+    publishing worker never depends on the round trip.
+
+    Args:
+        client: A redis.Redis-compatible client (publish() and pubsub()).
+    """
+
+    def __init__(self, client):
+        super().__init__()
+        self._client = client
+        self._listener = None
+
+    def subscribe(self, channel, callback):
+        super().subscribe(channel, callback)
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name="invalidation-listener", daemon=True
+                )
+                self._listener.start()
+
+    def publish(self, channel, key):
+        self._deliver(channel, key)
+        try:
+            self._client.publish(f"{CHANNEL_PREFIX}{channel}", str(key))
+        except Exception as e:
+            print(f"[REDIS ERROR] Failed to publish invalidation: {e}")
+
+    def handle_message(self, message):
+        """Deliver one pub/sub message from another worker."""
+        if message.get("type") != "pmessage":
+            return
+        channel = _text(message["channel"])[len(CHANNEL_PREFIX) :]
+        self._deliver(channel, _text(message["data"]))
+
+    def _listen(self):
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+        for message in pubsub.listen():
+            try:
+                self.handle_message(message)
+            except Exception as e:
+                print(f"[REDIS ERROR] Failed to apply invalidation: {e}")
+
+
+def _text(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_invalidation_bus():
+    """Redis-backed bus when REDIS_URL is configured, otherwise the local stand-in."""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                client = get_redis_client()
+                _bus = (
+                    RedisInvalidationBus(client)
+                    if client is not None
+                    else LocalInvalidationBus()
+                )
+    return _bus
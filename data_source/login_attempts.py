@@ -0,0 +1,113 @@
+"""Sliding-window failed-login counters, kept out of MySQL until a lockout"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from data_source.redis_client import get_redis_client
+
+DEFAULT_WINDOW_SECONDS = 10 * 60
+KEY_PREFIX = "failed_login:"
+
+
+class LocalFailedLoginCounter:
+    """
+    Per-worker stand-in for the shared counter.
+
+    Each user has a deque of failure times; entries older than the window
+    are dropped as the user is touched. Only the `max_users` most recently
+    failing users are tracked, so a spray across many accounts cannot grow
+    the worker without bound.
+
+    Args:
+        window_seconds (float): Length of the sliding window.
+        max_users (int): Users tracked before the least recent is forgotten.
+    """
+
+    def __init__(
+        self, window_seconds=DEFAULT_WINDOW_SECONDS, max_users=100000, clock=time.time
+    ):
+        self.window_seconds = window_seconds
+        self.max_users = max_users
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = OrderedDict()
+
+    def record(self, user_id):
+        """Record a failure now; returns the failure times still in the window."""
+        now = self._clock()
+        with self._lock:
+            failures = self._failures.get(user_id)
+            if failures is None:
+                failures = self._failures[user_id] = deque()
+            self._failures.move_to_end(user_id)
+            failures.append(now)
+            self._expire(failures, now)
+            while len(self._failures) > self.max_users:
+                self._failures.popitem(last=False)
+            return list(failures)
+
+    def clear(self, user_id):
+        """Forget the user's failures; returns True if there were any."""
+        with self._lock:
+            return bool(self._failures.pop(user_id, None))
+
+    def _expire(self, failures, now):
+        while failures and failures[0] <= now - self.window_seconds:
+            failures.popleft()
+
+
+class RedisFailedLoginCounter:
+    """
+    Counter shared by every worker: one sorted set of failure times per user,
+    trimmed to the window and expiring on its own once the user stops failing.
+
+    Args:
+        client: A redis.Redis-compatible client (pipeline() and delete()).
+    """
+
+    def __init__(self, client, window_seconds=DEFAULT_WINDOW_SECONDS, clock=time.time):
+        self.client = client
+        self.window_seconds = window_seconds
+        self._clock = clock
+
+    def record(self, user_id):
+        now = self._clock()
+        key = f"{KEY_PREFIX}{user_id}"
+        pipe = self.client.pipeline()
+        pipe.zadd(key, {f"{now}:{uuid.uuid4().hex}": now})
+        pipe.zremrangebyscore(key, "-inf", now - self.window_seconds)
+        pipe.zrange(key, 0, -1, withscores=True)
+        pipe.expire(key, int(self.window_seconds) + 1)
+        failures = pipe.execute()[2]
+        return [score for _, score in failures]
+
+    def clear(self, user_id):
+        return bool(self.client.delete(f"{KEY_PREFIX}{user_id}"))
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def get_failed_login_counter():
+    """
+    Redis-backed counter when REDIS_URL is configured, otherwise the
+    per-worker stand-in. The window is FAILED_LOGIN_WINDOW seconds.
+    """
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                window = float(
+                    os.getenv("FAILED_LOGIN_WINDOW", str(DEFAULT_WINDOW_SECONDS))
+                )
+                client = get_redis_client()
+                _counter = (
+                    RedisFailedLoginCounter(client, window)
+                    if client is not None
+                    else LocalFailedLoginCounter(window)
+                )
+    return _counter
@@ -0,0 +1,135 @@
+"""Queries for the mail_outbox table drained by the background mail worker"""
+
+from data_source.db_connection import get_connection
+
+LAST_ERROR_LENGTH = 1000
+
+
+def enqueue_mail(to_email, subject, html_body):
+    """
+    Queue an email. Inside a request the row is committed together with the
+    request's other writes, so a rolled-back request sends nothing.
+
+    Returns:
+        int: The outbox id
+
+    Raises:
+        mysql.connector.Error: The insert failed; the caller decides whether
+        that fails the request
+    """
+    connection = get_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO mail_outbox (to_email, subject, html_body) VALUES (%s, %s, %s)",
+            (to_email, subject, html_body),
+        )
+        mail_id = cursor.lastrowid
+        connection.commit()
+        return mail_id
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def claim_due_mails(batch_size, lease_seconds):
+    """
+    Claim up to batch_size pending mails that are due.
+
+    SKIP LOCKED lets several workers claim at once without waiting on each
+    other. Each claimed row has its attempt counted and next_attempt_at moved
+    lease_seconds ahead before the transaction commits. The send then happens
+    outside the transaction, and a worker that dies mid-send only delays the
+    mail until the lease runs out.
+
+    Returns:
+        list: Row dicts with id, to_email, subject, html_body and attempts
+    """
+    connection = get_connection()
+    if connection is None:
+        return []
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT id, to_email, subject, html_body, attempts
+            FROM mail_outbox
+            WHERE status = 'pending' AND next_attempt_at <= NOW()
+            ORDER BY next_attempt_at, id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+            """,
+            (batch_size,),
+        )
+        rows = cursor.fetchall()
+        if rows:
+            placeholders = ", ".join(["%s"] * len(rows))
+            cursor.execute(
+                f"""
+                UPDATE mail_outbox
+                SET attempts = attempts + 1,
+                    next_attempt_at = NOW() + INTERVAL %s SECOND
+                WHERE id IN ({placeholders})
+                """,
+                (lease_seconds, *[row["id"] for row in rows]),
+            )
+        connection.commit()
+        for row in rows:
+            row["attempts"] += 1
+        return rows
+    except Exception as e:
+        print(f"[DB ERROR] Failed to claim mails: {e}")
+        connection.rollback()
+        return []
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def mark_mails_sent(mail_ids):
+    """Mark a batch of delivered mails in one statement."""
+    if not mail_ids:
+        return
+    connection = get_connection()
+    cursor = connection.cursor()
+    placeholders = ", ".join(["%s"] * len(mail_ids))
+    cursor.execute(
+        f"""
+        UPDATE mail_outbox SET status = 'sent', sent_at = NOW(), last_error = NULL
+        WHERE id IN ({placeholders})
+        """,
+        tuple(mail_ids),
+    )
+    connection.commit()
+    cursor.close()
+    connection.close()
+
+
+def reschedule_mail(mail_id, delay_seconds, error):
+    """Leave a failed mail pending and retry it after delay_seconds."""
+    connection = get_connection()
+    cursor = connection.cursor()
+    cursor.execute(
+        """
+        UPDATE mail_outbox
+        SET next_attempt_at = NOW() + INTERVAL %s SECOND, last_error = %s
+        WHERE id = %s
+        """,
+        (delay_seconds, str(error)[:LAST_ERROR_LENGTH], mail_id),
+    )
+    connection.commit()
+    cursor.close()
+    connection.close()
+
+
+def dead_letter_mail(mail_id, error):
+    """Give up on a mail; it stays in the table with its last error."""
+    connection = get_connection()
+    cursor = connection.cursor()
+    cursor.execute(
+        "UPDATE mail_outbox SET status = 'dead', last_error = %s WHERE id = %s",
+        (str(error)[:LAST_ERROR_LENGTH], mail_id),
+    )
+    connection.commit()
+    cursor.close()
+    connection.close()
@@ -0,0 +1,114 @@
+"""Ways to hand an email to the outside world, selected with MAIL_TRANSPORT"""
+
+import os
+import smtplib
+import uuid
+from email.message import EmailMessage
+
+from sendgrid import SendGridAPIClient
+from sendgrid.helpers.mail import Mail
+
+DEFAULT_FROM_EMAIL = "buddiesfinder@gmail.com"
+
+
+class SendGridTransport:
+    """SendGrid's HTTP API (EMAILVERIFICATION_API_KEY)."""
+
+    def __init__(self, api_key, from_email=DEFAULT_FROM_EMAIL):
+        self.client = SendGridAPIClient(api_key)
+        self.from_email = from_email
+
+    def send(self, to_email, subject, html_body):
+        self.client.send(
+            Mail(
+                from_email=self.from_email,
+                to_emails=to_email,
+                subject=subject,
+                html_content=html_body,
+            )
+        )
+
+
+def build_message(from_email, to_email, subject, html_body):
+    message = EmailMessage()
+    message["From"] = from_email
+    message["To"] = to_email
+    message["Subject"] = subject
+    message.set_content(html_body, subtype="html")
+    return message
+
+
+class SMTPTransport:
+    """Any SMTP server, e.g. a local MailHog/Mailpit sink during development."""
+
+    def __init__(
+        self,
+        host,
+        port=25,
+        username=None,
+        password=None,
+        use_tls=False,
+        from_email=DEFAULT_FROM_EMAIL,
+        timeout=10,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.from_email = from_email
+        self.timeout = timeout
+
+    def send(self, to_email, subject, html_body):
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(
+                build_message(self.from_email, to_email, subject, html_body)
+            )
+
+
+class FileTransport:
+    """Writes each email to `directory` as an .eml file instead of sending it."""
+
+    def __init__(self, directory, from_email=DEFAULT_FROM_EMAIL):
+        self.directory = directory
+        self.from_email = from_email
+
+    def send(self, to_email, subject, html_body):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{uuid.uuid4().hex}.eml")
+        with open(path, "wb") as f:
+            f.write(
+                build_message(self.from_email, to_email, subject, html_body).as_bytes()
+            )
+
+
+def get_mail_transport():
+    """
+    Transport named by MAIL_TRANSPORT: "sendgrid" (default), "smtp"
+    (MAIL_SMTP_HOST, MAIL_SMTP_PORT, MAIL_SMTP_USER, MAIL_SMTP_PASSWORD,
+    MAIL_SMTP_TLS) or "file" (MAIL_FILE_DIR).
+    """
+    name = os.getenv("MAIL_TRANSPORT", "sendgrid").lower()
+    from_email = os.getenv("MAIL_FROM", DEFAULT_FROM_EMAIL)
+    if name == "sendgrid":
+        return SendGridTransport(
+            os.getenv("EMAILVERIFICATION_API_KEY"), from_email=from_email
+        )
+    if name == "smtp":
+        return SMTPTransport(
+            os.getenv("MAIL_SMTP_HOST", "localhost"),
+            port=int(os.getenv("MAIL_SMTP_PORT", "25")),
+            username=os.getenv("MAIL_SMTP_USER") or None,
+            password=os.getenv("MAIL_SMTP_PASSWORD") or None,
+            use_tls=os.getenv("MAIL_SMTP_TLS", "0") == "1",
+            from_email=from_email,
+        )
+    if name == "file":
+        return FileTransport(
+            os.getenv("MAIL_FILE_DIR", "mail_sink"), from_email=from_email
+        )
+    raise ValueError(f"Unknown MAIL_TRANSPORT: {name}")
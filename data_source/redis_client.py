@@ -0,0 +1,30 @@
+"""Optional shared Redis connection, enabled by setting REDIS_URL"""
+
+import os
+import threading
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_redis_client():
+    """
+    Return the process-wide Redis client, or None when REDIS_URL is unset.
+
+    The redis package is only needed when REDIS_URL is set
+    (pip install redis); without it the app falls back to per-worker state.
+    """
+    global _client
+    url = os.getenv("REDIS_URL")
+    if not url:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                try:
+                    import redis
+                except ImportError:
+                    print("[REDIS ERROR] REDIS_URL is set but redis is not installed")
+                    return None
+                _client = redis.Redis.from_url(url)
+    return _client
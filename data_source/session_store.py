@@ -0,0 +1,231 @@
+"""Server-side session storage, selected with SESSION_BACKEND"""
+
+import os
+from datetime import datetime
+from datetime import timedelta as TimeDelta
+
+from flask.sessions import SecureCookieSessionInterface
+from flask_session import Session
+from flask_session.base import ServerSideSessionInterface
+
+from data_source.db_connection import get_connection
+from data_source.redis_client import get_redis_client
+
+ACTIVITY_KEY = "last_activity"
+DEFAULT_ACTIVITY_GRANULARITY = 60
+EXPIRED_SESSION_BATCH_SIZE = 1000
+
+
+def is_activity_only_change(persisted, current, granularity):
+    """
+    True if the only difference between the stored and the current session
+    is a last_activity timestamp that moved by less than `granularity` seconds.
+
+    Such a change is not worth a storage write: the idle timeout is 15
+    minutes, so a timestamp that is up to a minute stale changes nothing.
+    """
+    if persisted is None or ACTIVITY_KEY not in persisted:
+        return False
+    if {k: v for k, v in current.items() if k != ACTIVITY_KEY} != {
+        k: v for k, v in persisted.items() if k != ACTIVITY_KEY
+    }:
+        return False
+    try:
+        before = datetime.fromisoformat(persisted[ACTIVITY_KEY])
+        after = datetime.fromisoformat(current[ACTIVITY_KEY])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return (after - before).total_seconds() < granularity
+
+
+def record_activity(session, now, granularity=DEFAULT_ACTIVITY_GRANULARITY):
+    """
+    Move session["last_activity"] to now, at most once per `granularity` seconds.
+
+    Leaving the session untouched in between keeps session.modified False, so
+    the backend does not write anything for most requests. The idle timeout
+    is measured from the last recorded activity, so it can fire up to
+    `granularity` seconds early but never late.
+    """
+    last_activity = session.get(ACTIVITY_KEY)
+    if isinstance(last_activity, str):
+        last_activity = datetime.fromisoformat(last_activity)
+    if last_activity is None or (now - last_activity).total_seconds() >= granularity:
+        session[ACTIVITY_KEY] = now.isoformat()
+
+
+class ThrottledSessionMixin:
+    """
+    Skips the storage write when a request only bumped last_activity.
+
+    The session's stored contents are remembered at open time, so save time
+    can tell a real change from a heartbeat.
+    """
+
+    activity_granularity = DEFAULT_ACTIVITY_GRANULARITY
+
+    def open_session(self, app, request):
+        session = super().open_session(app, request)
+        if session is not None:
+            session.persisted = dict(session) if session else None
+        return session
+
+    def regenerate(self, session):
+        super().regenerate(session)
+        # The data now lives under a new id that has never been stored
+        session.persisted = None
+
+    def needs_write(self, session):
+        return session.modified and not is_activity_only_change(
+            getattr(session, "persisted", None),
+            dict(session),
+            self.activity_granularity,
+        )
+
+
+class MySQLSessionInterface(ThrottledSessionMixin, ServerSideSessionInterface):
+    """
+    Sessions in the http_session table, shared by every container.
+
+    Expired rows are removed by `flask session_cleanup` (registered by
+    Flask-Session for stores without native expiry).
+    """
+
+    ttl = False
+
+    def should_set_storage(self, app, session):
+        return self.needs_write(session)
+
+    def _retrieve_session_data(self, store_id):
+        connection = get_connection()
+        cursor = connection.cursor()
+        cursor.execute(
+            "SELECT data FROM http_session WHERE id = %s AND expires_at > NOW()",
+            (store_id,),
+        )
+        row = cursor.fetchone()
+        cursor.close()
+        connection.close()
+        return self.serializer.decode(bytes(row[0])) if row else None
+
+    def _delete_session(self, store_id):
+        connection = get_connection()
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM http_session WHERE id = %s", (store_id,))
+        connection.commit()
+        cursor.close()
+        connection.close()
+
+    def _upsert_session(self, session_lifetime: TimeDelta, session, store_id):
+        connection = get_connection()
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            INSERT INTO http_session (id, data, expires_at)
+            VALUES (%s, %s, NOW() + INTERVAL %s SECOND)
+            ON DUPLICATE KEY UPDATE data = VALUES(data), expires_at = VALUES(expires_at)
+            """,
+            (
+                store_id,
+                self.serializer.encode(session),
+                int(session_lifetime.total_seconds()),
+            ),
+        )
+        connection.commit()
+        cursor.close()
+        connection.close()
+
+    def _delete_expired_sessions(self):
+        connection = get_connection()
+        cursor = connection.cursor()
+        while True:
+            cursor.execute(
+                "DELETE FROM http_session WHERE expires_at <= NOW() LIMIT %s",
+                (EXPIRED_SESSION_BATCH_SIZE,),
+            )
+            connection.commit()
+            if cursor.rowcount < EXPIRED_SESSION_BATCH_SIZE:
+                break
+        cursor.close()
+        connection.close()
+
+
+class RedisSessionInterface(ThrottledSessionMixin, ServerSideSessionInterface):
+    """
+    Sessions in Redis (or anything speaking its GET/SET/DEL protocol).
+
+    Args:
+        client: Object with get(key), set(name, value, ex) and delete(key).
+    """
+
+    ttl = True
+
+    def __init__(self, app, client, **kwargs):
+        self.client = client
+        super().__init__(app, **kwargs)
+
+    def should_set_storage(self, app, session):
+        return self.needs_write(session)
+
+    def _retrieve_session_data(self, store_id):
+        data = self.client.get(store_id)
+        return self.serializer.decode(data) if data else None
+
+    def _delete_session(self, store_id):
+        self.client.delete(store_id)
+
+    def _upsert_session(self, session_lifetime: TimeDelta, session, store_id):
+        self.client.set(
+            name=store_id,
+            value=self.serializer.encode(session),
+            ex=int(session_lifetime.total_seconds()),
+        )
+
+
+class SignedCookieSessionInterface(ThrottledSessionMixin, SecureCookieSessionInterface):
+    """
+    Flask's signed-cookie sessions, for deployments whose sessions are small.
+
+    Nothing is stored on the server, so there is no session id to rotate and
+    regenerate() is a no-op; the Set-Cookie header is still throttled.
+    """
+
+    def regenerate(self, session):
+        pass
+
+    def should_set_cookie(self, app, session):
+        return self.needs_write(session)
+
+
+def init_app(app):
+    """
+    Install the session backend named by SESSION_BACKEND:
+    "mysql" (default), "redis" (needs REDIS_URL), "cookie" or "filesystem".
+    """
+    backend = os.getenv("SESSION_BACKEND", "mysql").lower()
+    granularity = float(
+        os.getenv("SESSION_ACTIVITY_GRANULARITY", str(DEFAULT_ACTIVITY_GRANULARITY))
+    )
+    app.config["SESSION_ACTIVITY_GRANULARITY"] = granularity
+    # Storage writes are driven by real changes only; the 30 minute absolute
+    # timeout is enforced from session["created_at"], not by refreshing expiry
+    app.config["SESSION_REFRESH_EACH_REQUEST"] = False
+
+    if backend == "filesystem":
+        app.config["SESSION_TYPE"] = "filesystem"
+        Session(app)
+        return
+
+    if backend == "mysql":
+        interface = MySQLSessionInterface(app)
+    elif backend == "redis":
+        client = get_redis_client()
+        if client is None:
+            raise RuntimeError("SESSION_BACKEND=redis requires REDIS_URL")
+        interface = RedisSessionInterface(app, client)
+    elif backend == "cookie":
+        interface = SignedCookieSessionInterface()
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+    interface.activity_granularity = granularity
+    app.session_interface = interface
@@ -1,3 +1,4 @@
+import json
 import os
 
 from werkzeug.utils import secure_filename
@@ -6,10 +7,106 @@ from data_source.db_connection import get_connection
 
 DB_CONN_ERROR = "[DB ERROR] Could not connect to database."
 
-SELECT_LIKE_USER_IDS_QUERY = "SELECT like_user_ids FROM feed WHERE id = %s"
+# Whether the viewing user liked the post: a primary-key probe on post_like
+LIKED_BY_VIEWER_COLUMN = (
+    "EXISTS (SELECT 1 FROM post_like pl WHERE pl.post_id = f.id AND pl.user_id = %s)"
+    " AS liked"
+)
 
+# Max number of post ids per comments IN (...) query
+COMMENT_BATCH_SIZE = 500
 
-def get_all_posts():
+
+def decode_image_variants(value):
+    """feed.image_variants as a dict (label -> {"url", "width", "height"}), or None."""
+    if not value:
+        return None
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8")
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def get_comments_for_posts(connection, post_ids):
+    """
+    Load the comments of many posts in a bounded number of queries.
+
+    Args:
+        connection: Open DB connection to run the queries on.
+        post_ids (list): Feed ids to load comments for.
+
+    Returns:
+        dict: feed id -> list of comment dicts, oldest first.
+    """
+    comments_by_post = {post_id: [] for post_id in post_ids}
+    if not comments_by_post:
+        return comments_by_post
+
+    unique_ids = list(comments_by_post)
+    cursor = connection.cursor(dictionary=True)
+    try:
+        for start in range(0, len(unique_ids), COMMENT_BATCH_SIZE):
+            chunk = unique_ids[start : start + COMMENT_BATCH_SIZE]
+            format_strings = ",".join(["%s"] * len(chunk))
+            query = f"""
+                SELECT c.id, c.feed_id, c.comments, u.name as user_name, u.profile_picture
+                FROM comments c
+                JOIN user u ON c.user_id = u.id
+                WHERE c.feed_id IN ({format_strings})
+                ORDER BY c.feed_id, c.id ASC
+            """
+            cursor.execute(query, tuple(chunk))
+            for c in cursor.fetchall():
+                comments_by_post[c["feed_id"]].append(
+                    {
+                        "id": c["id"],
+                        "user": c["user_name"],
+                        "content": c["comments"],
+                        "profile_picture": c.get("profile_picture", ""),
+                    }
+                )
+    finally:
+        cursor.close()
+    return comments_by_post
+
+
+def attach_comments(connection, posts):
+    """Set post["comments"] on every post row using batched comment queries."""
+    comments_by_post = get_comments_for_posts(
+        connection, [post["id"] for post in posts]
+    )
+    for post in posts:
+        post["comments"] = comments_by_post.get(post["id"], [])
+    return posts
+
+
+def _keyset_clause(before_id, limit, params, where_prefix="WHERE"):
+    """
+    Build the WHERE/LIMIT tail for keyset pagination on feed.id (newest first).
+
+    Appends the needed values to params and returns (where_sql, limit_sql).
+    """
+    where_sql = ""
+    limit_sql = ""
+    if before_id is not None:
+        where_sql = f"{where_prefix} f.id < %s"
+        params.append(before_id)
+    if limit is not None:
+        limit_sql = "LIMIT %s"
+        params.append(limit)
+    return where_sql, limit_sql
+
+
+def get_all_posts(before_id=None, limit=None, viewer_id=None):
+    """
+    Fetch feed posts newest first.
+
+    Args:
+        before_id (int): Only return posts with an id lower than this (keyset cursor).
+        limit (int): Maximum number of posts to return, or None for all.
+        viewer_id (int): User whose like state is returned in the "liked" column.
+    """
     connection = get_connection()
     if connection is None:
         print(DB_CONN_ERROR)
@@ -17,41 +114,27 @@ def get_all_posts():
 
     cursor = connection.cursor(dictionary=True)
     try:
-        query = """
-            SELECT f.id, f.user_id, f.caption, f.image_path, f.like_user_ids, u.name as user_name, u.profile_picture
+        params = [viewer_id]
+        where_sql, limit_sql = _keyset_clause(before_id, limit, params)
+        query = f"""
+            SELECT f.id, f.user_id, f.caption, f.image_path, f.image_variants, f.like_count, {LIKED_BY_VIEWER_COLUMN},
+                   u.name as user_name, u.profile_picture
             FROM feed f
             JOIN user u ON f.user_id = u.id
+            {where_sql}
             ORDER BY f.id DESC
+            {limit_sql}
         """
-        cursor.execute(query)
+        cursor.execute(query, tuple(params))
         posts = cursor.fetchall()
+        attach_comments(connection, posts)
         for post in posts:
-            # Get comments for each post (no created_at)
-            comment_cursor = connection.cursor(dictionary=True)
-            comment_query = """
-                SELECT c.id, c.comments, u.name as user_name, u.profile_picture
-                FROM comments c
-                JOIN user u ON c.user_id = u.id
-                WHERE c.feed_id = %s
-                ORDER BY c.id ASC
-            """
-            comment_cursor.execute(comment_query, (post["id"],))
-            comments = comment_cursor.fetchall()
-            post["comments"] = [
-                {
-                    "id": c["id"],
-                    "user": c["user_name"],
-                    "content": c["comments"],
-                    "profile_picture": c.get("profile_picture", ""),
-                }
-                for c in comments
-            ]
-            comment_cursor.close()
             post["feed_id"] = post["id"]
             post["user"] = post["user_name"]
             post["content"] = post["caption"]
             post["image_url"] = post["image_path"]
-            post["likes"] = get_like_count(post["id"])
+            post["image_variants"] = decode_image_variants(post.get("image_variants"))
+            post["likes"] = post["like_count"]
             post["profile_picture"] = post.get("profile_picture", "")
         return posts
     except Exception as e:
@@ -63,6 +146,7 @@ def get_all_posts():
 
 
 def add_post(user_id, content, image_url=None):
+    """Returns the new post's id, or False if the insert failed."""
     connection = get_connection()
     if connection is None:
         print(DB_CONN_ERROR)
@@ -70,12 +154,13 @@ def add_post(user_id, content, image_url=None):
     cursor = connection.cursor()
     try:
         query = """
-            INSERT INTO feed (user_id, caption, image_path, like_user_ids)
-            VALUES (%s, %s, %s, '')
+            INSERT INTO feed (user_id, caption, image_path)
+            VALUES (%s, %s, %s)
         """
         cursor.execute(query, (user_id, content, image_url))
+        post_id = cursor.lastrowid
         connection.commit()
-        return True
+        return post_id
     except Exception as e:
         print(f"[DB ERROR] Error adding post: {e}")
         return False
@@ -106,28 +191,31 @@ def add_comment(feed_id, user_id, content):
         connection.close()
 
 
-def get_posts_by_user(username):
+def get_posts_by_user(username, viewer_id=None):
     connection = get_connection()
     if connection is None:
         print(DB_CONN_ERROR)
         return []
     cursor = connection.cursor(dictionary=True)
     try:
-        query = """
-            SELECT f.id, f.user_id, f.caption, f.image_path, f.like_user_ids, u.name as user_name
+        query = f"""
+            SELECT f.id, f.user_id, f.caption, f.image_path, f.image_variants, f.like_count, {LIKED_BY_VIEWER_COLUMN},
+                   u.name as user_name
             FROM feed f
             JOIN user u ON f.user_id = u.id
             WHERE u.name = %s
             ORDER BY f.id DESC
         """
-        cursor.execute(query, (username,))
+        cursor.execute(query, (viewer_id, username))
         posts = cursor.fetchall()
+        attach_comments(connection, posts)
         for post in posts:
             post["feed_id"] = post["id"]
             post["user"] = post["user_name"]
             post["content"] = post["caption"]
             post["image_url"] = post["image_path"]
-            post["likes"] = get_like_count(post["id"])
+            post["image_variants"] = decode_image_variants(post.get("image_variants"))
+            post["likes"] = post["like_count"]
         return posts
     except Exception as e:
         print(f"[DB ERROR] Error fetching user posts: {e}")
@@ -137,28 +225,34 @@ def get_posts_by_user(username):
         connection.close()
 
 
-def get_posts_by_user_id(user_id):
+def get_posts_by_user_id(user_id, before_id=None, limit=None, viewer_id=None):
     connection = get_connection()
     if connection is None:
         print(DB_CONN_ERROR)
         return []
     cursor = connection.cursor(dictionary=True)
     try:
-        query = """
-            SELECT f.id, f.user_id, f.caption, f.image_path, f.like_user_ids, u.name as user_name, u.profile_picture
+        params = [viewer_id, user_id]
+        where_sql, limit_sql = _keyset_clause(before_id, limit, params, "AND")
+        query = f"""
+            SELECT f.id, f.user_id, f.caption, f.image_path, f.image_variants, f.like_count, {LIKED_BY_VIEWER_COLUMN},
+                   u.name as user_name, u.profile_picture
             FROM feed f
             JOIN user u ON f.user_id = u.id
-            WHERE f.user_id = %s
+            WHERE f.user_id = %s {where_sql}
             ORDER BY f.id DESC
+            {limit_sql}
         """
-        cursor.execute(query, (user_id,))
+        cursor.execute(query, tuple(params))
         posts = cursor.fetchall()
+        attach_comments(connection, posts)
         for post in posts:
             post["feed_id"] = post["id"]
             post["user"] = post["user_name"]
             post["content"] = post["caption"]
             post["image_url"] = post["image_path"]
-            post["likes"] = get_like_count(post["id"])
+            post["image_variants"] = decode_image_variants(post.get("image_variants"))
+            post["likes"] = post["like_count"]
             post["profile_picture"] = post.get("profile_picture", "")
         return posts
     except Exception as e:
@@ -182,64 +276,36 @@ def add_post_to_db(user_id, content, image_file=None):
     return add_post(user_id, content, image_url)
 
 
-def increment_like(post_id):
-    connection = get_connection()
-    if connection is None:
-        print(DB_CONN_ERROR)
-        return False
-    cursor = connection.cursor()
-    try:
-        cursor.execute(
-            "UPDATE feed SET like_user_ids = CONCAT(like_user_ids, %s) WHERE id = %s",
-            (str(post_id), post_id),
-        )
-        connection.commit()
-        return True
-    except Exception as e:
-        print(f"[DB ERROR] Error incrementing like: {e}")
-        return False
-    finally:
-        cursor.close()
-        connection.close()
-
+def get_featured_posts(limit=5, recent=0):
+    """
+    Candidate rows for the featured ranking.
 
-def decrement_like(post_id):
-    connection = get_connection()
-    if connection is None:
-        print(DB_CONN_ERROR)
-        return False
-    cursor = connection.cursor()
-    try:
-        cursor.execute(
-            "UPDATE feed SET like_user_ids = REPLACE(like_user_ids, %s, '') WHERE id = %s",
-            (str(post_id), post_id),
-        )
-        connection.commit()
-        return True
-    except Exception as e:
-        print(f"[DB ERROR] Error decrementing like: {e}")
-        return False
-    finally:
-        cursor.close()
-        connection.close()
-
-
-def get_featured_posts():
+    Returns the `limit` most liked posts (read straight off the
+    (like_count, id) index, no filesort) plus, when `recent` > 0, the newest
+    `recent` posts so time-decayed ranking can surface fresh posts.
+    """
     connection = get_connection()
     if connection is None:
         print(DB_CONN_ERROR)
         return []
     cursor = connection.cursor(dictionary=True)
     try:
-        query = """
-            SELECT f.id, f.user_id, f.caption, f.image_path, f.like_user_ids, u.name as user_name, u.profile_picture
+        columns = """
+            SELECT f.id, f.user_id, f.caption, f.image_path, f.image_variants, f.like_count, f.created_at,
+                   u.name as user_name, u.profile_picture
             FROM feed f
             JOIN user u ON f.user_id = u.id
-            ORDER BY f.like_user_ids DESC, f.id DESC
-            LIMIT 5
         """
-        cursor.execute(query)
-        return cursor.fetchall()
+        query = f"({columns} ORDER BY f.like_count DESC, f.id DESC LIMIT %s)"
+        params = [limit]
+        if recent:
+            query += f" UNION ({columns} ORDER BY f.id DESC LIMIT %s)"
+            params.append(recent)
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+        for row in rows:
+            row["image_variants"] = decode_image_variants(row.get("image_variants"))
+        return rows
     except Exception as e:
         print(f"[DB ERROR] Error fetching featured posts: {e}")
         return []
@@ -248,27 +314,30 @@ def get_featured_posts():
         connection.close()
 
 
-def get_post_by_id(post_id):
+def get_post_by_id(post_id, viewer_id=None):
     connection = get_connection()
     if connection is None:
         print(DB_CONN_ERROR)
         return None
     cursor = connection.cursor(dictionary=True)
     try:
-        query = """
-            SELECT f.id, f.user_id, f.caption, f.image_path, f.like_user_ids, u.name as user_name
+        query = f"""
+            SELECT f.id, f.user_id, f.caption, f.image_path, f.image_variants, f.like_count, {LIKED_BY_VIEWER_COLUMN},
+                   u.name as user_name, u.profile_picture
             FROM feed f
             JOIN user u ON f.user_id = u.id
             WHERE f.id = %s
         """
-        cursor.execute(query, (post_id,))
+        cursor.execute(query, (viewer_id, post_id))
         post = cursor.fetchone()
         if post:
+            attach_comments(connection, [post])
             post["feed_id"] = post["id"]
             post["user"] = post["user_name"]
             post["content"] = post["caption"]
             post["image_url"] = post["image_path"]
-            post["likes"] = get_like_count(post["id"])
+            post["image_variants"] = decode_image_variants(post.get("image_variants"))
+            post["likes"] = post["like_count"]
         return post
     except Exception as e:
         print(f"[DB ERROR] Error fetching post by id: {e}")
@@ -278,19 +347,79 @@ def get_post_by_id(post_id):
         connection.close()
 
 
-def update_post(post_id, content, image_filename):
+def update_post(post_id, content, image_filename, expected_image_path):
+    """
+    Update a post's caption and image.
+
+    Like set_post_image, this only applies if the post still shows
+    expected_image_path. An edit that races the image pipeline therefore
+    cannot overwrite the variants it has just stored.
+
+    Returns:
+        dict: The post's "image_path" and "image_variants" as stored just
+        before the update, or None if nothing was updated
+    """
+    connection = get_connection()
+    if connection is None:
+        print(DB_CONN_ERROR)
+        return None
+    cursor = connection.cursor()
+    try:
+        # The row lock holds off set_post_image until this edit commits
+        cursor.execute(
+            """
+            SELECT image_path, image_variants FROM feed
+            WHERE id = %s AND image_path <=> %s FOR UPDATE
+            """,
+            (post_id, expected_image_path),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        # Removing the image drops its processed variants with it
+        query = """
+            UPDATE feed SET caption=%s, image_path=%s,
+                image_variants = IF(%s IS NULL, NULL, image_variants)
+            WHERE id=%s
+        """
+        cursor.execute(query, (content, image_filename, image_filename, post_id))
+        connection.commit()
+        return {"image_path": row[0], "image_variants": decode_image_variants(row[1])}
+    except Exception as e:
+        print(f"[DB ERROR] Error updating post: {e}")
+        return None
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def set_post_image(post_id, expected_image_path, image_path, image_variants):
+    """
+    Point a post at its processed image variants.
+
+    Only applies if the post still shows expected_image_path, so a post that
+    was deleted or had its image removed meanwhile is left alone.
+
+    Returns:
+        bool: True if the post was updated
+    """
     connection = get_connection()
     if connection is None:
         print(DB_CONN_ERROR)
         return False
     cursor = connection.cursor()
     try:
-        query = "UPDATE feed SET caption=%s, image_path=%s WHERE id=%s"
-        cursor.execute(query, (content, image_filename, post_id))
+        cursor.execute(
+            """
+            UPDATE feed SET image_path = %s, image_variants = %s
+            WHERE id = %s AND image_path = %s
+            """,
+            (image_path, json.dumps(image_variants), post_id, expected_image_path),
+        )
         connection.commit()
         return cursor.rowcount > 0
     except Exception as e:
-        print(f"[DB ERROR] Error updating post: {e}")
+        print(f"[DB ERROR] Error setting post image: {e}")
         return False
     finally:
         cursor.close()
@@ -317,58 +446,72 @@ def delete_post(post_id):
 
 
 def add_like(post_id, user_id):
+    """
+    Record a like.
+
+    Returns:
+        int: The post's new like count, or None if nothing changed
+             (already liked, or unknown post).
+    """
     connection = get_connection()
     if connection is None:
         print(DB_CONN_ERROR)
-        return False
-    cursor = connection.cursor(dictionary=True)
+        return None
+    cursor = connection.cursor()
     try:
-        cursor.execute(SELECT_LIKE_USER_IDS_QUERY, (post_id,))
-        row = cursor.fetchone()
-        if row is None:
-            return False
-        user_ids = set((row["like_user_ids"] or "").split(","))
-        if str(user_id) not in user_ids:
-            user_ids.add(str(user_id))
-            new_ids = ",".join(user_ids)
-            cursor.execute(
-                "UPDATE feed SET like_user_ids = %s WHERE id = %s", (new_ids, post_id)
-            )
-            connection.commit()
-            return True
-        return False
+        # The (post_id, user_id) primary key makes a repeated like a no-op
+        cursor.execute(
+            "INSERT IGNORE INTO post_like (post_id, user_id) VALUES (%s, %s)",
+            (post_id, user_id),
+        )
+        if cursor.rowcount == 0:
+            return None
+        # LAST_INSERT_ID(expr) hands the new counter back with the UPDATE's
+        # OK packet, so no extra SELECT is needed
+        cursor.execute(
+            "UPDATE feed SET like_count = LAST_INSERT_ID(like_count + 1) WHERE id = %s",
+            (post_id,),
+        )
+        like_count = cursor.lastrowid
+        connection.commit()
+        return like_count
     except Exception as e:
         print(f"[DB ERROR] Error adding like: {e}")
-        return False
+        return None
     finally:
         cursor.close()
         connection.close()
 
 
 def remove_like(post_id, user_id):
+    """
+    Remove a like.
+
+    Returns:
+        int: The post's new like count, or None if the user had not liked it.
+    """
     connection = get_connection()
     if connection is None:
         print(DB_CONN_ERROR)
-        return False
-    cursor = connection.cursor(dictionary=True)
+        return None
+    cursor = connection.cursor()
     try:
-        cursor.execute(SELECT_LIKE_USER_IDS_QUERY, (post_id,))
-        row = cursor.fetchone()
-        if row is None or not row["like_user_ids"]:
-            return False
-        user_ids = set((row["like_user_ids"] or "").split(","))
-        if str(user_id) in user_ids:
-            user_ids.remove(str(user_id))
-            new_ids = ",".join(user_ids)
-            cursor.execute(
-                "UPDATE feed SET like_user_ids = %s WHERE id = %s", (new_ids, post_id)
-            )
-            connection.commit()
-            return True
-        return False
+        cursor.execute(
+            "DELETE FROM post_like WHERE post_id = %s AND user_id = %s",
+            (post_id, user_id),
+        )
+        if cursor.rowcount == 0:
+            return None
+        cursor.execute(
+            "UPDATE feed SET like_count = LAST_INSERT_ID(GREATEST(like_count - 1, 0)) WHERE id = %s",
+            (post_id,),
+        )
+        like_count = cursor.lastrowid
+        connection.commit()
+        return like_count
     except Exception as e:
         print(f"[DB ERROR] Error removing like: {e}")
-        return False
+        return None
     finally:
         cursor.close()
         connection.close()
@@ -381,14 +524,9 @@ def get_like_count(post_id):
         return 0
     cursor = connection.cursor(dictionary=True)
     try:
-        cursor.execute(SELECT_LIKE_USER_IDS_QUERY, (post_id,))
+        cursor.execute("SELECT like_count FROM feed WHERE id = %s", (post_id,))
         row = cursor.fetchone()
-        if row and row["like_user_ids"] is not None:
-            # Only count non-empty user IDs
-            return len(
-                [uid for uid in (row["like_user_ids"] or "").split(",") if uid.strip()]
-            )
-        return 0
+        return row["like_count"] if row else 0
     except Exception as e:
         print(f"[DB ERROR] Error getting like count: {e}")
         return 0
@@ -1,8 +1,131 @@
-from datetime import datetime, timedelta, timezone
+import os
+import threading
 
 from flask import current_app
 
+from data_source.cache import LRUCache
 from data_source.db_connection import get_connection
+from data_source.db_session import call_after_commit
+from data_source.invalidation import get_invalidation_bus
+
+# Columns needed to rebuild current_user on every request. Secrets such as
+# the password hash and OTP secret are deliberately left out of the cache.
+SESSION_USER_COLUMNS = "id, name, email, role, profile_picture, current_session_token"
+USER_CHANNEL = "user"
+
+_user_cache = None
+_token_cache = None
+_user_cache_lock = threading.Lock()
+_subscribed = False
+_NOT_CACHED = object()
+
+
+def get_user_cache():
+    """Per-worker cache of session user rows (USER_CACHE_SIZE / USER_CACHE_TTL)."""
+    global _user_cache
+    if _user_cache is None:
+        with _user_cache_lock:
+            if _user_cache is None:
+                _user_cache = LRUCache(
+                    maxsize=int(os.getenv("USER_CACHE_SIZE", "10000")),
+                    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+                )
+    _subscribe_invalidation()
+    return _user_cache
+
+
+def get_token_cache():
+    """
+    Per-worker cache of current_session_token values.
+
+    Kept separately from the user rows with a much shorter TTL
+    (SESSION_TOKEN_TTL): a login on another worker must kick the old session
+    quickly even when no invalidation message reaches this worker.
+    """
+    global _token_cache
+    if _token_cache is None:
+        with _user_cache_lock:
+            if _token_cache is None:
+                _token_cache = LRUCache(
+                    maxsize=int(os.getenv("USER_CACHE_SIZE", "10000")),
+                    ttl=float(os.getenv("SESSION_TOKEN_TTL", "5")),
+                )
+    _subscribe_invalidation()
+    return _token_cache
+
+
+def _subscribe_invalidation():
+    global _subscribed
+    if not _subscribed:
+        with _user_cache_lock:
+            if not _subscribed:
+                get_invalidation_bus().subscribe(USER_CHANNEL, _drop_cached_user)
+                _subscribed = True
+
+
+def _drop_cached_user(user_id):
+    key = int(user_id)
+    get_user_cache().invalidate(key)
+    get_token_cache().invalidate(key)
+
+
+def invalidate_cached_user(user_id):
+    """Drop a user's cached row and session token in every worker after a write."""
+    key = int(user_id)
+    _subscribe_invalidation()
+    bus = get_invalidation_bus()
+    bus.publish(USER_CHANNEL, key)
+    # Another request could re-cache the old row before this request's
+    # deferred COMMIT, so drop it again once the write is visible
+    call_after_commit(lambda: bus.publish(USER_CHANNEL, key))
+
+
+def get_session_user(user_id):
+    """
+    The columns Flask-Login needs for current_user, served from the
+    per-worker cache when possible.
+
+    Returns:
+        dict: The user row, or None for an unknown id.
+    """
+    try:
+        key = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    cache = get_user_cache()
+    user_data = cache.get(key)
+    if user_data is None:
+        connection = get_connection()
+        if connection is None:
+            print("[DB ERROR] Connection failed in get_session_user")
+            return None
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(f"SELECT {SESSION_USER_COLUMNS} FROM user WHERE id = %s", (key,))
+        user_data = cursor.fetchone()
+        cursor.close()
+        connection.close()
+        if user_data is None:
+            return None
+        # The token is looked up with the user but cached on its own, shorter TTL
+        get_token_cache().set(key, user_data.pop("current_session_token", None))
+        cache.set(key, user_data)
+    return dict(user_data)
+
+
+def get_session_token(user_id):
+    """
+    The user's current_session_token for single-session enforcement.
+
+    Normally already cached by the load_user lookup for this request, so
+    checking it costs no query.
+    """
+    key = int(user_id)
+    cache = get_token_cache()
+    token = cache.get(key, _NOT_CACHED)
+    if token is _NOT_CACHED:
+        token = get_user_session_token(key)
+        cache.set(key, token)
+    return token
 
 
 # process user reset passwrd request
@@ -81,6 +204,7 @@ def update_user_password_by_id(user_id, hashed_password):
             "UPDATE user SET password = %s WHERE id = %s", (hashed_password, user_id)
         )
         connection.commit()
+        invalidate_cached_user(user_id)
         cursor.close()
         connection.close()
         return True
@@ -113,6 +237,7 @@ def disable_otp_by_user_id(user_id):
             "UPDATE user SET otp_enabled=0, otp_secret=NULL WHERE id=%s", (user_id,)
         )
         connection.commit()
+        invalidate_cached_user(user_id)
         cursor.close()
         connection.close()
         return True
@@ -148,6 +273,7 @@ def set_otp_secret(otp_secret, user_id):
             "UPDATE user SET otp_secret=%s WHERE id=%s", (otp_secret, user_id)
         )
         connection.commit()
+        invalidate_cached_user(user_id)
         cursor.close()
         connection.close()
         return True
@@ -162,6 +288,7 @@ def enable_2fa(user_id):
         cursor = connection.cursor(buffered=True)
         cursor.execute("UPDATE user SET otp_enabled=1 WHERE id=%s", (user_id,))
         connection.commit()
+        invalidate_cached_user(user_id)
         cursor.close()
         connection.close()
         return True
@@ -171,36 +298,36 @@ def enable_2fa(user_id):
 
 
 # Account Lock out Code
-def record_failed_login(user_id):
-    """Insert a failed login record for the user."""
-    connection = get_connection()
-    cursor = connection.cursor()
-    UTC_PLUS_8 = timezone(timedelta(hours=8))
-    now = datetime.now(UTC_PLUS_8).replace(tzinfo=None)
-    cursor.execute(
-        "INSERT INTO user_failed_login (user_id, failed_at) VALUES (%s, %s)",
-        (user_id, now),
-    )
-    connection.commit()
-    cursor.close()
-    connection.close()
+def lock_user_account(user_id, locked_until, failed_at):
+    """
+    Lock the account and keep its failed attempts for auditing, in one commit.
 
+    Failures are counted outside MySQL (data_source.login_attempts); this is
+    the only time they are written here.
 
-def get_user_failed_attempts_count(user_id, window_minutes=10):
-    """Count failed logins for user in the last window_minutes."""
-    connection = get_connection()
-    cursor = connection.cursor()
-    UTC_PLUS_8 = timezone(timedelta(hours=8))
-    window_start = datetime.now(UTC_PLUS_8) - timedelta(minutes=window_minutes)
-    window_start = window_start.replace(tzinfo=None)
-    cursor.execute(
-        "SELECT COUNT(*) FROM user_failed_login WHERE user_id=%s AND failed_at >= %s",
-        (user_id, window_start),
-    )
-    count = cursor.fetchone()[0]
-    cursor.close()
-    connection.close()
-    return count
+    Args:
+        user_id (int): The user's ID.
+        locked_until (datetime): Naive GMT+8 time the lock ends.
+        failed_at (list of datetime): Naive GMT+8 times of the failures.
+    """
+    try:
+        connection = get_connection()
+        cursor = connection.cursor()
+        cursor.executemany(
+            "INSERT INTO user_failed_login (user_id, failed_at) VALUES (%s, %s)",
+            [(user_id, when) for when in failed_at],
+        )
+        cursor.execute(
+            "UPDATE user SET locked_until=%s WHERE id=%s", (locked_until, user_id)
+        )
+        connection.commit()
+        invalidate_cached_user(user_id)
+        cursor.close()
+        connection.close()
+        return True
+    except Exception as e:
+        current_app.logger.error(f"Error locking account: {e}")
+        return False
 
 
 def update_user_lockout(user_id, locked_until):
@@ -217,6 +344,7 @@ def update_user_lockout(user_id, locked_until):
             "UPDATE user SET locked_until=%s WHERE id=%s", (locked_until, user_id)
         )
         connection.commit()
+        invalidate_cached_user(user_id)
         cursor.close()
         connection.close()
         return True
@@ -225,16 +353,6 @@ def update_user_lockout(user_id, locked_until):
         return False
 
 
-def clear_failed_logins(user_id):
-    """Delete all failed login records for the user."""
-    connection = get_connection()
-    cursor = connection.cursor()
-    cursor.execute("DELETE FROM user_failed_login WHERE user_id=%s", (user_id,))
-    connection.commit()
-    cursor.close()
-    connection.close()
-
-
 def get_user_by_email(email: str):
     connection = get_connection()
     cursor = connection.cursor(dictionary=True)
@@ -248,7 +366,8 @@ def get_user_by_email(email: str):
 """Insert a new user into the database"""
 
 
-def insert_user(user_data: dict) -> bool:
+def insert_user(user_data: dict):
+    """Returns the new user's id, or False if the insert failed."""
     try:
         connection = get_connection()
         cursor = connection.cursor()
@@ -266,7 +385,7 @@ def insert_user(user_data: dict) -> bool:
             ),
         )
         connection.commit()
-        return True
+        return cursor.lastrowid
     except Exception as e:
         print("Insert failed:", e)
         return False
@@ -310,6 +429,7 @@ def update_user_profile_by_id(
             query = "UPDATE user SET name = %s, password = %s WHERE id = %s"
             cursor.execute(query, (name, password, user_id))
         connection.commit()
+        invalidate_cached_user(user_id)
         return cursor.rowcount > 0
     except Exception as e:
         print("Update failed:", e)
@@ -321,19 +441,29 @@ def update_user_profile_by_id(
             connection.close()
 
 
-def search_users_by_name(search_term: str, limit: int = 10):
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_users_by_name(name_prefix: str, limit: int = 10):
+    """
+    Users whose name starts with name_prefix (case-insensitive).
+
+    A prefix LIKE on the indexed user.name_normalized column is an index
+    range scan; name_prefix should already be normalised (see
+    domain.control.user_search.normalize_name).
+    """
     connection = get_connection()
     cursor = connection.cursor(dictionary=True)
     try:
         query = """
             SELECT id, name, email, profile_picture
-            FROM user 
-            WHERE name LIKE %s 
-            ORDER BY name 
+            FROM user
+            WHERE name_normalized LIKE %s
+            ORDER BY name_normalized
             LIMIT %s
         """
-        search_pattern = f"%{search_term}%"
-        cursor.execute(query, (search_pattern, limit))
+        cursor.execute(query, (f"{escape_like(name_prefix)}%", limit))
         users = cursor.fetchall()
         return users
     except Exception as e:
@@ -344,6 +474,21 @@ def search_users_by_name(search_term: str, limit: int = 10):
         connection.close()
 
 
+def get_users_for_search():
+    """Every user's public search fields, for the in-memory name index."""
+    connection = get_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT id, name, email, profile_picture FROM user")
+        return cursor.fetchall()
+    except Exception as e:
+        print(f"Search index load failed: {e}")
+        return []
+    finally:
+        cursor.close()
+        connection.close()
+
+
 def remove_user_profile_picture(user_id: int) -> bool:
     connection = get_connection()
     if connection is None:
@@ -354,6 +499,7 @@ def remove_user_profile_picture(user_id: int) -> bool:
         query = "UPDATE user SET profile_picture = '' WHERE id = %s"
         cursor.execute(query, (user_id,))
         connection.commit()
+        invalidate_cached_user(user_id)
         return cursor.rowcount > 0
     except Exception as e:
         print("Remove profile picture failed:", e)
@@ -382,5 +528,6 @@ def update_user_session_token(user_id: int, token: str):
         "UPDATE user SET current_session_token = %s WHERE id = %s", (token, user_id)
     )
     connection.commit()
+    invalidate_cached_user(user_id)
     cursor.close()
     connection.close()
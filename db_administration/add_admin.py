@@ -11,11 +11,14 @@ DB_HOST = "127.0.0.1"
 DB_USER = os.getenv("DB_USER", "")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_NAME = os.getenv("DB_NAME", "")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
 
 def create_admin_user(email, password, name="admin"):
     # Hash the password securely with bcrypt
-    hashed_pw = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    hashed_pw = bcrypt.hashpw(
+        password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    ).decode()
 
     # Connect to the MySQL database
     conn = mysql.connector.connect(
@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import re
+import time
+
+import mysql.connector
+from dotenv import load_dotenv
+
+# Load environment variables from .env
+load_dotenv()
+
+DB_HOST = "127.0.0.1"
+DB_USER = os.getenv("DB_USER", "")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "")
+DB_NAME = os.getenv("DB_NAME", "")
+
+STATIC_FOLDER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "presentation",
+    "static",
+)
+IMAGE_FOLDERS = ("social", "profile", "blobs")
+BLOB_URL_PATTERN = re.compile(
+    r"^/static/images/blobs/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(?P<ext>\.[a-z0-9]+)$"
+)
+AVATAR_URL_PATTERN = re.compile(r"^/avatars/(?P<digest>[0-9a-f]{64})(?P<ext>\.webp)$")
+
+
+def referenced_urls(cursor):
+    """Every image URL a post or profile points at, with how often."""
+    counts = {}
+
+    def add(url):
+        if not url:
+            return
+        avatar = AVATAR_URL_PATTERN.match(url)
+        if avatar:
+            # Avatars are served from their own path but stored as blobs
+            digest = avatar.group("digest")
+            url = f"/static/images/blobs/{digest[:2]}/{digest}{avatar.group('ext')}"
+        counts[url] = counts.get(url, 0) + 1
+
+    cursor.execute("SELECT image_path, image_variants FROM feed")
+    for image_path, image_variants in cursor.fetchall():
+        urls = {image_path}
+        if image_variants:
+            variants = json.loads(image_variants)
+            urls.update(v["url"] for v in variants.values())
+        for url in urls:
+            add(url)
+    cursor.execute("SELECT profile_picture FROM user")
+    for (profile_picture,) in cursor.fetchall():
+        add(profile_picture)
+    return counts
+
+
+def image_files():
+    """(url, path) for every file under the uploaded image folders."""
+    for folder in IMAGE_FOLDERS:
+        root = os.path.join(STATIC_FOLDER, "images", folder)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                relative = os.path.relpath(path, STATIC_FOLDER).replace(os.sep, "/")
+                yield f"/static/{relative}", path
+
+
+def collect(delete, grace_minutes):
+    conn = mysql.connector.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+    )
+    cursor = conn.cursor()
+    try:
+        references = referenced_urls(cursor)
+        cursor.execute(
+            "SELECT sha256, ext, ref_count, created_at < NOW() - INTERVAL %s MINUTE "
+            "FROM image_blob",
+            (grace_minutes,),
+        )
+        blobs = {row[0]: row[1:] for row in cursor.fetchall()}
+
+        # Reference counts that drifted from what the tables actually hold
+        ref_counts = {}
+        for url, count in references.items():
+            match = BLOB_URL_PATTERN.match(url)
+            if match:
+                digest = match.group("digest")
+                ref_counts[digest] = ref_counts.get(digest, 0) + count
+        dead = set()
+        for digest, (ext, ref_count, past_grace) in blobs.items():
+            actual = ref_counts.get(digest, 0)
+            if actual == ref_count:
+                continue
+            print(f"blob {digest}{ext}: ref_count {ref_count}, referenced {actual}")
+            if actual == 0 and past_grace:
+                dead.add(digest)
+                if delete:
+                    # Only if no upload took a reference since we looked
+                    cursor.execute(
+                        "DELETE FROM image_blob WHERE sha256 = %s AND ref_count = %s",
+                        (digest, ref_count),
+                    )
+        if delete:
+            conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    # Files nothing points at; recent ones may belong to an upload in flight
+    cutoff = time.time() - grace_minutes * 60
+    orphans = 0
+    orphan_bytes = 0
+    for url, path in image_files():
+        if url in references or os.path.getmtime(path) > cutoff:
+            continue
+        match = BLOB_URL_PATTERN.match(url)
+        if match:
+            digest = match.group("digest")
+            if digest in blobs and digest not in dead and blobs[digest][1] > 0:
+                continue
+        orphans += 1
+        orphan_bytes += os.path.getsize(path)
+        print(f"orphan {url}")
+        if delete:
+            os.remove(path)
+
+    action = "Deleted" if delete else "Found"
+    print(
+        f"{action} {orphans} orphaned files ({orphan_bytes / 1024 / 1024:.1f} MiB) "
+        f"and {len(dead)} unreferenced blob rows."
+    )
+    if not delete and (orphans or dead):
+        print("Dry run; pass --delete to remove them.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Find uploaded images that no post or profile references."
+    )
+    parser.add_argument(
+        "--delete",
+        action="store_true",
+        help="Remove orphaned files and blob rows (default: report only)",
+    )
+    parser.add_argument(
+        "--grace-minutes",
+        type=int,
+        default=60,
+        help="Leave anything newer than this alone (default: 60)",
+    )
+    args = parser.parse_args()
+    collect(args.delete, args.grace_minutes)
@@ -0,0 +1,120 @@
+import argparse
+import os
+
+import mysql.connector
+from dotenv import load_dotenv
+from migration_helpers import column_exists, parse_user_ids
+
+# Load environment variables from .env
+load_dotenv()
+
+DB_HOST = "127.0.0.1"
+DB_USER = os.getenv("DB_USER", "")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "")
+DB_NAME = os.getenv("DB_NAME", "")
+
+BATCH_SIZE = 1000
+
+CREATE_ACTIVITY_PARTICIPANT_TABLE = """
+    CREATE TABLE IF NOT EXISTS activity_participant (
+      activity_id INT NOT NULL,
+      user_id INT NOT NULL,
+      joined_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (activity_id, user_id),
+      INDEX idx_activity_participant_user (user_id, activity_id),
+      CONSTRAINT fk_activity_participant_activity
+        FOREIGN KEY (activity_id) REFERENCES sports_activity (id)
+        ON DELETE CASCADE ON UPDATE NO ACTION,
+      CONSTRAINT fk_activity_participant_user
+        FOREIGN KEY (user_id) REFERENCES user (id)
+        ON DELETE CASCADE ON UPDATE NO ACTION
+    ) ENGINE = InnoDB
+"""
+
+
+def backfill_participants(conn, cursor):
+    """Copy sports_activity.user_id_list_join into activity_participant in batches."""
+    last_id = 0
+    copied = 0
+    while True:
+        cursor.execute(
+            """
+            SELECT id, user_id_list_join FROM sports_activity
+            WHERE id > %s AND user_id_list_join IS NOT NULL AND user_id_list_join != ''
+            ORDER BY id LIMIT %s
+            """,
+            (last_id, BATCH_SIZE),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return copied
+        pairs = [
+            (activity_id, user_id)
+            for activity_id, user_id_list_join in rows
+            for user_id in parse_user_ids(user_id_list_join)
+        ]
+        if pairs:
+            # IGNORE skips participants that already exist and ids of deleted users
+            cursor.executemany(
+                "INSERT IGNORE INTO activity_participant (activity_id, user_id) VALUES (%s, %s)",
+                pairs,
+            )
+            copied += len(pairs)
+        conn.commit()
+        last_id = rows[-1][0]
+
+
+def migrate(drop_legacy_column=False):
+    conn = mysql.connector.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+    )
+    cursor = conn.cursor()
+    try:
+        cursor.execute(CREATE_ACTIVITY_PARTICIPANT_TABLE)
+        if not column_exists(cursor, "sports_activity", "participant_count"):
+            cursor.execute(
+                "ALTER TABLE sports_activity ADD COLUMN participant_count INT NOT NULL DEFAULT 0"
+            )
+            print("Added sports_activity.participant_count")
+
+        if column_exists(cursor, "sports_activity", "user_id_list_join"):
+            copied = backfill_participants(conn, cursor)
+            print(
+                f"Copied {copied} participants from sports_activity.user_id_list_join"
+            )
+
+        cursor.execute("""
+            UPDATE sports_activity sa
+            SET sa.participant_count = (
+                SELECT COUNT(*) FROM activity_participant ap WHERE ap.activity_id = sa.id
+            )
+            """)
+        conn.commit()
+        print("Recomputed sports_activity.participant_count")
+
+        if drop_legacy_column and column_exists(
+            cursor, "sports_activity", "user_id_list_join"
+        ):
+            cursor.execute("ALTER TABLE sports_activity DROP COLUMN user_id_list_join")
+            print("Dropped sports_activity.user_id_list_join")
+    except mysql.connector.Error as err:
+        print("Error:", err)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Move activity participants from the user_id_list_join CSV into activity_participant"
+    )
+    parser.add_argument(
+        "--drop-legacy-column",
+        action="store_true",
+        help="drop sports_activity.user_id_list_join once the backfill succeeded",
+    )
+    args = parser.parse_args()
+    migrate(args.drop_legacy_column)
@@ -0,0 +1,114 @@
+import argparse
+import os
+
+import mysql.connector
+from dotenv import load_dotenv
+from migration_helpers import column_exists, parse_user_ids
+
+# Load environment variables from .env
+load_dotenv()
+
+DB_HOST = "127.0.0.1"
+DB_USER = os.getenv("DB_USER", "")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "")
+DB_NAME = os.getenv("DB_NAME", "")
+
+BATCH_SIZE = 1000
+
+CREATE_POST_LIKE_TABLE = """
+    CREATE TABLE IF NOT EXISTS post_like (
+      post_id INT NOT NULL,
+      user_id INT NOT NULL,
+      created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (post_id, user_id),
+      INDEX idx_post_like_user_id (user_id),
+      CONSTRAINT fk_post_like_feed
+        FOREIGN KEY (post_id) REFERENCES feed (id)
+        ON DELETE CASCADE ON UPDATE NO ACTION,
+      CONSTRAINT fk_post_like_user
+        FOREIGN KEY (user_id) REFERENCES user (id)
+        ON DELETE CASCADE ON UPDATE NO ACTION
+    ) ENGINE = InnoDB
+"""
+
+
+def backfill_likes(conn, cursor):
+    """Copy likes from feed.like_user_ids into post_like, one batch of posts at a time."""
+    last_id = 0
+    copied = 0
+    while True:
+        cursor.execute(
+            """
+            SELECT id, like_user_ids FROM feed
+            WHERE id > %s AND like_user_ids IS NOT NULL AND like_user_ids != ''
+            ORDER BY id LIMIT %s
+            """,
+            (last_id, BATCH_SIZE),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return copied
+        pairs = [
+            (post_id, user_id)
+            for post_id, like_user_ids in rows
+            for user_id in parse_user_ids(like_user_ids)
+        ]
+        if pairs:
+            # IGNORE skips likes that already exist and ids of deleted users
+            cursor.executemany(
+                "INSERT IGNORE INTO post_like (post_id, user_id) VALUES (%s, %s)",
+                pairs,
+            )
+            copied += len(pairs)
+        conn.commit()
+        last_id = rows[-1][0]
+
+
+def migrate(drop_legacy_column=False):
+    conn = mysql.connector.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+    )
+    cursor = conn.cursor()
+    try:
+        cursor.execute(CREATE_POST_LIKE_TABLE)
+        if not column_exists(cursor, "feed", "like_count"):
+            cursor.execute(
+                "ALTER TABLE feed ADD COLUMN like_count INT NOT NULL DEFAULT 0"
+            )
+            print("Added feed.like_count")
+
+        if column_exists(cursor, "feed", "like_user_ids"):
+            copied = backfill_likes(conn, cursor)
+            print(f"Copied {copied} likes from feed.like_user_ids")
+
+        cursor.execute("""
+            UPDATE feed f
+            SET f.like_count = (SELECT COUNT(*) FROM post_like pl WHERE pl.post_id = f.id)
+            """)
+        conn.commit()
+        print("Recomputed feed.like_count")
+
+        if drop_legacy_column and column_exists(cursor, "feed", "like_user_ids"):
+            cursor.execute("ALTER TABLE feed DROP COLUMN like_user_ids")
+            print("Dropped feed.like_user_ids")
+    except mysql.connector.Error as err:
+        print("Error:", err)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Move feed likes from the like_user_ids CSV into post_like"
+    )
+    parser.add_argument(
+        "--drop-legacy-column",
+        action="store_true",
+        help="drop feed.like_user_ids once the backfill succeeded",
+    )
+    args = parser.parse_args()
+    migrate(args.drop_legacy_column)
@@ -0,0 +1,190 @@
+import os
+import re
+
+import mysql.connector
+from dotenv import load_dotenv
+from migration_helpers import column_exists
+
+# Load environment variables from .env
+load_dotenv()
+
+DB_HOST = "127.0.0.1"
+DB_USER = os.getenv("DB_USER", "")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "")
+DB_NAME = os.getenv("DB_NAME", "")
+
+# Each step is (kind, table, name, DDL). A step only runs when the column,
+# index or table it creates is missing, so the script is safe to re-run.
+MIGRATIONS = [
+    (
+        "column",
+        "feed",
+        "created_at",
+        "ALTER TABLE feed ADD COLUMN created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP",
+    ),
+    (
+        "column",
+        "feed",
+        "image_variants",
+        "ALTER TABLE feed ADD COLUMN image_variants JSON NULL",
+    ),
+    (
+        "index",
+        "feed",
+        "idx_feed_like_count",
+        "ALTER TABLE feed ADD INDEX idx_feed_like_count (like_count, id)",
+    ),
+    (
+        "index",
+        "sports_activity",
+        "idx_sports_activity_date_type",
+        "ALTER TABLE sports_activity ADD INDEX idx_sports_activity_date_type (date, activity_type)",
+    ),
+    (
+        "index",
+        "sports_activity",
+        "idx_sports_activity_search",
+        "ALTER TABLE sports_activity ADD FULLTEXT INDEX idx_sports_activity_search "
+        "(activity_name, location, skills_req) WITH PARSER ngram",
+    ),
+    (
+        "column",
+        "user",
+        "name_normalized",
+        "ALTER TABLE user ADD COLUMN name_normalized VARCHAR(45) "
+        "AS (LOWER(TRIM(name))) STORED",
+    ),
+    (
+        "index",
+        "user",
+        "idx_user_name_normalized",
+        "ALTER TABLE user ADD INDEX idx_user_name_normalized (name_normalized)",
+    ),
+    (
+        "table",
+        "http_session",
+        "http_session",
+        """
+        CREATE TABLE http_session (
+          id VARCHAR(255) NOT NULL,
+          data BLOB NOT NULL,
+          expires_at DATETIME NOT NULL,
+          PRIMARY KEY (id),
+          INDEX idx_http_session_expires_at (expires_at)
+        ) ENGINE = InnoDB
+        """,
+    ),
+    (
+        "index",
+        "user_failed_login",
+        "idx_user_failed_login_failed_at",
+        "ALTER TABLE user_failed_login ADD INDEX idx_user_failed_login_failed_at (failed_at)",
+    ),
+    (
+        "index",
+        "reset_password",
+        "idx_reset_password_expires_at",
+        "ALTER TABLE reset_password ADD INDEX idx_reset_password_expires_at (expires_at)",
+    ),
+    (
+        "table",
+        "mail_outbox",
+        "mail_outbox",
+        """
+        CREATE TABLE mail_outbox (
+          id BIGINT NOT NULL AUTO_INCREMENT,
+          to_email VARCHAR(255) NOT NULL,
+          subject VARCHAR(255) NOT NULL,
+          html_body TEXT NOT NULL,
+          status ENUM('pending', 'sent', 'dead') NOT NULL DEFAULT 'pending',
+          attempts INT NOT NULL DEFAULT 0,
+          next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          last_error VARCHAR(1000) NULL,
+          created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          sent_at DATETIME NULL,
+          PRIMARY KEY (id),
+          INDEX idx_mail_outbox_due (status, next_attempt_at),
+          INDEX idx_mail_outbox_sent_at (status, sent_at)
+        ) ENGINE = InnoDB
+        """,
+    ),
+    (
+        "table",
+        "image_blob",
+        "image_blob",
+        """
+        CREATE TABLE image_blob (
+          sha256 CHAR(64) NOT NULL,
+          ext VARCHAR(10) NOT NULL,
+          ref_count INT NOT NULL DEFAULT 0,
+          created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+          PRIMARY KEY (sha256)
+        ) ENGINE = InnoDB
+        """,
+    ),
+]
+
+
+def exists(cursor, kind, table, name):
+    if kind == "column":
+        return column_exists(cursor, table, name)
+    if kind == "index":
+        query = """
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        """
+        params = (table, name)
+    else:
+        query = """
+            SELECT COUNT(*) FROM information_schema.tables
+            WHERE table_schema = DATABASE() AND table_name = %s
+        """
+        params = (name,)
+    cursor.execute(query, params)
+    return cursor.fetchone()[0] > 0
+
+
+def missing_columns(cursor, table, ddl):
+    """Columns an ADD INDEX step needs that the table does not have yet."""
+    match = re.search(r"INDEX \w+\s*\(([^)]*)\)", ddl)
+    if match is None:
+        return []
+    columns = [column.strip() for column in match.group(1).split(",")]
+    return [c for c in columns if not column_exists(cursor, table, c)]
+
+
+def migrate():
+    conn = mysql.connector.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+    )
+    cursor = conn.cursor()
+    try:
+        for kind, table, name, ddl in MIGRATIONS:
+            if exists(cursor, kind, table, name):
+                continue
+            if kind == "index":
+                # e.g. feed.like_count is added by migrate_post_likes.py
+                missing = missing_columns(cursor, table, ddl)
+                if missing:
+                    print(
+                        f"Skipped: index {table}.{name} needs "
+                        f"{', '.join(missing)}; run migrate_post_likes.py and "
+                        "migrate_activity_participants.py, then re-run this script"
+                    )
+                    continue
+            cursor.execute(ddl)
+            print(f"Applied: {kind} {table}.{name}")
+        conn.commit()
+        print("Schema is up to date.")
+    except mysql.connector.Error as err:
+        print("Error:", err)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,19 @@
+"""Helpers shared by the schema migration scripts in this folder"""
+
+
+def column_exists(cursor, table, column):
+    cursor.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """,
+        (table, column),
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def parse_user_ids(csv_user_ids):
+    """Turn a legacy '3,7,,12' CSV into a set of ints, skipping junk."""
+    return {
+        int(uid) for uid in (csv_user_ids or "").split(",") if uid.strip().isdigit()
+    }
@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+
+import mysql.connector
+from dotenv import load_dotenv
+
+# The purge rules are shared with the app's scheduled job
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_source.retention import (  # noqa: E402
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_FAILED_LOGIN_DAYS,
+    acquire_lock,
+    release_lock,
+    run_retention,
+)
+
+# Load environment variables from .env
+load_dotenv()
+
+DB_HOST = "127.0.0.1"
+DB_USER = os.getenv("DB_USER", "")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "")
+DB_NAME = os.getenv("DB_NAME", "")
+
+
+def purge(batch_size, failed_login_days, pause):
+    conn = mysql.connector.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+    )
+    try:
+        if not acquire_lock(conn):
+            print("Another retention run is in progress; try again later.")
+            return
+        try:
+            report = run_retention(
+                conn,
+                batch_size=batch_size,
+                failed_login_days=failed_login_days,
+                pause=pause,
+            )
+        finally:
+            release_lock(conn)
+    finally:
+        conn.close()
+
+    for entry in report:
+        status = f"failed: {entry['error']}" if "error" in entry else "ok"
+        print(
+            f"{entry['table']:<20} {entry['rows']:>10} rows "
+            f"{entry['seconds']:>8.2f}s  {status}"
+        )
+    print(f"Purged {sum(e['rows'] for e in report)} rows in total.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Delete expired failed-login, reset-link and session rows."
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--failed-login-days",
+        type=int,
+        default=DEFAULT_FAILED_LOGIN_DAYS,
+        help="Keep failed logins this many days for auditing",
+    )
+    parser.add_argument(
+        "--pause",
+        type=float,
+        default=0.0,
+        help="Seconds to sleep between batches to go easier on a busy server",
+    )
+    args = parser.parse_args()
+    purge(args.batch_size, args.failed_login_days, args.pause)
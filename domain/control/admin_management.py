@@ -1,13 +1,13 @@
-import os
-
-from flask import current_app
-
 from data_source.admin_queries import (
     delete_social_post,
     delete_sports_activity,
     get_social_post_by_id,
 )
 from data_source.bulletin_queries import get_sports_activity_by_id
+from data_source.db_session import call_after_commit
+from data_source.social_feed_queries import decode_image_variants
+from domain.control.blob_store import release_images
+from domain.control.featured_ranking import get_featured_ranking
 
 
 # Deletes an activity from the bulletin board by its ID.
@@ -39,18 +39,15 @@ def remove_social_post(post_id: int):
         if not post:
             return False
 
-        post_id, _, image_path, _, _ = post
-        # If the post has an image, remove it from the filesystem
-        if image_path:
-            rel_path = image_path.lstrip("/")  # Remove leading slash if present
-
-            image_path = os.path.join(current_app.root_path, "presentation", rel_path)
-
-            if os.path.exists(image_path):
-                os.remove(image_path)
-
+        post_id, _, image_path, _, _, image_variants = post
         # Delete the post
-        return delete_social_post(post_id)
+        if not delete_social_post(post_id):
+            return False
+
+        # Drop the post's references to its image and variants
+        release_images(image_path, decode_image_variants(image_variants))
+        call_after_commit(lambda: get_featured_ranking().on_post_removed(post_id))
+        return True
 
     except OSError as e:
         print(f"File system error while deleting post: {e}")
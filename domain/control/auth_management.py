@@ -1,18 +1,140 @@
+"""Password hashing, run on a bounded worker pool instead of the request thread"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
 import bcrypt
 
+DEFAULT_BCRYPT_ROUNDS = 12
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full or a hash takes too long; the caller
+    should ask the user to retry."""
+
+
+def get_rounds(hashed_password: str) -> int:
+    """Cost factor of a bcrypt hash ("$2b$12$..." -> 12), or 0 if unreadable."""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+class PasswordHasher:
+    """
+    bcrypt on a small thread pool.
+
+    bcrypt releases the GIL while it works, so with threaded gunicorn workers
+    other requests keep being served during a hash. The pool caps how many
+    hashes run at once, and at most `max_queue` more may wait; anything past
+    that is refused with PasswordHasherBusy rather than piling up behind a
+    credential-stuffing burst.
+
+    Args:
+        rounds (int): bcrypt cost factor for new hashes.
+        workers (int): Hashes computed concurrently.
+        max_queue (int): Hashes allowed to wait for a free worker.
+        timeout (float): Seconds a caller waits for its result before
+            PasswordHasherBusy is raised.
+    """
+
+    def __init__(
+        self, rounds=DEFAULT_BCRYPT_ROUNDS, workers=2, max_queue=16, timeout=10
+    ):
+        self.rounds = rounds
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hasher"
+        )
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self.rejected = 0
+        self.timed_out = 0
+
+    def hash(self, plain_text_password: str) -> str:
+        hashed = self._run(
+            bcrypt.hashpw,
+            plain_text_password.encode("utf-8"),
+            bcrypt.gensalt(rounds=self.rounds),
+        )
+        return hashed.decode("utf-8")
+
+    def verify(self, plain_text_password: str, hashed_password: str) -> bool:
+        return self._run(
+            bcrypt.checkpw,
+            plain_text_password.encode("utf-8"),
+            hashed_password.encode("utf-8"),
+        )
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True if the hash was made with a different cost than the current one."""
+        return get_rounds(hashed_password) != self.rounds
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHasherBusy("Too many password hashes in flight")
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Frees the slot now if the hash never started; a running one
+            # keeps its slot until bcrypt returns
+            future.cancel()
+            self.timed_out += 1
+            raise PasswordHasherBusy("Password hash timed out") from None
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher():
+    """
+    Process-wide hasher, configured from BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_QUEUE and PASSWORD_HASH_TIMEOUT.
+
+    By default it is sized to the gunicorn worker's request threads
+    (GUNICORN_THREADS): at most half of them may be hashing or waiting for a
+    hash, so a burst of logins cannot take every thread from other pages.
+    """
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                slots = max(1, int(os.getenv("GUNICORN_THREADS", "8")) // 2)
+                workers = int(
+                    os.getenv(
+                        "PASSWORD_HASH_WORKERS", str(min(os.cpu_count() or 2, slots))
+                    )
+                )
+                _hasher = PasswordHasher(
+                    rounds=int(os.getenv("BCRYPT_ROUNDS", str(DEFAULT_BCRYPT_ROUNDS))),
+                    workers=workers,
+                    max_queue=int(
+                        os.getenv("PASSWORD_HASH_QUEUE", str(max(0, slots - workers)))
+                    ),
+                    timeout=float(os.getenv("PASSWORD_HASH_TIMEOUT", "10")),
+                )
+    return _hasher
+
 
 def hash_password(plain_text_password: str) -> str:
     """Hash plaintext password using bcrypt."""
-    # Generate a salt
-    salt = bcrypt.gensalt()
-    # Hash the password (result is in bytes)
-    hashed = bcrypt.hashpw(plain_text_password.encode("utf-8"), salt)
-    # Return as a decoded string for storage (e.g. in MySQL)
-    return hashed.decode("utf-8")
+    return get_password_hasher().hash(plain_text_password)
 
 
 def check_password(plain_text_password: str, hashed_password: str) -> bool:
     """Check if a plaintext password matches the given bcrypt hash."""
-    return bcrypt.checkpw(
-        plain_text_password.encode("utf-8"), hashed_password.encode("utf-8")
-    )
+    return get_password_hasher().verify(plain_text_password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return get_password_hasher().needs_rehash(hashed_password)
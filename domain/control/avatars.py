@@ -0,0 +1,67 @@
+"""Square, fixed-size profile picture thumbnails"""
+
+import io
+import os
+
+from PIL import Image, ImageOps
+
+from domain.control.blob_store import (
+    AVATAR_URL_PATTERN,
+    AVATAR_URL_PREFIX,
+    BLOB_URL_PATTERN,
+    blob_url,
+    static_path,
+    store_blob,
+)
+
+# Largest avatar on any page is 80 CSS px; this covers it on 2x screens
+AVATAR_SIZE = 160
+AVATAR_QUALITY = 80
+# Avatar URLs name their content, so a response never goes stale
+AVATAR_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def make_avatar(image_file):
+    """
+    Center-crop an image to a square AVATAR_SIZE WebP.
+
+    EXIF orientation is applied and all metadata is dropped. Animated images
+    keep their first frame.
+
+    Returns:
+        bytes: The encoded avatar
+    """
+    with Image.open(image_file) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA", "P") and (
+            image.mode != "P" or "transparency" in image.info
+        )
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    image = ImageOps.fit(image, (AVATAR_SIZE, AVATAR_SIZE), Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, "WEBP", quality=AVATAR_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def store_avatar(image_file):
+    """Store an uploaded picture as an avatar; returns its /avatars URL or None."""
+    url = store_blob(make_avatar(image_file), ".webp")
+    if url is None:
+        return None
+    digest = BLOB_URL_PATTERN.match(url)["digest"]
+    return f"{AVATAR_URL_PREFIX}/{digest}.webp"
+
+
+def avatar_file(filename):
+    """
+    Where an avatar is on disk.
+
+    Returns:
+        tuple: (directory, filename) for send_from_directory, or None if
+        the name is not an avatar
+    """
+    match = AVATAR_URL_PATTERN.match(f"{AVATAR_URL_PREFIX}/{filename}")
+    if match is None:
+        return None
+    path = static_path(blob_url(match["digest"], match["ext"]))
+    return os.path.dirname(path), os.path.basename(path)
@@ -0,0 +1,110 @@
+"""Content-addressed storage for uploaded images, shared between posts and profiles"""
+
+import hashlib
+import os
+import re
+import uuid
+
+from data_source.blob_queries import acquire_blob, release_blob
+from data_source.db_session import call_after_commit
+
+STATIC_URL_PREFIX = "/static/"
+STATIC_FOLDER = os.path.join("presentation", "static")
+BLOB_URL_PREFIX = "/static/images/blobs"
+BLOB_URL_PATTERN = re.compile(
+    r"^/static/images/blobs/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(?P<ext>\.[a-z0-9]+)$"
+)
+# Avatars are blobs too, served from their own path with immutable caching
+AVATAR_URL_PREFIX = "/avatars"
+AVATAR_URL_PATTERN = re.compile(r"^/avatars/(?P<digest>[0-9a-f]{64})(?P<ext>\.webp)$")
+FORMAT_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "GIF": ".gif", "WEBP": ".webp"}
+
+
+def static_path(url):
+    """Filesystem path of an uploaded image URL, or None if it is not one of ours."""
+    if not url or not url.startswith(STATIC_URL_PREFIX + "images/"):
+        return None
+    relative = os.path.normpath(url[len(STATIC_URL_PREFIX) :])
+    if relative.startswith(".."):
+        return None
+    return os.path.join(STATIC_FOLDER, relative)
+
+
+def image_urls(image_url, image_variants=None):
+    """The image URL plus every variant URL."""
+    urls = {image_url} if image_url else set()
+    for variant in (image_variants or {}).values():
+        urls.add(variant["url"])
+    return urls
+
+
+def blob_url(digest, ext):
+    # Two-character fan-out keeps any one directory small
+    return f"{BLOB_URL_PREFIX}/{digest[:2]}/{digest}{ext}"
+
+
+def blob_key(url):
+    """(digest, ext) of a blob or avatar URL, or None for anything else."""
+    match = BLOB_URL_PATTERN.match(url or "") or AVATAR_URL_PATTERN.match(url or "")
+    if match is None:
+        return None
+    return match.group("digest"), match.group("ext")
+
+
+def _write_if_missing(path, data):
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written under a temporary name and renamed, so readers never see a
+    # partial file and two writers of the same blob cannot interleave
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def store_blob(data, ext):
+    """
+    Store image bytes under their SHA-256 and take a reference to them.
+
+    The same bytes uploaded again, by anyone, resolve to the same file and
+    URL, so they are stored once and cached by browsers once.
+
+    Returns:
+        str: The blob's URL, or None if the reference could not be recorded
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    if not acquire_blob(digest, ext):
+        return None
+    path = static_path(blob_url(digest, ext))
+    _write_if_missing(path, data)
+    # A concurrent release of the last reference may delete the file after
+    # the write above; put it back once our reference is committed
+    call_after_commit(lambda: _write_if_missing(path, data))
+    return blob_url(digest, ext)
+
+
+def _remove_file(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def release_images(image_url, image_variants=None):
+    """
+    Drop this owner's reference to an image and its variants.
+
+    A blob's file is deleted once nothing references it any more. Images
+    stored before the blob store existed have exactly one owner and are
+    deleted with it. Either way the file only goes once the release is
+    committed.
+    """
+    for url in image_urls(image_url, image_variants):
+        key = blob_key(url)
+        if key is None:
+            path = static_path(url)
+            call_after_commit(lambda path=path: _remove_file(path))
+            continue
+        remaining = release_blob(key[0])
+        if remaining == 0:
+            path = static_path(blob_url(*key))
+            call_after_commit(lambda path=path: _remove_file(path))
@@ -2,13 +2,14 @@ from flask import g
 from flask_login import current_user
 
 from data_source.bulletin_queries import (
+    ACTIVITY_FULL,
+    JOINED,
+    add_participant,
     get_all_bulletin,
     get_bulletin_by_types,
-    get_bulletin_via_name,
     get_host_id,
-    get_sports_activity_by_id,
     insert_new_activity,
-    update_sports_activity,
+    search_activities,
 )
 from domain.entity.sports_activity import SportsActivity
 
@@ -16,13 +17,8 @@ from domain.entity.sports_activity import SportsActivity
 def create_entity_from_row(result):
     bulletin_list = []
 
+    # Full activities are already filtered out by the bulletin queries
     for row in result:
-        user_id_list = row.get("user_id_list_join")
-        current_count = len(user_id_list.split(",")) if user_id_list else 0
-
-        if current_count >= row["max_pax"]:
-            continue  # Skip adding this activity if full
-
         activity = SportsActivity(
             id=row["id"],
             user_id=row["user_id"],
@@ -32,7 +28,7 @@ def create_entity_from_row(result):
             date=row["date"],  # optionally parse as datetime
             location=row["location"],
             max_pax=row["max_pax"],
-            user_id_list_join=user_id_list,
+            participant_count=row.get("participant_count", 0),
         )
         bulletin_list.append(activity)
 
@@ -69,21 +65,8 @@ def get_bulletin_display_data():
                 "date": activity.get_date(),
                 "location": activity.get_location(),
                 "max_pax": activity.get_max_pax(),
-                "count": int(activity.get_max_pax())
-                - len(
-                    [
-                        uid
-                        for uid in (activity.get_user_id_list_join() or "").split(",")
-                        if uid.strip()
-                    ]
-                ),
+                "count": activity.get_slots_left(),
                 "host_by_current_user": activity.get_user_id() == current_user.id,
-                # "who_joined": [
-                #     get_username_by_id(uid.strip()).get("name")
-                #     for uid in (activity.get_user_id_list_join() or "").split(",")
-                #     if uid.strip()
-                # ] if activity.get_user_id() == current_user.id else None,
-                #
             }
         )
 
@@ -91,7 +74,7 @@ def get_bulletin_display_data():
 
 
 def search_bulletin(query):
-    result = get_bulletin_via_name(query)
+    result = search_activities(query)
     if not result:
         return []
     bulletin_list = create_entity_from_row(result)
@@ -99,34 +82,12 @@ def search_bulletin(query):
 
 
 def join_activity_control(activity_id, user_id):
-    activity_data = get_sports_activity_by_id(activity_id)
-    if not activity_data:
-        return None
-    sports_activity = SportsActivity(
-        id=activity_data["id"],
-        user_id=activity_data["user_id"],
-        activity_name=activity_data["activity_name"],
-        activity_type=activity_data["activity_type"],
-        skills_req=activity_data["skills_req"],
-        date=activity_data["date"],  # optionally parse as datetime
-        location=activity_data["location"],
-        max_pax=activity_data["max_pax"],
-        user_id_list_join=activity_data.get("user_id_list_join"),
-    )
-    # Check if user is already in the joined list
-    joined_users = sports_activity.get_user_id_list_join()
-    if joined_users:
-        joined_list = [uid.strip() for uid in joined_users.split(",") if uid.strip()]
-        if str(user_id) in joined_list:
-            return False  # Already joined
-
-    sports_activity.set_user_id_list_join(user_id)
-    result = update_sports_activity(
-        sports_activity.get_id(), sports_activity.get_user_id_list_join()
-    )
-    if result:
-        return True
-    return False
+    outcome = add_participant(activity_id, user_id)
+    if outcome == JOINED:
+        return True, "Successfully joined the activity! You may view it in your profile"
+    if outcome == ACTIVITY_FULL:
+        return False, "Sorry, this activity is full or no longer open."
+    return False, "You have already joined this activity."
 
 
 def create_activity(
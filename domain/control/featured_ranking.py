@@ -0,0 +1,141 @@
+"""Ranking of the "Featured" posts shown in the social feed sidebar"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from data_source.social_feed_queries import get_featured_posts
+
+FEATURED_COUNT = 5
+CANDIDATE_COUNT = 50
+# feed.created_at is stored as naive GMT+8, like every other DB timestamp
+UTC_PLUS_8 = timezone(timedelta(hours=8))
+
+
+def hot_score(like_count, created_at, now, gravity):
+    """
+    Hacker-News style score: likes / (age_in_hours + 2) ** gravity.
+
+    With gravity 0 this is simply the like count.
+    """
+    if not gravity:
+        return like_count
+    age_hours = 0.0
+    if isinstance(created_at, datetime):
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=UTC_PLUS_8)
+        age_hours = max(0.0, (now - created_at.timestamp()) / 3600)
+    return like_count / (age_hours + 2) ** gravity
+
+
+class FeaturedRanking:
+    """
+    Per-worker top-K of featured posts.
+
+    Candidates are loaded in one indexed query and cached; reads are a plain
+    list lookup. Like changes update cached candidates in place, and only a
+    change that could push a non-candidate into the top-K (or a TTL expiry,
+    which picks up likes made on other workers) triggers a reload.
+
+    Args:
+        loader (callable): loader(limit, recent) -> list of feed rows.
+        k (int): Number of featured posts.
+        candidates (int): Number of candidate rows kept for re-ranking.
+        gravity (float): Time decay exponent; 0 ranks by like count only.
+        ttl (float): Seconds before the candidates are reloaded.
+    """
+
+    def __init__(
+        self,
+        loader,
+        k=FEATURED_COUNT,
+        candidates=CANDIDATE_COUNT,
+        gravity=0.0,
+        ttl=60,
+        clock=time.time,
+    ):
+        self._loader = loader
+        self.k = k
+        self.candidates = candidates
+        self.gravity = gravity
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._top = []
+        self._loaded_at = None
+
+    def top(self):
+        """Return the current featured rows, best first."""
+        with self._lock:
+            if self._loaded_at is None or self._clock() - self._loaded_at > self.ttl:
+                self._reload()
+            return list(self._top)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def on_like_changed(self, post_id, like_count):
+        """Apply a post's new like count to the cached ranking."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            row = self._rows.get(post_id)
+            if row is not None:
+                row["like_count"] = like_count
+                self._rerank()
+            elif len(self._rows) < self.candidates or like_count > min(
+                r["like_count"] for r in self._rows.values()
+            ):
+                # An uncached post may now belong in the candidate set
+                self._loaded_at = None
+
+    def on_post_removed(self, post_id):
+        with self._lock:
+            if self._rows.pop(post_id, None) is not None:
+                self._loaded_at = None
+
+    def on_post_changed(self, post_id):
+        """Reload if a cached post's image or caption changed."""
+        with self._lock:
+            if post_id in self._rows:
+                self._loaded_at = None
+
+    def _reload(self):
+        recent = self.candidates if self.gravity else 0
+        rows = self._loader(self.candidates, recent) or []
+        self._rows = {row["id"]: dict(row) for row in rows}
+        self._loaded_at = self._clock()
+        self._rerank()
+
+    def _rerank(self):
+        now = self._clock()
+        ranked = sorted(
+            self._rows.values(),
+            key=lambda r: (
+                hot_score(r["like_count"], r.get("created_at"), now, self.gravity),
+                r["id"],
+            ),
+            reverse=True,
+        )
+        self._top = ranked[: self.k]
+
+
+_ranking = None
+_ranking_lock = threading.Lock()
+
+
+def get_featured_ranking():
+    """Process-wide ranking, configured from FEATURED_GRAVITY / FEATURED_TTL."""
+    global _ranking
+    if _ranking is None:
+        with _ranking_lock:
+            if _ranking is None:
+                _ranking = FeaturedRanking(
+                    get_featured_posts,
+                    gravity=float(os.getenv("FEATURED_GRAVITY", "0")),
+                    ttl=float(os.getenv("FEATURED_TTL", "60")),
+                )
+    return _ranking
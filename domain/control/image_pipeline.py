@@ -0,0 +1,128 @@
+"""Resizes and re-encodes uploaded post images off the request thread"""
+
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+from data_source.social_feed_queries import set_post_image
+from domain.control.blob_store import release_images, static_path, store_blob
+from domain.control.featured_ranking import get_featured_ranking
+
+# Longest side in pixels for each variant, smallest first
+VARIANT_SIZES = {"thumb": 320, "feed": 720, "full": 1600}
+WEBP_QUALITY = 80
+
+_pipeline = None
+
+
+def srcset(image_variants):
+    """srcset attribute value listing every variant with its width."""
+    variants = sorted((image_variants or {}).values(), key=lambda v: v["width"])
+    return ", ".join(f"{v['url']} {v['width']}w" for v in variants)
+
+
+def build_variants(source_path):
+    """
+    Decode an image once and store a WebP blob per VARIANT_SIZES entry.
+
+    EXIF orientation is applied and all metadata (EXIF, GPS, comments) is
+    dropped. Images are only ever shrunk. The encoded bytes are what the
+    blob store hashes, so the same picture uploaded twice shares its files.
+
+    Returns:
+        dict: label -> {"url", "width", "height"}, or None for animated
+        images, which are left as uploaded
+    """
+    with Image.open(source_path) as original:
+        if getattr(original, "is_animated", False):
+            return None
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA", "P") and (
+            image.mode != "P" or "transparency" in image.info
+        )
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    image.info = {}
+
+    variants = {}
+    try:
+        for label, size in sorted(VARIANT_SIZES.items(), key=lambda item: item[1]):
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.LANCZOS)
+            previous = next(reversed(variants.values()), None)
+            if previous and (previous["width"], previous["height"]) == variant.size:
+                # Too small to shrink further: the encode would be the same
+                # bytes, so share the blob instead of counting it twice
+                variants[label] = dict(previous)
+                continue
+            buffer = io.BytesIO()
+            variant.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+            url = store_blob(buffer.getvalue(), ".webp")
+            if url is None:
+                raise RuntimeError(f"Could not store the {label} variant")
+            variants[label] = {
+                "url": url,
+                "width": variant.width,
+                "height": variant.height,
+            }
+    except Exception:
+        release_images(None, variants)
+        raise
+    return variants
+
+
+class ImagePipeline:
+    """
+    Thread pool that turns a post's raw upload into its variants.
+
+    Until a job finishes the post shows the original upload. When it does,
+    the post is switched to the "full" variant and the original is released.
+
+    Args:
+        logger: Where failures are logged.
+        workers (int): Images processed at once.
+    """
+
+    def __init__(self, logger, workers=2):
+        self.logger = logger
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="image-pipeline"
+        )
+
+    def submit(self, post_id, image_url):
+        return self._pool.submit(self.process, post_id, image_url)
+
+    def process(self, post_id, image_url):
+        try:
+            variants = build_variants(static_path(image_url))
+        except Exception as e:
+            self.logger.error(f"Image processing failed for post {post_id}: {e}")
+            return None
+        if variants is None:
+            return None
+        if not set_post_image(post_id, image_url, variants["full"]["url"], variants):
+            # The post was deleted or lost its image while we worked
+            release_images(None, variants)
+            return None
+        get_featured_ranking().on_post_changed(post_id)
+        release_images(image_url)
+        return variants
+
+
+def submit_post_image(post_id, image_url):
+    """Queue a post's upload for processing; a no-op if the pipeline is off."""
+    if _pipeline is not None:
+        _pipeline.submit(post_id, image_url)
+
+
+def init_app(app):
+    """Start the pipeline with IMAGE_PIPELINE_WORKERS threads (0 disables it)."""
+    global _pipeline
+    app.add_template_filter(srcset, "srcset")
+    workers = int(os.getenv("IMAGE_PIPELINE_WORKERS", "2"))
+    if workers <= 0:
+        return None
+    _pipeline = ImagePipeline(app.logger, workers=workers)
+    app.extensions["image_pipeline"] = _pipeline
+    return _pipeline
@@ -1,30 +1,32 @@
 """User login management for authentication and session handling"""
 
 import hashlib
-import os
 import uuid
 from datetime import datetime, timedelta, timezone
 
-import bcrypt
 import pyotp
 from flask import current_app, flash, g, redirect, render_template, url_for
 from flask_login import logout_user as flask_logout_user
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 
+from data_source.login_attempts import get_failed_login_counter
 from data_source.user_queries import (
-    clear_failed_logins,
     delete_reset_password,
     get_id_by_email,
     get_user_by_email,
     get_user_by_token_hash,
-    get_user_failed_attempts_count,
     insert_into_reset_password,
-    record_failed_login,
+    lock_user_account,
     update_reset_link_used,
     update_user_lockout,
     update_user_password_by_id,
 )
+from domain.control.auth_management import (
+    PasswordHasherBusy,
+    check_password,
+    hash_password,
+    password_needs_rehash,
+)
+from domain.control.mail_outbox import queue_email
 from domain.entity.user import User
 
 FAILED_ATTEMPT_LIMIT = 10
@@ -42,6 +44,9 @@ def login_user(email: str, password: str):
 
     Returns:
         User: The authenticated User object if found, else None
+
+    Raises:
+        PasswordHasherBusy: The password could not be checked right now
     """
     result = get_user_by_email(email)
     if not result:
@@ -77,23 +82,14 @@ def login_user(email: str, password: str):
 
     # Check password hash
     stored_hash = user.get_password()
-    password_valid = bcrypt.checkpw(
-        password.encode("utf-8"), stored_hash.encode("utf-8")
-    )
+    # Raises PasswordHasherBusy when the hashing queue is full; that is not
+    # the user's fault, so no failed attempt is recorded for it
+    password_valid = check_password(password, stored_hash)
 
-    # If password doesn't match, log failed attempt into DB
+    # If password doesn't match, count the failure (locks after too many)
     if not password_valid:
-        record_failed_login(
-            user.get_id()
-        )  # different table from user, its the user_failed_logins table
-        # Check failed attempts in past 10 minutes
-        recent_failures = get_user_failed_attempts_count(
-            user.get_id(), window_minutes=10
-        )
-        locked_until = None
+        recent_failures = record_failed_attempt(user, now)
         if recent_failures >= FAILED_ATTEMPT_LIMIT:
-            locked_until = now + timedelta(minutes=LOCKOUT_MINUTES)
-            update_user_lockout(user.get_id(), locked_until.replace(tzinfo=None))
             current_app.logger.warning(
                 f"Account locked: {email} after {recent_failures} failed attempts in 10 minutes"
             )
@@ -103,8 +99,14 @@ def login_user(email: str, password: str):
         )
         return None
 
-    clear_failed_logins(user.get_id())
-    update_user_lockout(user.get_id(), None)
+    clear_failed_attempts(user)
+
+    # Upgrade the hash while the plaintext is at hand if BCRYPT_ROUNDS changed
+    if password_needs_rehash(stored_hash):
+        try:
+            update_user_password_by_id(user.get_id(), hash_password(password))
+        except PasswordHasherBusy:
+            pass  # Try again on the next login
     return user
 
 
@@ -164,24 +166,51 @@ def verify_user_otp(user, otp_code):
     # Verify OTP
     totp = pyotp.TOTP(user.otp_secret)
     if totp.verify(otp_code):
-        clear_failed_logins(user.id)
-        update_user_lockout(user.id, None)
+        clear_failed_attempts(user)
         return True
 
     # Failed OTP attempt
-    record_failed_login(user.id)
-    recent_failures = get_user_failed_attempts_count(user.id, window_minutes=10)
-    locked_until = None
-
+    recent_failures = record_failed_attempt(user, now)
     if recent_failures >= FAILED_ATTEMPT_LIMIT:
-        locked_until = now + timedelta(minutes=LOCKOUT_MINUTES)
-        update_user_lockout(user.id, locked_until.replace(tzinfo=None))
         current_app.logger.warning(
             f"Account locked: {user.email} after {recent_failures} failed OTP attempts in 10 minutes"
         )
     return False
 
 
+def record_failed_attempt(user, now):
+    """
+    Count a failed password or OTP attempt in the sliding window and lock the
+    account once FAILED_ATTEMPT_LIMIT is reached. Nothing is written to the
+    database until the lock itself.
+
+    Args:
+        user (User): The user who failed
+        now (datetime): Current GMT+8 time
+
+    Returns:
+        int: Failed attempts in the current window
+    """
+    counter = get_failed_login_counter()
+    failures = counter.record(user.id)
+    if len(failures) >= FAILED_ATTEMPT_LIMIT:
+        locked_until = now + timedelta(minutes=LOCKOUT_MINUTES)
+        failed_at = [
+            datetime.fromtimestamp(t, now.tzinfo).replace(tzinfo=None) for t in failures
+        ]
+        lock_user_account(user.id, locked_until.replace(tzinfo=None), failed_at)
+        # The lock outlasts the window, so counting restarts once it ends
+        counter.clear(user.id)
+    return len(failures)
+
+
+def clear_failed_attempts(user):
+    """Reset the window after a successful login, writing only if a lock is recorded."""
+    get_failed_login_counter().clear(user.id)
+    if user.get_locked_until() is not None:
+        update_user_lockout(user.id, None)
+
+
 def logout_user():
     """Log out the current user using flask_login"""
     flask_logout_user()
@@ -226,21 +255,16 @@ def process_reset_password_request(email):
 
         # Send the reset email with the token
         reset_url = url_for("login.reset_password", token=token, _external=True)
-        message = Mail(
-            from_email="buddiesfinder@gmail.com",
-            to_emails=email,
-            subject="Reset Your Password for buddiesfinder",
-            html_content=f'<p>Click <a href="{reset_url}">here</a> to reset your password.</p>',
-        )
-        try:
-            api_key = os.getenv("EMAILVERIFICATION_API_KEY")
-            sg = SendGridAPIClient(api_key)
-            sg.send(message)
+        if queue_email(
+            email,
+            "Reset Your Password for buddiesfinder",
+            f'<p>Click <a href="{reset_url}">here</a> to reset your password.</p>',
+        ):
             current_app.logger.info(
                 f"A password reset request for {email} was initiated"
             )
-        except Exception as e:
-            current_app.logger.error(f"Error sending verification email: {e}")
+        else:
+            current_app.logger.error(f"Error queueing password reset email for {email}")
 
 
 def process_reset_password(token, form):
@@ -290,9 +314,11 @@ def process_reset_password(token, form):
             )
             return redirect(url_for(LOGIN_VIEW))
 
-        hashed = bcrypt.hashpw(
-            form.password.data.encode("utf-8"), bcrypt.gensalt()
-        ).decode("utf-8")
+        try:
+            hashed = hash_password(form.password.data)
+        except PasswordHasherBusy:
+            flash("The server is busy. Please try again in a moment.", "warning")
+            return render_template("reset_password.html", form=form)
         update_user_password_by_id(token_data["user_id"], hashed)
         update_reset_link_used(user_token_hash)
         flash("Your password has been updated. You can now log in.", "success")
@@ -0,0 +1,140 @@
+"""Outgoing email: queued in the request, delivered by a background worker"""
+
+import os
+
+from flask import current_app
+
+from data_source.db_session import call_after_commit
+from data_source.mail_outbox_queries import (
+    claim_due_mails,
+    dead_letter_mail,
+    enqueue_mail,
+    mark_mails_sent,
+    reschedule_mail,
+)
+from data_source.mail_transport import get_mail_transport
+from domain.control.maintenance import PeriodicJob
+
+DEFAULT_POLL_INTERVAL = 5
+
+_job = None
+
+
+def queue_email(to_email, subject, html_body):
+    """
+    Queue an email for the background worker and return straight away.
+
+    The worker is woken once the request commits, so the mail normally
+    leaves within moments; if it is down, the mail waits in mail_outbox.
+
+    Returns:
+        bool: True if the mail was queued
+    """
+    try:
+        enqueue_mail(to_email, subject, html_body)
+    except Exception as e:
+        current_app.logger.error(f"[DB ERROR] Failed to queue mail to {to_email}: {e}")
+        return False
+    if _job is not None:
+        call_after_commit(_job.wake)
+    return True
+
+
+class MailOutboxWorker:
+    """
+    Drains mail_outbox through a transport.
+
+    Mails are claimed in batches. A failed send is retried with exponential
+    backoff (base_delay, 2 * base_delay, ... capped at max_delay). After
+    max_attempts tries it is dead-lettered: marked 'dead' and kept with its
+    last error.
+
+    Args:
+        transport: Object with send(to_email, subject, html_body).
+        logger: Where deliveries and failures are logged.
+    """
+
+    def __init__(
+        self,
+        transport,
+        logger,
+        batch_size=50,
+        max_attempts=8,
+        base_delay=30,
+        max_delay=3600,
+        lease_seconds=300,
+    ):
+        self.transport = transport
+        self.logger = logger
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease_seconds = lease_seconds
+
+    def backoff(self, attempts):
+        """Seconds to wait before the retry that follows attempt number `attempts`."""
+        return min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+
+    def drain(self):
+        """
+        Send everything that is due.
+
+        Returns:
+            dict: Counts of "sent", "retried" and "dead" mails
+        """
+        totals = {"sent": 0, "retried": 0, "dead": 0}
+        while True:
+            mails = claim_due_mails(self.batch_size, self.lease_seconds)
+            sent = []
+            for mail in mails:
+                try:
+                    self.transport.send(
+                        mail["to_email"], mail["subject"], mail["html_body"]
+                    )
+                    sent.append(mail["id"])
+                except Exception as e:
+                    if mail["attempts"] >= self.max_attempts:
+                        dead_letter_mail(mail["id"], e)
+                        totals["dead"] += 1
+                        self.logger.error(
+                            f"Giving up on mail {mail['id']} to {mail['to_email']} "
+                            f"after {mail['attempts']} attempts: {e}"
+                        )
+                    else:
+                        reschedule_mail(mail["id"], self.backoff(mail["attempts"]), e)
+                        totals["retried"] += 1
+                        self.logger.warning(
+                            f"Mail {mail['id']} failed (attempt {mail['attempts']}), "
+                            f"retrying: {e}"
+                        )
+            mark_mails_sent(sent)
+            totals["sent"] += len(sent)
+            if len(mails) < self.batch_size:
+                return totals
+
+
+def init_app(app):
+    """
+    Start the mail worker, polling every MAIL_OUTBOX_INTERVAL seconds
+    (0 disables it, e.g. when a separate process drains the outbox).
+    """
+    global _job
+    interval = float(os.getenv("MAIL_OUTBOX_INTERVAL", str(DEFAULT_POLL_INTERVAL)))
+    if interval <= 0:
+        return None
+    worker = MailOutboxWorker(
+        get_mail_transport(),
+        app.logger,
+        batch_size=int(os.getenv("MAIL_OUTBOX_BATCH_SIZE", "50")),
+        max_attempts=int(os.getenv("MAIL_MAX_ATTEMPTS", "8")),
+    )
+    _job = PeriodicJob(
+        "mail-outbox",
+        interval,
+        worker.drain,
+        on_error=lambda e: app.logger.error(f"Mail worker failed: {e}"),
+    )
+    _job.start()
+    app.extensions["mail_outbox"] = _job
+    return _job
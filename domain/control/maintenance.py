@@ -0,0 +1,116 @@
+"""In-app scheduler for database maintenance jobs"""
+
+import os
+import threading
+
+from data_source.db_connection import get_connection
+from data_source.retention import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_FAILED_LOGIN_DAYS,
+    acquire_lock,
+    release_lock,
+    run_retention,
+)
+
+DEFAULT_RETENTION_INTERVAL = 3600
+
+
+class PeriodicJob:
+    """
+    Calls `fn` every `interval` seconds on a daemon thread.
+
+    The first run happens one interval after start(), so starting a worker
+    never waits on the job; wake() runs it early. Exceptions are passed to
+    `on_error` and the schedule carries on.
+    """
+
+    def __init__(self, name, interval, fn, on_error=None):
+        self.name = name
+        self.interval = interval
+        self._fn = fn
+        self._on_error = on_error
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._loop, name=self.name, daemon=True
+            )
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self._fn()
+            except Exception as e:
+                if self._on_error is not None:
+                    self._on_error(e)
+
+
+def run_scheduled_retention(app):
+    """
+    Purge expired rows unless another worker is already doing it.
+
+    Returns:
+        list: The run_retention report, or None if the job did not run
+    """
+    connection = get_connection()
+    if connection is None:
+        return None
+    try:
+        if not acquire_lock(connection):
+            return None
+        try:
+            report = run_retention(
+                connection,
+                batch_size=int(
+                    os.getenv("RETENTION_BATCH_SIZE", str(DEFAULT_BATCH_SIZE))
+                ),
+                failed_login_days=int(
+                    os.getenv(
+                        "FAILED_LOGIN_RETENTION_DAYS", str(DEFAULT_FAILED_LOGIN_DAYS)
+                    )
+                ),
+            )
+        finally:
+            release_lock(connection)
+    finally:
+        connection.close()
+    for entry in report:
+        if "error" in entry:
+            app.logger.error(f"Retention failed for {entry['table']}: {entry['error']}")
+        else:
+            app.logger.info(
+                f"Retention purged {entry['rows']} rows from {entry['table']} "
+                f"in {entry['seconds']:.2f}s"
+            )
+    return report
+
+
+def init_app(app):
+    """Start the retention job every RETENTION_INTERVAL seconds (0 disables it)."""
+    interval = float(os.getenv("RETENTION_INTERVAL", str(DEFAULT_RETENTION_INTERVAL)))
+    if interval <= 0:
+        return None
+    job = PeriodicJob(
+        "retention-job",
+        interval,
+        lambda: run_scheduled_retention(app),
+        on_error=lambda e: app.logger.error(f"Retention job failed: {e}"),
+    )
+    job.start()
+    app.extensions["retention_job"] = job
+    return job
@@ -1,17 +1,12 @@
-import os
-import uuid
-
-import bcrypt
 from flask import current_app, g
 from PIL import Image, UnidentifiedImageError
-from werkzeug.utils import secure_filename
 
 from data_source.bulletin_queries import (
     get_hosted_activities,
     get_joined_activities,
     get_joined_user_names_by_activity_id,
     get_sports_activity_by_id,
-    update_sports_activity,
+    remove_participant,
     update_sports_activity_details,
 )
 from data_source.social_feed_queries import get_posts_by_user_id
@@ -21,8 +16,12 @@ from data_source.user_queries import (
     remove_user_profile_picture,
     update_user_profile_by_id,
 )
+from domain.control.auth_management import hash_password
+from domain.control.avatars import store_avatar
+from domain.control.blob_store import FORMAT_EXTENSIONS, release_images
 from domain.control.otp_management import generate_otp_for_user, verify_and_enable_otp
 from domain.control.social_feed_management import delete_post, edit_post
+from domain.control.user_search import get_user_search
 from domain.entity.social_post import Comment, Post
 from domain.entity.sports_activity import SportsActivity
 from domain.entity.user import User
@@ -87,7 +86,7 @@ class ProfileManagement:
         return user
 
     def get_user_posts(self, user_id):
-        posts = get_posts_by_user_id(user_id)
+        posts = get_posts_by_user_id(user_id, viewer_id=user_id)
         post_objs = []
         for post in posts:
             comments = [
@@ -113,7 +112,8 @@ class ProfileManagement:
                 image_url=str(post.get("image_url", "")),
                 likes=likes_val,
                 comments=comments,
-                like_user_ids=str(post.get("like_user_ids", "")),
+                liked=bool(post.get("liked")),
+                image_variants=post.get("image_variants"),
             )
             post_objs.append(post_obj)
         # Store user posts in Flask g object
@@ -159,27 +159,27 @@ class ProfileManagement:
         password = form.password.data
         remove_picture = form.remove_profile_picture.data
 
-        profile_picture_url = self._handle_profile_picture_upload(form)
-        if profile_picture_url is False:
-            return False
         if remove_picture:
             profile_picture_url = ""
+        else:
+            profile_picture_url = self._handle_profile_picture_upload(form)
+            if profile_picture_url is False:
+                return False
 
         hashed_password = self._handle_password(password)
         if hashed_password is False:
+            self._release_new_picture(profile_picture_url)
             return False
 
+        user_data = get_user_by_id(user_id)
+        if not isinstance(user_data, dict):
+            user_data = {}
         if hashed_password:
             result = self.update_profile(
                 user_id, name, hashed_password, profile_picture_url
             )
         else:
-            user_data = get_user_by_id(user_id)
-            current_password = (
-                user_data["password"]
-                if isinstance(user_data, dict) and "password" in user_data
-                else ""
-            )
+            current_password = user_data.get("password", "")
             if profile_picture_url is not None:
                 result = self.update_profile(
                     user_id, name, current_password, profile_picture_url
@@ -187,20 +187,38 @@ class ProfileManagement:
             else:
                 result = self.update_profile(user_id, name, current_password)
 
-        if result:
-            g.updated_profile = {
-                "user_id": user_id,
-                "name": name,
-                "profile_picture_url": profile_picture_url,
-            }
+        if not result:
+            self._release_new_picture(profile_picture_url)
+            return result
+
+        if profile_picture_url is not None:
+            # Re-uploading the same picture took a second reference to it,
+            # so the old one is released even when the URL is unchanged
+            old_picture = user_data.get("profile_picture")
+            if old_picture:
+                release_images(old_picture)
+        changes = {"name": name}
+        if profile_picture_url is not None:
+            changes["profile_picture"] = profile_picture_url
+        get_user_search().update(user_id, **changes)
+        g.updated_profile = {
+            "user_id": user_id,
+            "name": name,
+            "profile_picture_url": profile_picture_url,
+        }
         return result
 
+    def _release_new_picture(self, profile_picture_url):
+        if profile_picture_url:
+            release_images(profile_picture_url)
+
     def _handle_profile_picture_upload(self, form):
         if form.profile_picture.data:
             file = form.profile_picture.data
             try:
                 file.seek(0)
                 image = Image.open(file)
+                image_format = image.format
                 image.verify()
                 file.seek(0)
             except (UnidentifiedImageError, OSError) as e:
@@ -208,22 +226,29 @@ class ProfileManagement:
                     f"Uploaded profile picture is not a valid image: {e}"
                 )
                 return False
-            ext = os.path.splitext(secure_filename(file.filename))[1]
-            unique_filename = f"{uuid.uuid4().hex}{ext}"
-            image_path = os.path.join(
-                "presentation", "static", "images", "profile", unique_filename
-            )
-            os.makedirs(os.path.dirname(image_path), exist_ok=True)
-            file.save(image_path)
-            return f"/static/images/profile/{unique_filename}"
+            if image_format not in FORMAT_EXTENSIONS:
+                current_app.logger.warning(
+                    f"Uploaded profile picture has unsupported format {image_format}"
+                )
+                return False
+            # Only the square thumbnail is kept; it is all any page shows
+            try:
+                avatar_url = store_avatar(file)
+            except OSError as e:
+                current_app.logger.warning(
+                    f"Uploaded profile picture could not be decoded: {e}"
+                )
+                return False
+            if avatar_url is None:
+                current_app.logger.error("Uploaded profile picture could not be stored")
+                return False
+            return avatar_url
         return None
 
     def _handle_password(self, password):
         if password:
             try:
-                return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode(
-                    "utf-8"
-                )
+                return hash_password(password)
             except Exception:
                 return False
         return None
@@ -243,7 +268,7 @@ class ProfileManagement:
                 date=str(activity_data.get("date", "")),
                 location=str(activity_data.get("location", "")),
                 max_pax=int(activity_data.get("max_pax", 0)),
-                user_id_list_join=str(activity_data.get("user_id_list_join", "")),
+                participant_count=int(activity_data.get("participant_count", 0)),
             )
         else:
             activity = SportsActivity(
@@ -255,7 +280,7 @@ class ProfileManagement:
                 date=str(getattr(activity_data, "date", "")),
                 location=str(getattr(activity_data, "location", "")),
                 max_pax=int(getattr(activity_data, "max_pax", 0)),
-                user_id_list_join=str(getattr(activity_data, "user_id_list_join", "")),
+                participant_count=int(getattr(activity_data, "participant_count", 0)),
             )
 
         if activity.get_user_id() != user_id:
@@ -280,7 +305,6 @@ class ProfileManagement:
             activity.date,
             activity.location,
             activity.max_pax,
-            activity.user_id_list_join,
         )
         if result:
             g.updated_activity = activity
@@ -302,30 +326,10 @@ class ProfileManagement:
         activity = get_sports_activity_by_id(activity_id)
         if not activity:
             return False, "Activity not found."
-        if hasattr(activity, "get") and callable(activity.get):
-            user_id_list_join = activity.get("user_id_list_join", "") or ""
-        else:
-            user_id_list_join = getattr(activity, "user_id_list_join", "") or ""
-        if not isinstance(user_id_list_join, str):
-            user_id_list_join = str(user_id_list_join)
-        joined_ids = [
-            uid.strip()
-            for uid in user_id_list_join.split(",")
-            if isinstance(uid, str) and uid.strip()
-        ]
-        if str(user_id) not in joined_ids:
+        if not remove_participant(activity_id, user_id):
             return False, "You are not a participant in this activity."
-        joined_ids.remove(str(user_id))
-        new_join_list = ",".join(joined_ids)
-        result = update_sports_activity(activity_id, new_join_list)
-        if result:
-            g.left_activity = {
-                "user_id": user_id,
-                "activity_id": activity_id,
-                "new_join_list": new_join_list,
-            }
-            return True, "Successfully left the activity."
-        return False, "Failed to leave the activity."
+        g.left_activity = {"user_id": user_id, "activity_id": activity_id}
+        return True, "Successfully left the activity."
 
     def delete_post(self, user_id, post_id):
         success = delete_post(user_id, post_id)
@@ -394,10 +398,11 @@ class ProfileManagement:
                 "user": post.get_user(),
                 "content": post.get_content(),
                 "image_url": post.get_image_url(),
+                "image_variants": post.get_image_variants(),
                 "created_at": post.get_created_at(),
                 "likes": post.get_likes(),
                 "comments_count": len(post.get_comments()),
-                "like_user_ids": post.get_like_user_ids(),
+                "liked": post.get_liked(),
             }
             for post in posts
         ]
@@ -1,17 +1,15 @@
 """User registration control logic and business rules"""
 
-import os
-
 from flask import current_app, url_for
 from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 
 from data_source.user_queries import (
     get_user_by_email,
     insert_user,
     update_user_verification_status,
 )
+from domain.control.mail_outbox import queue_email
+from domain.control.user_search import get_user_search
 
 
 def register_user(user_data: dict) -> bool:
@@ -19,28 +17,32 @@ def register_user(user_data: dict) -> bool:
     if existing_user:
         print("User already exists with this email.")
         return False
-    return insert_user(user_data)
+    user_id = insert_user(user_data)
+    if not user_id:
+        return False
+    get_user_search().upsert(
+        {
+            "id": user_id,
+            "name": user_data["name"],
+            "email": user_data["email"],
+            "profile_picture": "",
+        }
+    )
+    return True
 
 
 def send_verification_email(user_email):
     serializer = URLSafeTimedSerializer(current_app.config["SECRET_KEY"])
     token = serializer.dumps(user_email, salt="email-verify")
     verify_url = url_for("register.verify_email", token=token, _external=True)
-    message = Mail(
-        from_email="buddiesfinder@gmail.com",
-        to_emails=user_email,
-        subject="Verify Your Email",
-        html_content=f'<p>Click to verify: <a href="{verify_url}">{verify_url}</a></p>',
-    )
-    try:
-        api_key = os.getenv("EMAILVERIFICATION_API_KEY")
-        sg = SendGridAPIClient(api_key)
-        sg.send(message)
-        current_app.logger.info(
-            f"Verification Email successfully sent to: {user_email}"
-        )
-    except Exception as e:
-        current_app.logger.error(f"Error sending verification email: {e}")
+    if queue_email(
+        user_email,
+        "Verify Your Email",
+        f'<p>Click to verify: <a href="{verify_url}">{verify_url}</a></p>',
+    ):
+        current_app.logger.info(f"Verification Email queued for: {user_email}")
+    else:
+        current_app.logger.error(f"Error queueing verification email for: {user_email}")
 
 
 def update_verification_status(token):
@@ -1,10 +1,8 @@
-import os
-import uuid
-
-from flask import current_app, g
+from flask import g
+from flask_login import current_user
 from PIL import Image, UnidentifiedImageError
-from werkzeug.utils import secure_filename
 
+from data_source.db_session import call_after_commit
 from data_source.social_feed_queries import (
     add_comment,
     add_like,
@@ -13,15 +11,20 @@ from data_source.social_feed_queries import (
 from data_source.social_feed_queries import delete_post as ds_delete_post
 from data_source.social_feed_queries import (
     get_all_posts,
-    get_featured_posts,
     get_like_count,
     get_post_by_id,
     get_posts_by_user_id,
     remove_like,
     update_post,
 )
+from domain.control.blob_store import FORMAT_EXTENSIONS, release_images, store_blob
+from domain.control.featured_ranking import get_featured_ranking
+from domain.control.image_pipeline import submit_post_image
 from domain.entity.social_post import Comment, Post
 
+# Number of posts rendered per feed page / infinite-scroll request
+FEED_PAGE_SIZE = 20
+
 
 def allowed_file(filename):
     # Check if the uploaded file has an allowed image extension
@@ -33,6 +36,13 @@ def allowed_file(filename):
     }
 
 
+def _viewer_id():
+    # Like state ("liked") is always reported for the logged-in user
+    if current_user and current_user.is_authenticated:
+        return int(current_user.get_id())
+    return None
+
+
 # Convert database rows to Post entities using actual DB field names
 def create_entity_from_row(result):
 
@@ -57,9 +67,10 @@ def create_entity_from_row(result):
             user=row.get("user_name", ""),
             content=row.get("caption", ""),
             image_url=row.get("image_path", ""),
-            likes=get_like_count(row["id"]),
+            likes=row.get("like_count", 0),
             comments=comments,
-            like_user_ids=row.get("like_user_ids", ""),
+            liked=bool(row.get("liked")),
+            image_variants=row.get("image_variants"),
         )
         # Attach profile_picture to the post object
         post.profile_picture = row.get("profile_picture", "")
@@ -69,13 +80,17 @@ def create_entity_from_row(result):
     return post_list
 
 
-def get_all_posts_control():
-    """Get all posts for display in the social feed
+def get_all_posts_control(before_id=None, limit=None):
+    """Get posts for display in the social feed, newest first
+
+    Args:
+        before_id (int): Keyset cursor, only posts older than this id are returned
+        limit (int): Maximum number of posts, or None for all
 
     Returns:
         list: List of Post entities
     """
-    result = get_all_posts()
+    result = get_all_posts(before_id, limit, _viewer_id())
     if not result:
         return []
 
@@ -83,10 +98,39 @@ def get_all_posts_control():
     return post_list
 
 
-# Get featured posts (top 5 by likes) for display
+def _split_page(post_list, limit):
+    # One extra row is fetched to know whether another page exists
+    if len(post_list) > limit:
+        post_list = post_list[:limit]
+        g.post_list = post_list
+        return post_list, post_list[-1].get_id()
+    return post_list, None
+
+
+def get_feed_page_control(before_id=None, limit=FEED_PAGE_SIZE):
+    """Get one page of the social feed
+
+    Returns:
+        tuple: (list of Post entities, cursor for the next page or None)
+    """
+    return _split_page(get_all_posts_control(before_id, limit + 1), limit)
+
+
+def get_user_posts_page_control(user_id, before_id=None, limit=FEED_PAGE_SIZE):
+    """Get one page of a user's posts
+
+    Returns:
+        tuple: (list of Post entities, cursor for the next page or None)
+    """
+    return _split_page(
+        get_posts_by_user_id_control(user_id, before_id, limit + 1), limit
+    )
+
+
+# Get featured posts (top 5 by likes, optionally time-decayed) for display
 def get_featured_posts_control():
 
-    result = get_featured_posts()
+    result = get_featured_ranking().top()
     if not result:
         return []
 
@@ -99,9 +143,10 @@ def get_featured_posts_control():
             user=row.get("user_name", ""),
             content=row.get("caption", ""),
             image_url=row.get("image_path", ""),
-            likes=get_like_count(row["id"]),
+            likes=row.get("like_count", 0),
             comments=[],  # Featured posts don't need comments
-            like_user_ids=row.get("like_user_ids", ""),
+            liked=bool(row.get("liked")),
+            image_variants=row.get("image_variants"),
         )
         # Attach profile_picture to the post object
         post.profile_picture = row.get("profile_picture", "")
@@ -112,7 +157,7 @@ def get_featured_posts_control():
 
 # Get a specific post by ID
 def get_post_by_id_control(post_id):
-    result = get_post_by_id(post_id)
+    result = get_post_by_id(post_id, _viewer_id())
     if not result:
         return None
 
@@ -137,9 +182,10 @@ def get_post_by_id_control(post_id):
         user=row.get("user_name", ""),
         content=row.get("caption", ""),
         image_url=row.get("image_path", ""),
-        likes=get_like_count(row["id"]),
+        likes=row.get("like_count", 0),
         comments=comments,
-        like_user_ids=row.get("like_user_ids", ""),
+        liked=bool(row.get("liked")),
+        image_variants=row.get("image_variants"),
     )
     # Attach profile_picture to the post object
     post.profile_picture = row.get("profile_picture", "")
@@ -155,24 +201,28 @@ def create_post_control(user_id, content, image_file=None):
         try:
             image_file.seek(0)
             image = Image.open(image_file)
+            image_format = image.format
             image.verify()
             image_file.seek(0)
         except UnidentifiedImageError:
             return False
+        if image_format not in FORMAT_EXTENSIONS:
+            return False
 
-        # Get the original file extension
-        _, ext = os.path.splitext(secure_filename(image_file.filename))
-        # Generate a unique filename with uuid4
-        unique_filename = f"{uuid.uuid4().hex}{ext}"
-        upload_folder = current_app.config.get(
-            "UPLOAD_FOLDER", "presentation/static/images/social"
-        )
-        os.makedirs(upload_folder, exist_ok=True)
-        filepath = os.path.join(upload_folder, unique_filename)
-        image_file.save(filepath)
-        image_url = f"/static/images/social/{unique_filename}"
+        # Stored under the hash of its bytes, so re-uploads share one file
+        image_url = store_blob(image_file.read(), FORMAT_EXTENSIONS[image_format])
+        if not image_url:
+            return False
 
-    return add_post(user_id, content, image_url)
+    post_id = add_post(user_id, content, image_url)
+    if not post_id:
+        if image_url:
+            release_images(image_url)
+        return False
+    if image_url:
+        # Resized variants are made in the background once the post is saved
+        call_after_commit(lambda: submit_post_image(post_id, image_url))
+    return post_id
 
 
 # Handle creation of a new comment on a post
@@ -181,12 +231,27 @@ def create_comment_control(post_id, user_id, content):
     return add_comment(post_id, user_id, content)
 
 
+def _like_result(post_id, like_count):
+    # like_count is None when the write changed nothing; only then is the
+    # current count looked up separately
+    if like_count is None:
+        return False, get_like_count(post_id)
+    # The ranking is shared by the whole worker; a rolled-back like must not
+    # reach it
+    call_after_commit(
+        lambda: get_featured_ranking().on_like_changed(post_id, like_count)
+    )
+    return True, like_count
+
+
 def like_post_control(post_id, user_id):
-    return add_like(post_id, user_id)
+    """Like a post. Returns (success, like_count)."""
+    return _like_result(post_id, add_like(post_id, user_id))
 
 
 def unlike_post_control(post_id, user_id):
-    return remove_like(post_id, user_id)
+    """Unlike a post. Returns (success, like_count)."""
+    return _like_result(post_id, remove_like(post_id, user_id))
 
 
 # Get formatted display data for posts
@@ -203,12 +268,16 @@ def get_posts_display_data():
                 "user": post.get_user(),
                 "content": post.get_content(),
                 "image_url": post.get_image_url(),
+                "image_variants": post.get_image_variants(),
                 "likes": post.get_likes(),
+                "liked": post.get_liked(),
+                "profile_picture": getattr(post, "profile_picture", ""),
                 "comments": [
                     {
                         "id": comment.get_id(),
                         "user": comment.get_user(),
                         "content": comment.get_content(),
+                        "profile_picture": comment.get_profile_picture(),
                     }
                     for comment in post.get_comments()
                 ],
@@ -226,40 +295,39 @@ def edit_post(
         return False, "Post not found or unauthorized."
 
     image_filename = post.get("image_path")
-    # Remove image if requested
-    if remove_image and image_filename:
-        image_path = os.path.join(
-            "presentation", "static", "uploads", os.path.basename(image_filename)
-        )
-        if os.path.exists(image_path):
-            os.remove(image_path)
-        image_filename = None
+    previous = update_post(
+        post_id,
+        updated_content,
+        None if remove_image else image_filename,
+        image_filename,
+    )
+    if previous is None:
+        # Deleted, or its image was swapped for the processed variants since
+        # we read it
+        return False, "Failed to update post."
 
-    # Update post in DB
-    result = update_post(post_id, updated_content, image_filename)
-    if result:
-        return True, "Post updated successfully."
-    return False, "Failed to update post."
+    # Release what the post actually held, only once it no longer points at it
+    if remove_image and previous["image_path"]:
+        release_images(previous["image_path"], previous["image_variants"])
+    return True, "Post updated successfully."
 
 
 def delete_post(user_id: int, post_id: int) -> bool:
     post = get_post_by_id(post_id)
     if not post or int(post["user_id"]) != user_id:
         return False
-    image_filename = post.get("image_path")
-    if image_filename:
-        image_path = os.path.join(
-            "presentation", "static", "uploads", os.path.basename(image_filename)
-        )
-        if os.path.exists(image_path):
-            os.remove(image_path)
-    return ds_delete_post(post_id)
+    if not ds_delete_post(post_id):
+        return False
+    # Only a post that is really gone gives up its images
+    release_images(post.get("image_path"), post.get("image_variants"))
+    call_after_commit(lambda: get_featured_ranking().on_post_removed(post_id))
+    return True
 
 
-# Get all posts by a specific user ID
-def get_posts_by_user_id_control(user_id):
+# Get posts by a specific user ID, newest first
+def get_posts_by_user_id_control(user_id, before_id=None, limit=None):
 
-    result = get_posts_by_user_id(user_id)
+    result = get_posts_by_user_id(user_id, before_id, limit, _viewer_id())
     if not result:
         return []
 
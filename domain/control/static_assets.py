@@ -0,0 +1,64 @@
+"""Content-hash fingerprints for static asset URLs"""
+
+import hashlib
+import os
+import threading
+
+from flask import current_app, request, url_for
+
+# Fingerprinted URLs never change content, so caches may keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_versions = {}
+_versions_lock = threading.Lock()
+
+
+def asset_version(path):
+    """
+    Short content hash of a file, cached until the file's mtime changes.
+
+    Returns:
+        str: 12 hex characters, or None if the file does not exist
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _versions.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    version = digest.hexdigest()[:12]
+    with _versions_lock:
+        _versions[path] = (mtime, version)
+    return version
+
+
+def asset_url(filename):
+    """
+    url_for('static') with a ?v=<content hash> fingerprint.
+
+    Any edit to the file changes its URL, so the old one can be cached as
+    immutable by browsers and nginx.
+    """
+    version = asset_version(os.path.join(current_app.static_folder, filename))
+    if version is None:
+        return url_for("static", filename=filename)
+    return url_for("static", filename=filename, v=version)
+
+
+def _cache_fingerprinted(response):
+    # Matches nginx for when Flask serves /static itself (local runs, tests)
+    if request.endpoint == "static" and request.args.get("v"):
+        if response.status_code == 200:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def init_app(app):
+    """Register the asset_url template global."""
+    app.add_template_global(asset_url, "asset_url")
+    app.after_request(_cache_fingerprinted)
@@ -0,0 +1,256 @@
+"""Streams uploaded files to disk and rejects non-images while they arrive"""
+
+import os
+import struct
+import threading
+import time
+from tempfile import SpooledTemporaryFile
+
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+# Formats the upload forms accept (FileAllowed: jpg, jpeg, png)
+ALLOWED_FORMATS = ("JPEG", "PNG")
+# Header bytes kept for sniffing; JPEG metadata segments can push the frame
+# header past the first few KB, so allow for one full EXIF segment
+SNIFF_LIMIT = 128 * 1024
+# Uploads up to this size stay in memory; larger ones spill to a temp file
+SPOOL_MEMORY_SIZE = 256 * 1024
+
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7}
+JPEG_SOF_MARKERS |= {0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers that stand alone, without a length field
+JPEG_BARE_MARKERS = {0x01, 0xD8} | set(range(0xD0, 0xD8))
+
+_stats = {
+    "uploads": 0,
+    "accepted": 0,
+    "rejected_type": 0,
+    "rejected_size": 0,
+    "rejected_dimensions": 0,
+    "bytes": 0,
+    "seconds": 0.0,
+    "max_seconds": 0.0,
+}
+_stats_lock = threading.Lock()
+
+
+class UnsupportedImage(UnsupportedMediaType):
+    description = "Only JPEG and PNG images can be uploaded."
+
+
+class UploadTooLarge(RequestEntityTooLarge):
+    description = "The uploaded file is too large."
+
+
+class ImageDimensionsTooLarge(RequestEntityTooLarge):
+    description = "The uploaded image has too many pixels."
+
+
+def _sniff_jpeg(header):
+    position = 2
+    while True:
+        if position >= len(header):
+            return None
+        if header[position] != 0xFF:
+            raise UnsupportedImage()
+        # Markers may be padded with any number of 0xFF fill bytes
+        while position < len(header) and header[position] == 0xFF:
+            position += 1
+        if position >= len(header):
+            return None
+        marker = header[position]
+        position += 1
+        if marker in JPEG_BARE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):
+            # End of image or start of scan before any frame header
+            raise UnsupportedImage()
+        if position + 2 > len(header):
+            return None
+        (length,) = struct.unpack(">H", header[position : position + 2])
+        if length < 2:
+            raise UnsupportedImage()
+        if marker in JPEG_SOF_MARKERS:
+            if position + 7 > len(header):
+                return None
+            height, width = struct.unpack(">HH", header[position + 3 : position + 7])
+            return "JPEG", width, height
+        position += length
+
+
+def _sniff_webp(header):
+    if len(header) < 30:
+        return None
+    chunk = header[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", header[26:30])
+        return "WEBP", width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        (bits,) = struct.unpack("<I", header[21:25])
+        return "WEBP", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return "WEBP", width, height
+    raise UnsupportedImage()
+
+
+def sniff_image(header):
+    """
+    Identify an image from its first bytes, without decoding it.
+
+    Returns:
+        tuple: (format, width, height), or None if more bytes are needed
+
+    Raises:
+        UnsupportedImage: The bytes are not a JPEG, PNG, GIF or WebP image
+    """
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        if len(header) < 24:
+            return None
+        if header[12:16] != b"IHDR":
+            raise UnsupportedImage()
+        width, height = struct.unpack(">II", header[16:24])
+        return "PNG", width, height
+    if header.startswith(b"\xff\xd8"):
+        return _sniff_jpeg(header)
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        if len(header) < 10:
+            return None
+        width, height = struct.unpack("<HH", header[6:10])
+        return "GIF", width, height
+    if header.startswith(b"RIFF") and header[8:12] == b"WEBP":
+        return _sniff_webp(header)
+    prefixes = (b"\x89PNG\r\n\x1a\n", b"\xff\xd8", b"GIF8", b"RIFF")
+    if len(header) < 12 and any(p.startswith(header[: len(p)]) for p in prefixes):
+        return None
+    raise UnsupportedImage()
+
+
+def _record(outcome, size, seconds):
+    with _stats_lock:
+        _stats["uploads"] += 1
+        _stats[outcome] += 1
+        _stats["bytes"] += size
+        _stats["seconds"] += seconds
+        _stats["max_seconds"] = max(_stats["max_seconds"], seconds)
+
+
+def get_upload_stats():
+    """Return a snapshot of upload counters for this worker."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+class UploadSpool(SpooledTemporaryFile):
+    """
+    Upload container that checks the file as Werkzeug streams it in.
+
+    The format and dimensions are read from the header as soon as enough of
+    it has arrived. A non-image, an image over max_pixels or a file over
+    max_bytes aborts the request there, before the rest is read.
+    """
+
+    def __init__(self, max_bytes, max_pixels, logger=None, filename=None):
+        super().__init__(max_size=SPOOL_MEMORY_SIZE)
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.logger = logger
+        self.filename = filename
+        self.size = 0
+        self.image = None
+        self.done = False
+        self._header = b""
+        self._started = time.perf_counter()
+        self._sniffed_after = None
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self._reject("rejected_size", UploadTooLarge())
+        if self.image is None and len(self._header) < SNIFF_LIMIT:
+            self._header += data[: SNIFF_LIMIT - len(self._header)]
+            self._sniff(final=False)
+        return super().write(data)
+
+    def seek(self, *args):
+        # Werkzeug rewinds the container once the last chunk is written
+        if not self.done:
+            self.done = True
+            self._finish()
+        return super().seek(*args)
+
+    def _sniff(self, final):
+        try:
+            image = sniff_image(self._header)
+        except UnsupportedImage as e:
+            self._reject("rejected_type", e)
+        if image is None:
+            if final and self.size < SNIFF_LIMIT:
+                # The whole file arrived and it never became an image
+                self._reject("rejected_type", UnsupportedImage())
+            return
+        if image[0] not in ALLOWED_FORMATS:
+            self._reject("rejected_type", UnsupportedImage())
+        if image[1] * image[2] > self.max_pixels:
+            self._reject("rejected_dimensions", ImageDimensionsTooLarge())
+        self.image = image
+        self._sniffed_after = time.perf_counter() - self._started
+
+    def _finish(self):
+        if self.size == 0:
+            # A file input left empty still sends an empty part
+            return
+        if self.image is None:
+            self._sniff(final=True)
+        seconds = time.perf_counter() - self._started
+        _record("accepted", self.size, seconds)
+        if self.logger is not None:
+            sniffed = "header not found"
+            if self.image is not None:
+                image_format, width, height = self.image
+                sniffed = (
+                    f"{image_format} {width}x{height} after "
+                    f"{self._sniffed_after * 1000:.1f} ms"
+                )
+            self.logger.info(
+                f"Upload {self.filename!r}: {self.size} bytes in "
+                f"{seconds * 1000:.1f} ms ({sniffed})"
+            )
+
+    def _reject(self, outcome, error):
+        self.done = True
+        seconds = time.perf_counter() - self._started
+        _record(outcome, self.size, seconds)
+        if self.logger is not None:
+            self.logger.warning(
+                f"Upload {self.filename!r} rejected after {self.size} bytes "
+                f"in {seconds * 1000:.1f} ms: {error.description}"
+            )
+        self.close()
+        raise error
+
+
+class UploadRequest(Request):
+    """Request class whose file uploads are streamed into an UploadSpool."""
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        max_bytes = current_app.config["UPLOAD_MAX_BYTES"]
+        if content_length and content_length > max_bytes:
+            raise UploadTooLarge()
+        return UploadSpool(
+            max_bytes,
+            current_app.config["UPLOAD_MAX_PIXELS"],
+            logger=current_app.logger,
+            filename=filename,
+        )
+
+
+def init_app(app):
+    """Use UploadRequest, with limits from UPLOAD_MAX_BYTES / UPLOAD_MAX_PIXELS."""
+    app.config["UPLOAD_MAX_BYTES"] = int(os.getenv("UPLOAD_MAX_BYTES", 1024 * 1024))
+    app.config["UPLOAD_MAX_PIXELS"] = int(os.getenv("UPLOAD_MAX_PIXELS", 50_000_000))
+    app.request_class = UploadRequest
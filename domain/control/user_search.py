@@ -0,0 +1,190 @@
+"""Typeahead search over user names for the social feed's user picker"""
+
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+
+from data_source.cache import LRUCache
+from data_source.user_queries import get_users_for_search, search_users_by_name
+
+SEARCH_RESULT_LIMIT = 10
+PREFIX_CACHE_SIZE = 2048
+RESULT_FIELDS = ("id", "name", "email", "profile_picture")
+
+
+def normalize_name(name):
+    """Case-fold and collapse whitespace, matching user.name_normalized."""
+    return " ".join((name or "").split()).casefold()
+
+
+def name_keys(name):
+    """Index keys for a name: the full name and every suffix starting at a word."""
+    words = normalize_name(name).split(" ")
+    return {" ".join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+class UserSearchIndex:
+    """
+    Per-worker prefix index over user names.
+
+    Names are kept as a sorted array of (key, user_id) pairs, one pair for the
+    full name and one for each later word, so "ta" finds "Alice Tan". A prefix
+    lookup is a bisect plus a short forward scan. Recent prefixes are cached
+    in an LRU so hot keystrokes skip even that.
+
+    Local creates and renames are applied in place; changes made on other
+    workers are picked up by reloading after `ttl` seconds.
+
+    Args:
+        loader (callable): loader() -> list of user rows with RESULT_FIELDS.
+        ttl (float): Seconds before the index is reloaded.
+        cache_size (int): Number of prefixes kept in the result cache.
+    """
+
+    def __init__(self, loader, ttl=300, cache_size=PREFIX_CACHE_SIZE, clock=time.time):
+        self._loader = loader
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = []
+        self._users = {}
+        self._loaded_at = None
+        self.cache = LRUCache(cache_size)
+
+    def search(self, term, limit=SEARCH_RESULT_LIMIT):
+        prefix = normalize_name(term)
+        if not prefix:
+            return []
+        with self._lock:
+            if self._loaded_at is None or self._clock() - self._loaded_at > self.ttl:
+                self._reload()
+        cached = self.cache.get((prefix, limit))
+        if cached is not None:
+            return cached
+        with self._lock:
+            results = self._scan(prefix, limit)
+            # Cached under the lock so a concurrent upsert cannot be masked
+            self.cache.set((prefix, limit), results)
+        return results
+
+    def upsert(self, row):
+        """Add a new user or apply a rename / profile change."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            user = {field: row.get(field) for field in RESULT_FIELDS}
+            self._remove(user["id"])
+            self._users[user["id"]] = user
+            for key in name_keys(user["name"]):
+                insort(self._entries, (key, user["id"]))
+            self.cache.clear()
+
+    def update(self, user_id, **fields):
+        """Merge changed fields into a user that is already indexed."""
+        with self._lock:
+            existing = self._users.get(user_id)
+        if existing is None:
+            self.invalidate()
+            return
+        self.upsert({**existing, **fields})
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+        self.cache.clear()
+
+    def _reload(self):
+        users = {}
+        entries = []
+        for row in self._loader() or []:
+            user = {field: row.get(field) for field in RESULT_FIELDS}
+            users[user["id"]] = user
+            entries.extend((key, user["id"]) for key in name_keys(user["name"]))
+        entries.sort()
+        self._users = users
+        self._entries = entries
+        self._loaded_at = self._clock()
+        self.cache.clear()
+
+    def _remove(self, user_id):
+        old = self._users.pop(user_id, None)
+        if old is None:
+            return
+        for key in name_keys(old["name"]):
+            i = bisect_left(self._entries, (key, user_id))
+            if i < len(self._entries) and self._entries[i] == (key, user_id):
+                del self._entries[i]
+
+    def _scan(self, prefix, limit):
+        results = []
+        seen = set()
+        i = bisect_left(self._entries, (prefix,))
+        while i < len(self._entries) and len(results) < limit:
+            key, user_id = self._entries[i]
+            if not key.startswith(prefix):
+                break
+            if user_id not in seen:
+                seen.add(user_id)
+                results.append(dict(self._users[user_id]))
+            i += 1
+        return results
+
+
+class DatabaseUserSearch:
+    """
+    Prefix search straight against the indexed user.name_normalized column,
+    for deployments where holding every name in each worker is too costly.
+    Only the start of the full name is matched. Results are cached briefly.
+    """
+
+    def __init__(self, ttl=30, cache_size=PREFIX_CACHE_SIZE):
+        self.cache = LRUCache(cache_size, ttl=ttl)
+
+    def search(self, term, limit=SEARCH_RESULT_LIMIT):
+        prefix = normalize_name(term)
+        if not prefix:
+            return []
+        cached = self.cache.get((prefix, limit))
+        if cached is not None:
+            return cached
+        results = [
+            {field: row.get(field) for field in RESULT_FIELDS}
+            for row in search_users_by_name(prefix, limit=limit)
+        ]
+        self.cache.set((prefix, limit), results)
+        return results
+
+    def upsert(self, row):
+        self.cache.clear()
+
+    def update(self, user_id, **fields):
+        self.cache.clear()
+
+    def invalidate(self):
+        self.cache.clear()
+
+
+_search = None
+_search_lock = threading.Lock()
+
+
+def get_user_search():
+    """
+    Process-wide user search, configured from USER_SEARCH_INDEX ("memory",
+    the default, or "db") and USER_SEARCH_TTL.
+    """
+    global _search
+    if _search is None:
+        with _search_lock:
+            if _search is None:
+                ttl = float(os.getenv("USER_SEARCH_TTL", "300"))
+                if os.getenv("USER_SEARCH_INDEX", "memory") == "db":
+                    _search = DatabaseUserSearch(ttl=min(ttl, 30))
+                else:
+                    _search = UserSearchIndex(get_users_for_search, ttl=ttl)
+    return _search
+
+
+def search_users_control(term, limit=SEARCH_RESULT_LIMIT):
+    return get_user_search().search(term, limit)
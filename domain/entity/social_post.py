@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional
 
 
 @dataclass
@@ -53,7 +53,8 @@ class Post:
     image_url: str
     likes: int
     comments: List[Comment] = field(default_factory=list)
-    like_user_ids: str = ""
+    liked: bool = False
+    image_variants: Optional[dict] = None
 
     # Getters
     def get_id(self):
@@ -74,8 +75,11 @@ class Post:
     def get_comments(self):
         return self.comments
 
-    def get_like_user_ids(self):
-        return self.like_user_ids
+    def get_liked(self):
+        return self.liked
+
+    def get_image_variants(self):
+        return self.image_variants
 
     # Setters
     def set_id(self, id):
@@ -96,5 +100,8 @@ class Post:
     def set_comments(self, comments):
         self.comments = comments
 
-    def set_like_user_ids(self, like_user_ids):
-        self.like_user_ids = like_user_ids
+    def set_liked(self, liked):
+        self.liked = liked
+
+    def set_image_variants(self, image_variants):
+        self.image_variants = image_variants
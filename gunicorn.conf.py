@@ -0,0 +1,12 @@
+"""gunicorn settings for the web container (see "Password Hashing" in the README)"""
+
+import os
+
+bind = "0.0.0.0:8000"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Threaded workers: while one request waits on bcrypt (which releases the GIL
+# on the PasswordHasher pool), the worker's other threads keep serving pages.
+# A sync worker would only ever have one hash in flight.
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
@@ -24,9 +24,11 @@ CREATE TABLE IF NOT EXISTS `mydb`.`user` (
   `otp_enabled` BOOLEAN NOT NULL DEFAULT FALSE,
   `current_session_token` VARCHAR(64) NULL,
   `email_verified` BOOLEAN NOT NULL DEFAULT FALSE,
+  `name_normalized` VARCHAR(45) AS (LOWER(TRIM(`name`))) STORED,
   PRIMARY KEY (`id`),
   UNIQUE INDEX `id_UNIQUE` (`id` ASC) VISIBLE,
-  UNIQUE INDEX `email_UNIQUE` (`email` ASC) VISIBLE
+  UNIQUE INDEX `email_UNIQUE` (`email` ASC) VISIBLE,
+  INDEX `idx_user_name_normalized` (`name_normalized`)
 ) ENGINE = InnoDB;
 
 
@@ -37,6 +39,7 @@ CREATE TABLE IF NOT EXISTS `mydb`.`user_failed_login` (
     `failed_at` DATETIME NOT NULL,
     PRIMARY KEY (`id`),
     INDEX `idx_user_failed_login_user_id` (`user_id`),
+    INDEX `idx_user_failed_login_failed_at` (`failed_at`),
     CONSTRAINT `fk_user_failed_login_user`
         FOREIGN KEY (`user_id`)
         REFERENCES `mydb`.`user` (`id`)
@@ -54,6 +57,7 @@ CREATE TABLE IF NOT EXISTS `mydb`.`reset_password` (
   PRIMARY KEY (`id`),
   UNIQUE INDEX `token_hash_UNIQUE` (`token_hash` ASC) VISIBLE,
   INDEX `idx_reset_password_user_id` (`user_id` ASC) VISIBLE,
+  INDEX `idx_reset_password_expires_at` (`expires_at` ASC) VISIBLE,
   CONSTRAINT `fk_reset_password_user`
     FOREIGN KEY (`user_id`)
     REFERENCES `mydb`.`user` (`id`)
@@ -72,9 +76,11 @@ CREATE TABLE IF NOT EXISTS `mydb`.`sports_activity` (
   `date` DATETIME NOT NULL,
   `location` VARCHAR(255) NOT NULL,
   `max_pax` INT NOT NULL,
-  `user_id_list_join` VARCHAR(255) NULL,
+  `participant_count` INT NOT NULL DEFAULT 0,
   PRIMARY KEY (`id`),
   INDEX `fk_user_id_idx` (`user_id` ASC) VISIBLE,
+  INDEX `idx_sports_activity_date_type` (`date`, `activity_type`),
+  FULLTEXT INDEX `idx_sports_activity_search` (`activity_name`, `location`, `skills_req`) WITH PARSER ngram,
   CONSTRAINT `fk_user_id`
     FOREIGN KEY (`user_id`)
     REFERENCES `mydb`.`user` (`id`)
@@ -82,16 +88,76 @@ CREATE TABLE IF NOT EXISTS `mydb`.`sports_activity` (
     ON UPDATE NO ACTION
 ) ENGINE = InnoDB;
 
+-- ACTIVITY PARTICIPANT TABLE (one row per user per joined activity)
+CREATE TABLE IF NOT EXISTS `mydb`.`activity_participant` (
+  `activity_id` INT NOT NULL,
+  `user_id` INT NOT NULL,
+  `joined_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`activity_id`, `user_id`),
+  INDEX `idx_activity_participant_user` (`user_id`, `activity_id`),
+  CONSTRAINT `fk_activity_participant_activity`
+    FOREIGN KEY (`activity_id`)
+    REFERENCES `mydb`.`sports_activity` (`id`)
+    ON DELETE CASCADE
+    ON UPDATE NO ACTION,
+  CONSTRAINT `fk_activity_participant_user`
+    FOREIGN KEY (`user_id`)
+    REFERENCES `mydb`.`user` (`id`)
+    ON DELETE CASCADE
+    ON UPDATE NO ACTION
+) ENGINE = InnoDB;
+
+
+-- HTTP SESSION TABLE (server-side Flask sessions, see SESSION_BACKEND)
+CREATE TABLE IF NOT EXISTS `mydb`.`http_session` (
+  `id` VARCHAR(255) NOT NULL,
+  `data` BLOB NOT NULL,
+  `expires_at` DATETIME NOT NULL,
+  PRIMARY KEY (`id`),
+  INDEX `idx_http_session_expires_at` (`expires_at`)
+) ENGINE = InnoDB;
+
+
+-- MAIL OUTBOX TABLE (outgoing emails, sent by the background mail worker)
+CREATE TABLE IF NOT EXISTS `mydb`.`mail_outbox` (
+  `id` BIGINT NOT NULL AUTO_INCREMENT,
+  `to_email` VARCHAR(255) NOT NULL,
+  `subject` VARCHAR(255) NOT NULL,
+  `html_body` TEXT NOT NULL,
+  `status` ENUM('pending', 'sent', 'dead') NOT NULL DEFAULT 'pending',
+  `attempts` INT NOT NULL DEFAULT 0,
+  `next_attempt_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `last_error` VARCHAR(1000) NULL,
+  `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `sent_at` DATETIME NULL,
+  PRIMARY KEY (`id`),
+  INDEX `idx_mail_outbox_due` (`status`, `next_attempt_at`),
+  INDEX `idx_mail_outbox_sent_at` (`status`, `sent_at`)
+) ENGINE = InnoDB;
+
+
+-- IMAGE BLOB TABLE (reference counts for content-addressed uploaded images)
+CREATE TABLE IF NOT EXISTS `mydb`.`image_blob` (
+  `sha256` CHAR(64) NOT NULL,
+  `ext` VARCHAR(10) NOT NULL,
+  `ref_count` INT NOT NULL DEFAULT 0,
+  `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`sha256`)
+) ENGINE = InnoDB;
+
 
 -- FEED TABLE
 CREATE TABLE IF NOT EXISTS `mydb`.`feed` (
   `id` INT NOT NULL AUTO_INCREMENT,
   `user_id` INT NOT NULL,
   `image_path` VARCHAR(255) NULL,  
+  `image_variants` JSON NULL,
   `caption` VARCHAR(255) NULL,
-  `like_user_ids` TEXT NULL,
+  `like_count` INT NOT NULL DEFAULT 0,
+  `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (`id`),
   INDEX `idx_feed_user_id` (`user_id`),
+  INDEX `idx_feed_like_count` (`like_count`, `id`),
   CONSTRAINT `fk_feed_user`
     FOREIGN KEY (`user_id`)
     REFERENCES `mydb`.`user` (`id`)
@@ -99,6 +165,25 @@ CREATE TABLE IF NOT EXISTS `mydb`.`feed` (
     ON UPDATE NO ACTION
 ) ENGINE = InnoDB;
 
+-- POST LIKE TABLE (one row per user per liked post)
+CREATE TABLE IF NOT EXISTS `mydb`.`post_like` (
+  `post_id` INT NOT NULL,
+  `user_id` INT NOT NULL,
+  `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`post_id`, `user_id`),
+  INDEX `idx_post_like_user_id` (`user_id`),
+  CONSTRAINT `fk_post_like_feed`
+    FOREIGN KEY (`post_id`)
+    REFERENCES `mydb`.`feed` (`id`)
+    ON DELETE CASCADE
+    ON UPDATE NO ACTION,
+  CONSTRAINT `fk_post_like_user`
+    FOREIGN KEY (`user_id`)
+    REFERENCES `mydb`.`user` (`id`)
+    ON DELETE CASCADE
+    ON UPDATE NO ACTION
+) ENGINE = InnoDB;
+
 -- COMMENTS TABLE
 CREATE TABLE IF NOT EXISTS `mydb`.`comments` (
   `id` INT NOT NULL AUTO_INCREMENT,
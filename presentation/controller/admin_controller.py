@@ -1,6 +1,6 @@
 import functools
 
-from flask import Blueprint, flash, redirect, render_template, url_for
+from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
 from domain.control.admin_management import remove_social_post, remove_sports_activity
@@ -9,7 +9,7 @@ from domain.control.bulletin_management import (
     get_bulletin_listing,
     search_bulletin,
 )
-from domain.control.social_feed_management import get_all_posts_control
+from domain.control.social_feed_management import get_feed_page_control
 from domain.entity.forms import DeleteActivityForm, DeletePostForm, SearchForm
 
 ADMIN_BULLETIN_PAGE = "admin.bulletin_page"  # Name of the admin bulletin page route
@@ -105,10 +105,14 @@ def delete_activity():
 @login_required
 @admin_required
 def feed_page():
-    posts = get_all_posts_control()
+    before_id = request.args.get("cursor", type=int)
+    posts, next_cursor = get_feed_page_control(before_id)
     delete_forms = {post.id: DeletePostForm(post_id=post.id) for post in posts}
     return render_template(
-        "admin/social_feed.html", posts=posts, delete_forms=delete_forms
+        "admin/social_feed.html",
+        posts=posts,
+        delete_forms=delete_forms,
+        next_cursor=next_cursor,
     )
 
 
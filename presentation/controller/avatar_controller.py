@@ -0,0 +1,18 @@
+from flask import Blueprint, abort, send_from_directory
+
+from domain.control.avatars import AVATAR_MAX_AGE, avatar_file
+
+avatar_bp = Blueprint("avatar", __name__, url_prefix="/avatars")
+
+
+@avatar_bp.route("/<filename>", methods=["GET"])
+def avatar(filename):
+    location = avatar_file(filename)
+    if location is None:
+        abort(404)
+    response = send_from_directory(
+        *location, mimetype="image/webp", max_age=AVATAR_MAX_AGE
+    )
+    # The URL is the hash of the file, so browsers never need to revalidate
+    response.headers["Cache-Control"] = f"public, max-age={AVATAR_MAX_AGE}, immutable"
+    return response
@@ -89,13 +89,11 @@ def join_activity():
         return redirect(url_for(BULLETIN_PAGE))
 
     user_id = int(current_user.get_id())
-    if not join_activity_control(activity_id, user_id):
-        flash("Failed to join the activity. You may have already joined.", "error")
+    success, message = join_activity_control(activity_id, user_id)
+    if success:
+        flash(message, "success")
     else:
-        flash(
-            "Successfully joined the activity! You may view it in your profile",
-            "success",
-        )
+        flash(message, "error")
     return redirect(url_for(BULLETIN_PAGE))
 
 
@@ -14,6 +14,7 @@ from flask_login import current_user, login_required
 from flask_login import login_user as flask_login_user
 
 from data_source.user_queries import get_user_by_email, update_user_session_token
+from domain.control.auth_management import PasswordHasherBusy
 from domain.control.login_management import (
     login_user,
     logout_user,
@@ -44,7 +45,13 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         # use form data
-        user = login_user(form.email.data, form.password.data)
+        try:
+            user = login_user(form.email.data, form.password.data)
+        except PasswordHasherBusy:
+            form.email.errors.append(
+                "The server is busy. Please try again in a moment."
+            )
+            return render_template("login/login.html", form=form)
         if user:
             # Check if email is verified
             if not getattr(user, "email_verified", False):
@@ -1,6 +1,6 @@
-import bcrypt
 from flask import Blueprint, current_app, flash, redirect, render_template, url_for
 
+from domain.control.auth_management import PasswordHasherBusy, hash_password
 from domain.control.register import (
     register_user,
     send_verification_email,
@@ -18,9 +18,11 @@ def register():
     form = RegisterForm()
     if form.validate_on_submit():
         # Prepare user data
-        hashed = bcrypt.hashpw(
-            form.password.data.encode("utf-8"), bcrypt.gensalt()
-        ).decode("utf-8")
+        try:
+            hashed = hash_password(form.password.data)
+        except PasswordHasherBusy:
+            flash("The server is busy. Please try again in a moment.", "warning")
+            return render_template("register/register.html", form=form)
 
         user_data = {
             "name": form.name.data,
@@ -3,6 +3,7 @@ import functools
 
 from flask import (
     Blueprint,
+    current_app,
     flash,
     jsonify,
     redirect,
@@ -13,18 +14,19 @@ from flask import (
 )
 from flask_login import current_user, login_required
 
-from data_source.social_feed_queries import get_like_count
-from data_source.user_queries import get_user_by_id, search_users_by_name
+from data_source.user_queries import get_user_by_id
 from domain.control.social_feed_management import (
     create_comment_control,
     create_post_control,
-    get_all_posts_control,
     get_featured_posts_control,
+    get_feed_page_control,
     get_post_by_id_control,
-    get_posts_by_user_id_control,
+    get_posts_display_data,
+    get_user_posts_page_control,
     like_post_control,
     unlike_post_control,
 )
+from domain.control.user_search import search_users_control
 from domain.entity.forms import CommentForm, PostForm
 
 SOCIAL_FEED_TEMPLATE = "socialfeed/social_feed.html"
@@ -47,7 +49,7 @@ def user_required(func):
 @login_required
 @user_required
 def feed():
-    posts = get_all_posts_control()
+    posts, next_cursor = get_feed_page_control()
     featured_posts = get_featured_posts_control()
     post_form = PostForm()
     comment_form = CommentForm()
@@ -55,6 +57,7 @@ def feed():
     return render_template(
         SOCIAL_FEED_TEMPLATE,
         posts=posts,
+        next_cursor=next_cursor,
         featured_posts=featured_posts,
         post_form=post_form,
         comment_form=comment_form,
@@ -62,6 +65,23 @@ def feed():
     )
 
 
+@social_feed_bp.route("/page", methods=["GET"])
+@login_required
+@user_required
+def feed_page():
+    """JSON page of posts older than ?cursor=, used for infinite scroll."""
+    before_id = request.args.get("cursor", type=int)
+    user_id = request.args.get("user_id", type=int)
+    if user_id is not None:
+        _, next_cursor = get_user_posts_page_control(user_id, before_id)
+    else:
+        _, next_cursor = get_feed_page_control(before_id)
+    return jsonify(
+        posts=get_posts_display_data(),
+        next_cursor=next_cursor,
+    )
+
+
 @social_feed_bp.route("/create", methods=["POST"])
 @login_required
 @user_required
@@ -104,8 +124,7 @@ def create_comment(post_id):
 def like_post(post_id):
     try:
         user_id = int(current_user.get_id())
-        success = like_post_control(post_id, user_id)
-        like_count = get_like_count(post_id)
+        success, like_count = like_post_control(post_id, user_id)
         return jsonify(success=success, like_count=like_count)
     except Exception as e:
         current_app.logger.error(f"[LIKE ERROR] {e}")
@@ -118,8 +137,7 @@ def like_post(post_id):
 def unlike_post(post_id):
     try:
         user_id = int(current_user.get_id())
-        success = unlike_post_control(post_id, user_id)
-        like_count = get_like_count(post_id)
+        success, like_count = unlike_post_control(post_id, user_id)
         return jsonify(success=success, like_count=like_count)
     except Exception as e:
         current_app.logger.error(f"[UNLIKE ERROR] {e}")
@@ -130,16 +148,14 @@ def unlike_post(post_id):
 @login_required
 @user_required
 def view_post(post_id):
-    posts = get_all_posts_control()
     featured_posts = get_featured_posts_control()
     target = get_post_by_id_control(post_id)
     if not target:
         return redirect(url_for(SOCIAL_FEED_FEED))
 
-    filtered = [p for p in posts if p.id == post_id]
     return render_template(
         SOCIAL_FEED_TEMPLATE,
-        posts=filtered,
+        posts=[target],
         featured_posts=featured_posts,
         filtered_post_id=post_id,
         post_form=PostForm(),
@@ -154,32 +170,20 @@ def search_users():
     term = request.args.get("q", "")
     if len(term) < 2:
         return jsonify([])
-    users = search_users_by_name(term, limit=10)
-    return jsonify(
-        [
-            (
-                lambda d: {
-                    "id": d.get("id"),
-                    "name": d.get("name"),
-                    "email": d.get("email"),
-                    "profile_picture": d.get("profile_picture", ""),
-                }
-            )(dict(u._mapping) if hasattr(u, "_mapping") else dict(u))
-            for u in users
-        ]
-    )
+    return jsonify(search_users_control(term, limit=10))
 
 
 @social_feed_bp.route("/user/<int:user_id>", methods=["GET"])
 @login_required
 @user_required
 def view_user_posts(user_id):
-    posts = get_posts_by_user_id_control(user_id)
+    posts, next_cursor = get_user_posts_page_control(user_id)
     featured = get_featured_posts_control()
     user_data = get_user_by_id(user_id) or {}
     return render_template(
         SOCIAL_FEED_TEMPLATE,
         posts=posts,
+        next_cursor=next_cursor,
         featured_posts=featured,
         filtered_user_id=user_id,
         filtered_user_name=user_data.get("name"),
@@ -0,0 +1,144 @@
+"""
+Concurrency stress test for joining activities.
+
+Needs a MySQL database created from init.sql, so it only runs when
+RUN_DB_TESTS=1 and the usual DB_HOST / DB_USER / DB_PASSWORD / DB_NAME
+variables point at a disposable test database:
+
+    RUN_DB_TESTS=1 python -m pytest -q tests/integration
+"""
+
+import os
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from data_source import db_connection
+from data_source.bulletin_queries import (
+    ACTIVITY_FULL,
+    ALREADY_JOINED,
+    JOINED,
+    add_participant,
+    remove_participant,
+)
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_DB_TESTS"), reason="set RUN_DB_TESTS=1 to run against MySQL"
+)
+
+USER_COUNT = 300
+THREADS = 64
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "32")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "60")
+    monkeypatch.setattr(db_connection, "_pool", None)
+    yield
+    db_connection.get_pool().close_all()
+
+
+@pytest.fixture
+def make_activity(pool):
+    """Create USER_COUNT users and a factory for activities hosted by an extra user."""
+    conn = db_connection._connect()
+    cursor = conn.cursor()
+    tag = uuid.uuid4().hex[:12]
+    cursor.executemany(
+        "INSERT INTO user (name, password, email, role) VALUES (%s, 'x', %s, 'user')",
+        [
+            (f"stress{i}", f"stress-{tag}-{i}@example.com")
+            for i in range(USER_COUNT + 1)
+        ],
+    )
+    conn.commit()
+    cursor.execute(
+        "SELECT id FROM user WHERE email LIKE %s ORDER BY id", (f"stress-{tag}-%",)
+    )
+    host_id, *user_ids = [row[0] for row in cursor.fetchall()]
+
+    def create(max_pax):
+        cursor.execute(
+            """
+            INSERT INTO sports_activity
+                (user_id, activity_name, activity_type, skills_req, date, location, max_pax)
+            VALUES (%s, 'stress', 'Sports', 'none', %s, 'court', %s)
+            """,
+            (host_id, datetime.now() + timedelta(days=1), max_pax),
+        )
+        conn.commit()
+        return cursor.lastrowid, user_ids
+
+    yield create
+
+    # Deleting the users cascades to their activities and participant rows
+    cursor.execute("DELETE FROM user WHERE email LIKE %s", (f"stress-{tag}-%",))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def stored_counts(activity_id):
+    conn = db_connection._connect()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT participant_count FROM sports_activity WHERE id = %s", (activity_id,)
+    )
+    participant_count = cursor.fetchone()[0]
+    cursor.execute(
+        "SELECT COUNT(*) FROM activity_participant WHERE activity_id = %s",
+        (activity_id,),
+    )
+    rows = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return participant_count, rows
+
+
+def join_all(activity_id, user_ids):
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        return Counter(
+            executor.map(lambda uid: add_participant(activity_id, uid), user_ids)
+        )
+
+
+def test_parallel_joins_never_exceed_capacity(make_activity):
+    activity_id, user_ids = make_activity(max_pax=100)
+
+    outcomes = join_all(activity_id, user_ids)
+
+    assert outcomes == {JOINED: 100, ACTIVITY_FULL: USER_COUNT - 100}
+    assert stored_counts(activity_id) == (100, 100)
+
+
+def test_parallel_joins_are_never_lost(make_activity):
+    activity_id, user_ids = make_activity(max_pax=USER_COUNT)
+
+    # Every user joins twice at the same time; exactly one of each pair wins
+    outcomes = join_all(activity_id, [uid for uid in user_ids for _ in range(2)])
+
+    assert outcomes == {JOINED: USER_COUNT, ALREADY_JOINED: USER_COUNT}
+    assert stored_counts(activity_id) == (USER_COUNT, USER_COUNT)
+
+
+def test_parallel_join_and_leave_keep_count_in_step(make_activity):
+    activity_id, user_ids = make_activity(max_pax=USER_COUNT)
+    join_all(activity_id, user_ids[: USER_COUNT // 2])
+
+    leavers = user_ids[: USER_COUNT // 2]
+    joiners = user_ids[USER_COUNT // 2 :]
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        # Both batches are submitted before either is awaited, so they interleave
+        leaving = executor.map(
+            lambda uid: remove_participant(activity_id, uid), leavers
+        )
+        joining = executor.map(lambda uid: add_participant(activity_id, uid), joiners)
+        left, joined = list(leaving), list(joining)
+
+    assert all(left)
+    assert joined.count(JOINED) == len(joiners)
+    assert stored_counts(activity_id) == (len(joiners), len(joiners))
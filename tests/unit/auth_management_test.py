@@ -0,0 +1,89 @@
+import threading
+
+import bcrypt
+import pytest
+
+from domain.control.auth_management import (
+    PasswordHasher,
+    PasswordHasherBusy,
+    get_rounds,
+)
+
+
+def test_hash_and_verify_on_pool():
+    hasher = PasswordHasher(rounds=4, workers=1, max_queue=1)
+    hashed = hasher.hash("correct horse")
+
+    assert get_rounds(hashed) == 4
+    assert hasher.verify("correct horse", hashed)
+    assert not hasher.verify("battery staple", hashed)
+
+
+def test_needs_rehash_when_cost_changes():
+    old = bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=4)).decode("utf-8")
+
+    assert not PasswordHasher(rounds=4).needs_rehash(old)
+    assert PasswordHasher(rounds=5).needs_rehash(old)
+    assert PasswordHasher(rounds=4).needs_rehash("not a bcrypt hash")
+
+
+def test_full_queue_is_refused():
+    hasher = PasswordHasher(rounds=4, workers=1, max_queue=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait(5)
+        return True
+
+    callers = [
+        threading.Thread(target=hasher._run, args=(slow_hash,)) for _ in range(2)
+    ]
+    for caller in callers:
+        caller.start()
+    started.wait(5)
+    # One running, one queued: a third caller must not wait behind them
+    with pytest.raises(PasswordHasherBusy):
+        hasher._run(slow_hash)
+    release.set()
+    for caller in callers:
+        caller.join(5)
+
+    assert hasher.rejected == 1
+    assert hasher.verify("pw", hasher.hash("pw"))
+
+
+def test_slow_hash_is_reported_as_busy():
+    hasher = PasswordHasher(rounds=4, workers=1, max_queue=1, timeout=0.05)
+    started = threading.Event()
+    release = threading.Event()
+    outcomes = []
+
+    def blocking_hash():
+        started.set()
+        release.wait(5)
+        return True
+
+    def caller():
+        try:
+            outcomes.append(hasher._run(blocking_hash))
+        except PasswordHasherBusy as e:
+            outcomes.append(e)
+
+    running = threading.Thread(target=caller)
+    running.start()
+    started.wait(5)
+    # Queued behind the blocked worker, so it is cancelled before it starts
+    with pytest.raises(PasswordHasherBusy):
+        hasher._run(blocking_hash)
+    running.join(5)
+    release.set()
+    hasher._pool.shutdown(wait=True)
+
+    assert isinstance(outcomes[0], PasswordHasherBusy)
+    assert hasher.timed_out == 2
+    # Both slots came back: the cancelled job's at once, the slow one's when
+    # bcrypt finally returned
+    assert hasher._slots.acquire(blocking=False)
+    assert hasher._slots.acquire(blocking=False)
@@ -0,0 +1,49 @@
+import io
+
+from flask import Flask
+from PIL import Image
+
+from domain.control import blob_store
+from domain.control.avatars import AVATAR_SIZE, avatar_file, make_avatar
+from presentation.controller.avatar_controller import avatar_bp
+
+DIGEST = "ab" * 32
+
+
+def test_avatar_is_a_small_square_without_metadata():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise
+    upload = io.BytesIO()
+    Image.new("RGB", (3000, 1000), "blue").save(upload, "JPEG", exif=exif)
+    upload.seek(0)
+
+    avatar = make_avatar(upload)
+
+    with Image.open(io.BytesIO(avatar)) as image:
+        assert image.format == "WEBP"
+        assert image.size == (AVATAR_SIZE, AVATAR_SIZE)
+        assert not image.getexif()
+
+
+def test_avatar_file_only_accepts_avatar_names():
+    directory, filename = avatar_file(f"{DIGEST}.webp")
+    assert directory.endswith("blobs/ab") and filename == f"{DIGEST}.webp"
+    assert avatar_file("../../app.py") is None
+    assert avatar_file(f"{DIGEST}.png") is None
+
+
+def test_avatars_are_served_with_immutable_caching(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "STATIC_FOLDER", str(tmp_path))
+    blob = tmp_path / "images" / "blobs" / "ab" / f"{DIGEST}.webp"
+    blob.parent.mkdir(parents=True)
+    blob.write_bytes(b"webp")
+    app = Flask(__name__)
+    app.register_blueprint(avatar_bp)
+    client = app.test_client()
+
+    response = client.get(f"/avatars/{DIGEST}.webp")
+
+    assert response.status_code == 200
+    assert response.mimetype == "image/webp"
+    assert "immutable" in response.headers["Cache-Control"]
+    assert client.get(f"/avatars/{'cd' * 32}.webp").status_code == 404
@@ -0,0 +1,29 @@
+import pytest
+
+from data_source import blob_queries
+from data_source.blob_queries import acquire_blob, release_blob
+from tests.unit.fakes import FakeConnection
+
+
+class FailingConnection(FakeConnection):
+    def run(self, cursor, query, params):
+        raise RuntimeError("Deadlock found when trying to get lock")
+
+
+@pytest.mark.parametrize(
+    "call, failed",
+    [(lambda: acquire_blob("ab", ".png"), False), (lambda: release_blob("ab"), None)],
+)
+def test_failed_statement_is_reported_and_cleaned_up(monkeypatch, call, failed):
+    conn = FailingConnection()
+    monkeypatch.setattr(blob_queries, "get_connection", lambda: conn)
+
+    assert call() is failed
+    assert conn.cursors[0].closed and conn.closed
+
+
+def test_no_connection(monkeypatch):
+    monkeypatch.setattr(blob_queries, "get_connection", lambda: None)
+
+    assert acquire_blob("ab", ".png") is False
+    assert release_blob("ab") is None
@@ -0,0 +1,119 @@
+import os
+
+import pytest
+
+from domain.control import blob_store
+from domain.control.blob_store import (
+    BLOB_URL_PATTERN,
+    release_images,
+    static_path,
+    store_blob,
+)
+
+
+@pytest.fixture
+def refs(tmp_path, monkeypatch):
+    """In-memory image_blob table, with files written under tmp_path."""
+    counts = {}
+
+    def acquire_blob(digest, ext):
+        counts[digest] = counts.get(digest, 0) + 1
+        return True
+
+    def release_blob(digest):
+        if digest not in counts:
+            return None
+        counts[digest] -= 1
+        if counts[digest] == 0:
+            del counts[digest]
+            return 0
+        return counts[digest]
+
+    monkeypatch.setattr(blob_store, "STATIC_FOLDER", str(tmp_path))
+    monkeypatch.setattr(blob_store, "acquire_blob", acquire_blob)
+    monkeypatch.setattr(blob_store, "release_blob", release_blob)
+    return counts
+
+
+def test_same_bytes_are_stored_once(refs):
+    first = store_blob(b"picture", ".png")
+    second = store_blob(b"picture", ".png")
+
+    assert first == second
+    assert BLOB_URL_PATTERN.match(first)
+    assert list(refs.values()) == [2]
+    with open(static_path(first), "rb") as f:
+        assert f.read() == b"picture"
+    leftovers = os.listdir(os.path.dirname(static_path(first)))
+    assert not [name for name in leftovers if name.endswith(".tmp")]
+
+
+def test_nothing_is_written_if_the_reference_is_not_recorded(refs, monkeypatch):
+    monkeypatch.setattr(blob_store, "acquire_blob", lambda digest, ext: False)
+
+    assert store_blob(b"picture", ".png") is None
+    assert not os.path.exists(os.path.join(blob_store.STATIC_FOLDER, "images"))
+
+
+def test_file_is_removed_with_its_last_reference(refs):
+    url = store_blob(b"picture", ".png")
+    store_blob(b"picture", ".png")
+
+    release_images(url)
+    assert os.path.exists(static_path(url))
+
+    release_images(url)
+    assert not os.path.exists(static_path(url))
+    assert refs == {}
+
+
+def test_variants_are_released_with_the_image(refs):
+    original = store_blob(b"original", ".jpg")
+    variants = {"thumb": {"url": store_blob(b"thumb", ".webp")}}
+
+    release_images(original, variants)
+
+    assert refs == {}
+
+
+def test_legacy_images_are_deleted_directly(refs, tmp_path):
+    legacy = tmp_path / "images" / "social" / "abc.jpg"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_bytes(b"old")
+
+    release_images("/static/images/social/abc.jpg")
+
+    assert not legacy.exists()
+
+
+def test_legacy_images_wait_for_the_commit(refs, tmp_path, monkeypatch):
+    legacy = tmp_path / "images" / "social" / "abc.jpg"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_bytes(b"old")
+    pending = []
+    monkeypatch.setattr(blob_store, "call_after_commit", pending.append)
+
+    release_images("/static/images/social/abc.jpg")
+    assert legacy.exists(), "The delete may still roll back"
+
+    pending.pop()()
+    assert not legacy.exists()
+
+
+def test_static_path_only_maps_uploaded_images():
+    assert static_path("/static/images/social/a.webp").endswith(
+        os.path.join("presentation", "static", "images", "social", "a.webp")
+    )
+    assert static_path("/static/images/../../app.py") is None
+    assert static_path("/static/css/style.css") is None
+    assert static_path(None) is None
+
+
+def test_avatar_urls_release_their_blob(refs):
+    url = store_blob(b"avatar", ".webp")
+    digest = BLOB_URL_PATTERN.match(url).group("digest")
+
+    release_images(f"/avatars/{digest}.webp")
+
+    assert refs == {}
+    assert not os.path.exists(static_path(url))
@@ -0,0 +1,27 @@
+from flask import Flask
+
+from domain.control.bulletin_management import create_entity_from_row
+
+
+def make_row(activity_id, max_pax, participant_count):
+    return {
+        "id": activity_id,
+        "user_id": 1,
+        "activity_name": f"activity {activity_id}",
+        "activity_type": "Sports",
+        "skills_req": "none",
+        "date": "2099-01-01 10:00:00",
+        "location": "court",
+        "max_pax": max_pax,
+        "participant_count": participant_count,
+    }
+
+
+def test_capacity_comes_from_participant_count():
+    rows = [make_row(1, 10, 4), make_row(3, 5, 0)]
+    with Flask(__name__).app_context():
+        activities = create_entity_from_row(rows)
+
+    assert [a.get_id() for a in activities] == [1, 3], "Query order is kept"
+    assert activities[0].get_slots_left() == 6
+    assert activities[1].get_slots_left() == 5
@@ -0,0 +1,81 @@
+from data_source import bulletin_queries
+from data_source.bulletin_queries import (
+    ACTIVITY_FULL,
+    ALREADY_JOINED,
+    JOINED,
+    add_participant,
+    build_fulltext_query,
+    get_bulletin_by_types,
+    search_activities,
+)
+from tests.unit.fakes import FakeConnection
+
+
+class RowcountConnection(FakeConnection):
+    """Answers each statement with the next of the given rowcounts."""
+
+    def __init__(self, *rowcounts):
+        super().__init__()
+        self.rowcounts = list(rowcounts)
+
+    def run(self, cursor, query, params):
+        cursor.rowcount = self.rowcounts.pop(0) if self.rowcounts else 0
+
+
+def join_with(monkeypatch, conn):
+    monkeypatch.setattr(bulletin_queries, "get_connection", lambda: conn)
+    return add_participant(1, 2)
+
+
+def test_join_claims_slot_then_inserts(monkeypatch):
+    conn = RowcountConnection(1, 1)
+    assert join_with(monkeypatch, conn) == JOINED
+    assert len(conn.executed) == 2
+    assert "participant_count < max_pax" in conn.queries[0]
+    assert conn.commits == 1
+
+
+def test_full_activity_writes_nothing(monkeypatch):
+    conn = RowcountConnection(0)
+    assert join_with(monkeypatch, conn) == ACTIVITY_FULL
+    assert len(conn.executed) == 1
+    assert conn.commits == 0
+
+
+def test_duplicate_join_hands_slot_back_without_rollback(monkeypatch):
+    conn = RowcountConnection(1, 0, 1)
+    assert join_with(monkeypatch, conn) == ALREADY_JOINED
+    assert "participant_count - 1" in conn.queries[2]
+    # A rollback would discard the rest of the request's unit of work
+    assert conn.rollbacks == 0
+
+
+def test_type_filter_leaves_full_activities_to_sql(monkeypatch):
+    conn = RowcountConnection()
+    monkeypatch.setattr(bulletin_queries, "get_connection", lambda: conn)
+
+    assert get_bulletin_by_types([]) == []
+    assert conn.executed == [], "No query for an empty type filter"
+
+    get_bulletin_by_types(["Sports"])
+    assert "participant_count < max_pax" in conn.queries[0]
+    assert "SELECT *" not in conn.queries[0]
+
+
+def test_fulltext_query_quotes_words_and_strips_operators():
+    assert build_fulltext_query("Futsal  court") == '"Futsal" "court"'
+    assert build_fulltext_query('+run -"fast*" a') == '"run" "fast"'
+    assert build_fulltext_query("羽毛球") == '"羽毛球"'
+    assert build_fulltext_query("a") == ""
+
+
+def test_search_uses_fulltext_index_and_falls_back_for_short_terms(monkeypatch):
+    conn = RowcountConnection()
+    monkeypatch.setattr(bulletin_queries, "get_connection", lambda: conn)
+
+    search_activities("basketball")
+    assert "MATCH(activity_name, location, skills_req)" in conn.queries[0]
+    assert "ORDER BY relevance DESC" in conn.queries[0]
+
+    search_activities("b")
+    assert "LIKE" in conn.queries[1] and "MATCH" not in conn.queries[1]
@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+from data_source.db_pool import ConnectionPool, PoolTimeoutError
+from tests.unit.fakes import FakeConnection
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def connect():
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    return ConnectionPool(connect, **kwargs), created
+
+
+def test_connection_is_reused_after_close():
+    pool, created = make_pool(size=2)
+    conn = pool.acquire()
+    conn.close()
+    again = pool.acquire()
+    again.close()
+
+    assert len(created) == 1, "Pool opened a second connection instead of reusing"
+    assert created[0].rollbacks == 2, "Connection was not reset on release"
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_pool_is_bounded_and_times_out():
+    pool, _ = make_pool(size=1, timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    held.close()
+
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["waits"] == 1
+    assert stats["open"] == 1
+
+
+def test_waiter_gets_released_connection():
+    pool, created = make_pool(size=1, timeout=2)
+    held = pool.acquire()
+    result = {}
+
+    def borrower():
+        conn = pool.acquire()
+        result["raw"] = conn._raw
+        conn.close()
+
+    t = threading.Thread(target=borrower)
+    t.start()
+    held.close()
+    t.join(timeout=2)
+
+    assert result["raw"] is created[0]
+    assert len(created) == 1
+
+
+def test_unhealthy_and_expired_connections_are_replaced():
+    pool, created = make_pool(size=2, max_lifetime=3600)
+    conn = pool.acquire()
+    conn.close()
+    created[0].healthy = False
+    pool.acquire().close()
+    assert len(created) == 2, "Dead connection was handed out"
+    assert created[0].closed
+
+    pool.max_lifetime = -1
+    pool.acquire().close()
+    assert len(created) == 3, "Expired connection was reused"
+
+
+def test_idle_connections_are_evicted():
+    pool, created = make_pool(size=2, max_idle=-1)
+    pool.acquire().close()
+    pool.acquire().close()
+    assert created[0].closed
+    assert pool.stats()["discarded"] >= 1
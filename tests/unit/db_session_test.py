@@ -0,0 +1,123 @@
+import pytest
+from flask import Flask, flash, get_flashed_messages
+
+from data_source import db_session
+from data_source.db_session import TransactionRolledBack, get_request_connection
+from tests.unit.fakes import FakeConnection
+
+
+class LostConnection(FakeConnection):
+    def commit(self):
+        raise RuntimeError("Lost connection to MySQL server during query")
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = "test"
+    db_session.init_app(app)
+    return app
+
+
+def test_one_connection_per_request_committed_once():
+    app = make_app()
+    opened = []
+
+    def open_connection():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    @app.route("/write")
+    def write():
+        first = get_request_connection(open_connection)
+        first.commit()
+        first.close()
+        second = get_request_connection(open_connection)
+        second.commit()
+        second.close()
+        assert first is second
+        assert opened[0].commits == 0, "Commit must wait for the view to return"
+        return "ok"
+
+    assert app.test_client().get("/write").status_code == 200
+    assert len(opened) == 1
+    assert opened[0].commits == 1
+    assert opened[0].closed
+
+
+def test_failed_request_rolls_back():
+    app = make_app()
+    conn = FakeConnection()
+
+    with app.test_request_context():
+        get_request_connection(lambda: conn).commit()
+        db_session.mark_rollback()
+
+    assert conn.commits == 0
+    assert conn.rollbacks == 1
+    assert conn.closed
+
+
+def test_failed_commit_is_a_server_error():
+    app = make_app()
+    conn = LostConnection()
+    calls = []
+
+    @app.route("/write")
+    def write():
+        get_request_connection(lambda: conn).commit()
+        db_session.call_after_commit(lambda: calls.append("committed"))
+        flash("Post updated successfully!")
+        return "Post updated successfully!"
+
+    @app.route("/messages")
+    def messages():
+        return {"messages": get_flashed_messages()}
+
+    client = app.test_client()
+    response = client.get("/write")
+
+    assert response.status_code == 500
+    assert b"updated" not in response.data
+    assert client.get("/messages").json == {"messages": []}
+    assert calls == []
+    assert conn.closed
+
+
+def test_rollback_fails_the_request_instead_of_dropping_earlier_writes():
+    app = make_app()
+    conn = FakeConnection()
+
+    with app.test_request_context():
+        session = get_request_connection(lambda: conn)
+        session.commit()  # an earlier query function reported success
+        with pytest.raises(TransactionRolledBack):
+            session.rollback()
+        session.commit()
+
+    assert conn.commits == 0
+    assert conn.rollbacks == 2
+
+
+def test_after_commit_callbacks_wait_for_commit():
+    app = make_app()
+    calls = []
+
+    @app.route("/write")
+    def write():
+        get_request_connection(FakeConnection).commit()
+        db_session.call_after_commit(lambda: calls.append("committed"))
+        assert calls == [], "Callback must wait for the COMMIT"
+        return "ok"
+
+    app.test_client().get("/write")
+    assert calls == ["committed"]
+
+    with app.test_request_context():
+        get_request_connection(FakeConnection).commit()
+        db_session.call_after_commit(lambda: calls.append("rolled back"))
+        db_session.mark_rollback()
+    assert calls == ["committed"]
+
+    db_session.call_after_commit(lambda: calls.append("no request"))
+    assert calls[-1] == "no request"
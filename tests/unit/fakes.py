@@ -0,0 +1,130 @@
+"""In-memory stand-ins for MySQL, Redis and the clock, shared by the unit tests"""
+
+
+class FakeClock:
+    """Callable clock for code that takes clock=...; move it with `now`."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCursor:
+    def __init__(self, conn, dictionary=False):
+        self.conn = conn
+        self.dictionary = dictionary
+        self.rows = []
+        self.rowcount = 0
+        self.lastrowid = None
+        self.closed = False
+
+    def execute(self, query, params=()):
+        query = " ".join(query.split())
+        self.conn.executed.append((query, params))
+        self.conn.run(self, query, params)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    """
+    A pooled MySQL connection that records what is run on it.
+
+    Every statement is kept in `executed` as (query, params), with the query's
+    whitespace collapsed. Tests that need answers subclass this and override
+    run(), which fills in the cursor's rows, rowcount and lastrowid.
+    """
+
+    def __init__(self):
+        self.executed = []
+        self.cursors = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+        self.healthy = True
+
+    @property
+    def queries(self):
+        return [query for query, _ in self.executed]
+
+    def run(self, cursor, query, params):
+        pass
+
+    def cursor(self, dictionary=False):
+        self.cursors.append(FakeCursor(self, dictionary))
+        return self.cursors[-1]
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+    def is_connected(self):
+        return self.healthy and not self.closed
+
+
+class FakePipeline:
+    """Just the sorted-set commands RedisFailedLoginCounter pipelines."""
+
+    def __init__(self, data):
+        self.data = data
+        self.results = []
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+        self.results.append(len(mapping))
+
+    def zremrangebyscore(self, key, low, high):
+        members = self.data.get(key, {})
+        expired = [m for m, score in members.items() if score <= high]
+        for member in expired:
+            del members[member]
+        self.results.append(len(expired))
+
+    def zrange(self, key, start, end, withscores=False):
+        members = sorted(self.data.get(key, {}).items(), key=lambda item: item[1])
+        self.results.append(members)
+
+    def expire(self, key, seconds):
+        self.results.append(True)
+
+    def execute(self):
+        return self.results
+
+
+class FakeRedis:
+    """Enough of the Redis protocol for sessions, lockouts and invalidations."""
+
+    def __init__(self):
+        self.data = {}
+        self.sets = 0
+        self.published = []
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, name, value, ex=None):
+        self.sets += 1
+        self.data[name] = value
+
+    def delete(self, key):
+        return 1 if self.data.pop(key, None) else 0
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def pipeline(self):
+        return FakePipeline(self.data)
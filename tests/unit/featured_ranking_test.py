@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+
+from domain.control.featured_ranking import FeaturedRanking, hot_score
+from tests.unit.fakes import FakeClock
+
+
+def make_rows():
+    return [
+        {"id": 1, "like_count": 9, "created_at": None},
+        {"id": 2, "like_count": 3, "created_at": None},
+        {"id": 3, "like_count": 12, "created_at": None},
+    ]
+
+
+def test_ranks_by_numeric_like_count():
+    # "9" > "12" as strings; the ranking must compare numbers
+    ranking = FeaturedRanking(lambda limit, recent: make_rows(), k=2)
+    assert [r["id"] for r in ranking.top()] == [3, 1]
+
+
+def test_like_changes_update_cached_ranking_without_reload():
+    loads = []
+
+    def loader(limit, recent):
+        loads.append(limit)
+        return make_rows()
+
+    ranking = FeaturedRanking(loader, k=2, clock=FakeClock(1_000_000.0))
+    ranking.top()
+    ranking.on_like_changed(2, 50)
+    assert [r["id"] for r in ranking.top()] == [2, 3]
+    assert len(loads) == 1
+
+
+def test_ttl_and_removal_trigger_reload():
+    clock = FakeClock(1_000_000.0)
+    loads = []
+
+    def loader(limit, recent):
+        loads.append(limit)
+        return make_rows()
+
+    ranking = FeaturedRanking(loader, ttl=10, clock=clock)
+    ranking.top()
+    clock.now += 11
+    ranking.top()
+    ranking.on_post_removed(1)
+    ranking.top()
+    assert len(loads) == 3
+
+
+def test_gravity_prefers_recent_posts():
+    gmt8 = timezone(timedelta(hours=8))
+    now = datetime(2025, 1, 2, 12, 0, tzinfo=gmt8)
+    old = datetime(2025, 1, 1, 12, 0, tzinfo=gmt8)
+    ts = now.timestamp()
+    assert hot_score(10, old, ts, 0) == 10
+    assert hot_score(5, now, ts, 1.8) > hot_score(10, old, ts, 1.8)
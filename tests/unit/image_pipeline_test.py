@@ -0,0 +1,103 @@
+import logging
+
+import pytest
+from PIL import Image
+
+from domain.control import image_pipeline
+from domain.control.image_pipeline import ImagePipeline, build_variants, srcset
+
+
+def make_photo(path, size=(2400, 1200)):
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"  # Make
+    exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise
+    Image.new("RGB", size, "red").save(path, "JPEG", exif=exif, comment=b"secret")
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """Capture blobs instead of writing them; returns url -> bytes."""
+    blobs = {}
+
+    def store_blob(data, ext):
+        url = f"/blob/{len(blobs)}{ext}"
+        blobs[url] = data
+        return url
+
+    monkeypatch.setattr(image_pipeline, "store_blob", store_blob)
+    return blobs
+
+
+def test_variants_are_resized_rotated_and_stripped(tmp_path, stored):
+    source = tmp_path / "upload.jpg"
+    make_photo(source)
+
+    variants = build_variants(str(source))
+
+    assert list(variants) == ["thumb", "feed", "full"]
+    # Orientation 6 turns the 2400x1200 landscape into a portrait
+    assert (variants["full"]["width"], variants["full"]["height"]) == (800, 1600)
+    assert variants["thumb"]["height"] == 320
+    full_path = tmp_path / "full.webp"
+    full_path.write_bytes(stored[variants["full"]["url"]])
+    with Image.open(full_path) as full:
+        assert full.format == "WEBP"
+        assert not full.getexif()
+        assert "comment" not in full.info
+
+
+def test_small_images_are_not_upscaled_and_share_one_blob(tmp_path, stored):
+    source = tmp_path / "small.png"
+    Image.new("RGBA", (100, 50)).save(source)
+
+    variants = build_variants(str(source))
+
+    assert {(v["width"], v["height"]) for v in variants.values()} == {(100, 50)}
+    assert len(stored) == 1
+    assert len({v["url"] for v in variants.values()}) == 1
+
+
+def test_srcset_lists_variants_by_width():
+    variants = {
+        "full": {"url": "/f.webp", "width": 1600, "height": 900},
+        "thumb": {"url": "/t.webp", "width": 320, "height": 180},
+    }
+
+    assert srcset(variants) == "/t.webp 320w, /f.webp 1600w"
+
+
+def pipeline_for(tmp_path, monkeypatch, set_post_image):
+    source = tmp_path / "orig.jpg"
+    make_photo(source, size=(400, 300))
+    released = []
+    monkeypatch.setattr(image_pipeline, "static_path", lambda url: str(source))
+    monkeypatch.setattr(image_pipeline, "set_post_image", set_post_image)
+    monkeypatch.setattr(
+        image_pipeline,
+        "release_images",
+        lambda url, variants=None: released.append((url, variants)),
+    )
+    return ImagePipeline(logging.getLogger()), released
+
+
+def test_process_swaps_post_to_variants_and_releases_original(
+    tmp_path, monkeypatch, stored
+):
+    updates = []
+    pipeline, released = pipeline_for(
+        tmp_path, monkeypatch, lambda *args: updates.append(args) or True
+    )
+
+    variants = pipeline.process(7, "/static/images/blobs/ab/orig.jpg")
+
+    post_id, expected, image_path, stored_variants = updates[0]
+    assert (post_id, expected) == (7, "/static/images/blobs/ab/orig.jpg")
+    assert image_path == variants["full"]["url"] and stored_variants == variants
+    assert released == [("/static/images/blobs/ab/orig.jpg", None)]
+
+
+def test_process_releases_variants_of_a_deleted_post(tmp_path, monkeypatch, stored):
+    pipeline, released = pipeline_for(tmp_path, monkeypatch, lambda *args: False)
+
+    assert pipeline.process(7, "/static/images/blobs/ab/orig.jpg") is None
+    assert released[0][0] is None and set(released[0][1]) == {"thumb", "feed", "full"}
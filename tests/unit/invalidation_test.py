@@ -0,0 +1,28 @@
+from data_source.invalidation import LocalInvalidationBus, RedisInvalidationBus
+from tests.unit.fakes import FakeRedis
+
+
+def test_local_bus_calls_subscribers_of_the_channel():
+    bus = LocalInvalidationBus()
+    seen = []
+    bus.subscribe("user", seen.append)
+    bus.publish("user", 7)
+    bus.publish("post", 8)
+    assert seen == [7]
+
+
+def test_redis_bus_broadcasts_and_applies_remote_messages():
+    client = FakeRedis()
+    bus = RedisInvalidationBus(client)
+    seen = []
+    # Register without starting the listener thread
+    LocalInvalidationBus.subscribe(bus, "user", seen.append)
+
+    bus.publish("user", 7)
+    assert client.published == [("invalidate:user", "7")]
+    assert seen == [7], "The publishing worker must not wait for the round trip"
+
+    bus.handle_message(
+        {"type": "pmessage", "channel": b"invalidate:user", "data": b"9"}
+    )
+    assert seen == [7, "9"]
@@ -0,0 +1,83 @@
+from data_source.login_attempts import (
+    LocalFailedLoginCounter,
+    RedisFailedLoginCounter,
+)
+from tests.unit.fakes import FakeClock, FakeRedis
+
+
+def test_local_counter_slides_window():
+    clock = FakeClock(1000.0)
+    counter = LocalFailedLoginCounter(window_seconds=600, clock=clock)
+
+    assert len(counter.record(1)) == 1
+    clock.now += 300
+    assert len(counter.record(1)) == 2
+    clock.now += 301
+    assert counter.record(1) == [1300.0, 1601.0]
+    assert len(counter.record(2)) == 1
+
+
+def test_local_counter_clear_reports_failures():
+    counter = LocalFailedLoginCounter(window_seconds=600, clock=FakeClock(1000.0))
+
+    assert not counter.clear(1), "A clean login has nothing to reset"
+    counter.record(1)
+    assert counter.clear(1)
+    assert len(counter.record(1)) == 1
+
+
+def test_local_counter_is_bounded():
+    counter = LocalFailedLoginCounter(
+        window_seconds=600, max_users=2, clock=FakeClock(1000.0)
+    )
+    for user_id in (1, 2, 3):
+        counter.record(user_id)
+
+    assert not counter.clear(1)
+    assert counter.clear(3)
+
+
+def test_redis_counter_slides_window():
+    clock = FakeClock(1000.0)
+    client = FakeRedis()
+    counter = RedisFailedLoginCounter(client, window_seconds=600, clock=clock)
+
+    counter.record(7)
+    clock.now += 300
+    assert counter.record(7) == [1000.0, 1300.0]
+    clock.now += 301
+    assert counter.record(7) == [1300.0, 1601.0]
+    assert counter.clear(7)
+    assert not counter.clear(7)
+
+
+def test_database_written_only_when_lockout_triggers(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    from domain.control import login_management
+    from domain.entity.user import User
+
+    counter = LocalFailedLoginCounter(window_seconds=600)
+    locks = []
+    unlocks = []
+    monkeypatch.setattr(login_management, "get_failed_login_counter", lambda: counter)
+    monkeypatch.setattr(
+        login_management, "lock_user_account", lambda *args: locks.append(args)
+    )
+    monkeypatch.setattr(
+        login_management, "update_user_lockout", lambda *args: unlocks.append(args)
+    )
+    user = User(id=5, name="ann", password="", email="ann@example.com")
+    now = datetime.now(timezone(timedelta(hours=8)))
+
+    login_management.clear_failed_attempts(user)
+    for _ in range(login_management.FAILED_ATTEMPT_LIMIT - 1):
+        login_management.record_failed_attempt(user, now)
+    assert locks == [] and unlocks == []
+
+    login_management.record_failed_attempt(user, now)
+    assert len(locks) == 1
+    user_id, locked_until, failed_at = locks[0]
+    assert user_id == 5
+    assert locked_until == (now + timedelta(minutes=15)).replace(tzinfo=None)
+    assert len(failed_at) == login_management.FAILED_ATTEMPT_LIMIT
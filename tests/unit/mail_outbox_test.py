@@ -0,0 +1,100 @@
+import logging
+from email import message_from_bytes
+
+from flask import Flask
+
+from data_source.mail_transport import FileTransport
+from domain.control import mail_outbox
+from domain.control.mail_outbox import MailOutboxWorker
+
+
+class FakeOutbox:
+    """In-memory mail_outbox standing in for the query functions."""
+
+    def __init__(self, mails):
+        self.pending = [dict(mail, attempts=0) for mail in mails]
+        self.sent = []
+        self.retries = []
+        self.dead = []
+
+    def claim(self, batch_size, lease_seconds):
+        batch, self.pending = self.pending[:batch_size], self.pending[batch_size:]
+        for mail in batch:
+            mail["attempts"] += 1
+        return batch
+
+    def install(self, monkeypatch):
+        monkeypatch.setattr(mail_outbox, "claim_due_mails", self.claim)
+        monkeypatch.setattr(mail_outbox, "mark_mails_sent", self.sent.extend)
+        monkeypatch.setattr(
+            mail_outbox,
+            "reschedule_mail",
+            lambda mail_id, delay, error: self.retries.append((mail_id, delay)),
+        )
+        monkeypatch.setattr(
+            mail_outbox,
+            "dead_letter_mail",
+            lambda mail_id, error: self.dead.append(mail_id),
+        )
+
+
+class FailingTransport:
+    def send(self, to_email, subject, html_body):
+        raise ConnectionError("mail API is down")
+
+
+def mail(mail_id):
+    return {
+        "id": mail_id,
+        "to_email": f"user{mail_id}@example.com",
+        "subject": "Verify Your Email",
+        "html_body": "<p>hi</p>",
+    }
+
+
+def test_drain_sends_in_batches_to_file_sink(monkeypatch, tmp_path):
+    outbox = FakeOutbox([mail(i) for i in range(1, 6)])
+    outbox.install(monkeypatch)
+    worker = MailOutboxWorker(
+        FileTransport(str(tmp_path)), logging.getLogger("test"), batch_size=2
+    )
+
+    assert worker.drain() == {"sent": 5, "retried": 0, "dead": 0}
+    assert outbox.sent == [1, 2, 3, 4, 5]
+    files = sorted(tmp_path.iterdir())
+    assert len(files) == 5
+    message = message_from_bytes(files[0].read_bytes())
+    assert message["Subject"] == "Verify Your Email"
+
+
+def test_failed_sends_back_off_then_dead_letter(monkeypatch):
+    outbox = FakeOutbox([mail(1)])
+    outbox.install(monkeypatch)
+    worker = MailOutboxWorker(
+        FailingTransport(),
+        logging.getLogger("test"),
+        max_attempts=3,
+        base_delay=30,
+        max_delay=100,
+    )
+
+    assert worker.drain() == {"sent": 0, "retried": 1, "dead": 0}
+    assert outbox.retries == [(1, 30)]
+    assert [worker.backoff(n) for n in (1, 2, 3, 4)] == [30, 60, 100, 100]
+
+    outbox.pending = [dict(mail(1), attempts=2)]
+    assert worker.drain() == {"sent": 0, "retried": 0, "dead": 1}
+    assert outbox.dead == [1]
+
+
+def test_queue_failure_reaches_the_app_log(monkeypatch, caplog):
+    def enqueue_mail(to_email, subject, html_body):
+        raise RuntimeError("mail_outbox is missing")
+
+    monkeypatch.setattr(mail_outbox, "enqueue_mail", enqueue_mail)
+    app = Flask(__name__)
+
+    with app.test_request_context(), caplog.at_level(logging.ERROR):
+        assert mail_outbox.queue_email("a@example.com", "Hi", "<p>Hi</p>") is False
+
+    assert "mail_outbox is missing" in caplog.text
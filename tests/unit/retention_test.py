@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from data_source.retention import acquire_lock, run_retention
+from tests.unit.fakes import FakeConnection
+
+
+class RetentionConnection(FakeConnection):
+    """Tables with a number of purgeable rows; `failing` tables raise."""
+
+    def __init__(self, rows, failing=(), lock_result=1):
+        super().__init__()
+        self.rows = dict(rows)
+        self.failing = set(failing)
+        self.lock_result = lock_result
+
+    def run(self, cursor, query, params):
+        if query.startswith("SELECT GET_LOCK"):
+            cursor.rows = [(self.lock_result,)]
+            return
+        table = query.split()[2]
+        if table in self.failing:
+            raise RuntimeError(f"{table} is missing")
+        remaining = self.rows.get(table, 0)
+        cursor.rowcount = min(remaining, params[-1])
+        self.rows[table] = remaining - cursor.rowcount
+
+
+NOW = datetime(2026, 1, 31, 12, 0)
+
+
+def test_purges_in_batches_and_reports_each_table():
+    conn = RetentionConnection({"user_failed_login": 2500, "reset_password": 3})
+
+    report = run_retention(conn, batch_size=1000, failed_login_days=30, now=NOW)
+
+    assert [(e["table"], e["rows"]) for e in report] == [
+        ("user_failed_login", 2500),
+        ("reset_password", 3),
+        ("http_session", 0),
+        ("mail_outbox", 0),
+    ]
+    assert all(e["seconds"] >= 0 for e in report)
+    deletes = [q for q in conn.executed if q[0].startswith("DELETE FROM user_failed")]
+    assert len(deletes) == 3, "2500 rows take three batches of at most 1000"
+    assert deletes[0] == (
+        "DELETE FROM user_failed_login WHERE failed_at < %s LIMIT %s",
+        (datetime(2026, 1, 1, 12, 0), 1000),
+    )
+    assert conn.commits == 6, "Every batch is committed on its own"
+
+
+def test_failure_on_one_table_does_not_stop_the_rest():
+    conn = RetentionConnection({"http_session": 4}, failing={"reset_password"})
+
+    report = run_retention(conn, now=NOW)
+
+    assert "missing" in report[1]["error"]
+    assert report[2]["rows"] == 4
+    assert conn.rollbacks == 1
+
+
+def test_named_lock():
+    assert acquire_lock(RetentionConnection({}, lock_result=1))
+    assert not acquire_lock(RetentionConnection({}, lock_result=0))
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask, session
+
+from data_source.session_store import (
+    RedisSessionInterface,
+    SignedCookieSessionInterface,
+    is_activity_only_change,
+    record_activity,
+)
+from tests.unit.fakes import FakeRedis
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def make_app(interface_factory):
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = "test"
+    app.config["SESSION_REFRESH_EACH_REQUEST"] = False
+    app.session_interface = interface_factory(app)
+
+    @app.route("/login")
+    def login():
+        session["user"] = "ann"
+        session["last_activity"] = START.isoformat()
+        return "ok"
+
+    @app.route("/touch/<int:seconds>")
+    def touch(seconds):
+        session["last_activity"] = (START + timedelta(seconds=seconds)).isoformat()
+        return "ok"
+
+    @app.route("/whoami")
+    def whoami():
+        return session.get("user", "")
+
+    return app
+
+
+def test_activity_only_change_detection():
+    before = {"user": "ann", "last_activity": START.isoformat()}
+    soon = dict(before, last_activity=(START + timedelta(seconds=30)).isoformat())
+    later = dict(before, last_activity=(START + timedelta(seconds=90)).isoformat())
+
+    assert is_activity_only_change(before, soon, 60)
+    assert not is_activity_only_change(before, later, 60)
+    assert not is_activity_only_change(before, dict(soon, user="bob"), 60)
+    assert not is_activity_only_change(None, soon, 60)
+
+
+def test_redis_store_skips_heartbeat_writes():
+    client = FakeRedis()
+    app = make_app(lambda app: RedisSessionInterface(app, client))
+    http = app.test_client()
+
+    http.get("/login")
+    assert client.sets == 1
+    assert http.get("/whoami").get_data(as_text=True) == "ann"
+
+    http.get("/touch/30")
+    assert client.sets == 1, "A small last_activity bump must not be written"
+    http.get("/touch/90")
+    assert client.sets == 2
+
+
+def test_regenerate_moves_session_to_new_id():
+    client = FakeRedis()
+    interface = None
+
+    def factory(app):
+        nonlocal interface
+        interface = RedisSessionInterface(app, client)
+        return interface
+
+    app = make_app(factory)
+
+    @app.route("/rotate")
+    def rotate():
+        interface.regenerate(session)
+        return "ok"
+
+    http = app.test_client()
+    http.get("/login")
+    old_keys = set(client.data)
+    http.get("/rotate")
+    assert set(client.data).isdisjoint(old_keys)
+    assert http.get("/whoami").get_data(as_text=True) == "ann"
+
+
+def test_cookie_mode_only_resends_cookie_on_real_changes():
+    app = make_app(lambda app: SignedCookieSessionInterface())
+    http = app.test_client()
+
+    assert "Set-Cookie" in http.get("/login").headers
+    assert "Set-Cookie" not in http.get("/touch/30").headers
+    assert "Set-Cookie" in http.get("/touch/90").headers
+
+
+def test_last_activity_only_recorded_once_per_granularity():
+    session = {"last_activity": START.isoformat()}
+
+    record_activity(session, START + timedelta(seconds=59), granularity=60)
+    assert session["last_activity"] == START.isoformat()
+
+    record_activity(session, START + timedelta(seconds=60), granularity=60)
+    assert session["last_activity"] == (START + timedelta(seconds=60)).isoformat()
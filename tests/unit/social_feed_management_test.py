@@ -0,0 +1,113 @@
+from domain.control import social_feed_management
+from domain.control.social_feed_management import (
+    delete_post,
+    edit_post,
+    like_post_control,
+)
+
+ORIGINAL = "/static/images/blobs/ab/original.jpg"
+VARIANTS = {"full": {"url": "/static/images/blobs/cd/full.webp"}}
+
+
+def install(monkeypatch, stored):
+    """stored: what the feed row holds when update_post runs."""
+    released = []
+    updates = []
+
+    def update_post(post_id, content, image_path, expected_image_path):
+        updates.append((image_path, expected_image_path))
+        if stored["image_path"] != expected_image_path:
+            return None
+        previous = dict(stored)
+        stored["image_path"] = image_path
+        return previous
+
+    monkeypatch.setattr(
+        social_feed_management,
+        "get_post_by_id",
+        lambda post_id: {"user_id": 1, "image_path": ORIGINAL, "image_variants": None},
+    )
+    monkeypatch.setattr(social_feed_management, "update_post", update_post)
+    monkeypatch.setattr(
+        social_feed_management,
+        "release_images",
+        lambda url, variants=None: released.append((url, variants)),
+    )
+    return released, updates
+
+
+def test_removing_an_image_releases_what_was_stored(monkeypatch):
+    # The variants edit_post read (None) are stale; the row's are released
+    stored = {"image_path": ORIGINAL, "image_variants": VARIANTS}
+    released, updates = install(monkeypatch, stored)
+
+    assert edit_post(1, 7, "caption", remove_image=True)[0]
+
+    assert updates == [(None, ORIGINAL)]
+    assert released == [(ORIGINAL, VARIANTS)]
+
+
+def test_edit_racing_the_image_pipeline_releases_nothing(monkeypatch):
+    # The pipeline swapped the post to its variants after edit_post read it
+    stored = {"image_path": VARIANTS["full"]["url"], "image_variants": VARIANTS}
+    released, _ = install(monkeypatch, stored)
+
+    assert not edit_post(1, 7, "caption", remove_image=True)[0]
+
+    assert released == []
+    assert stored["image_path"] == VARIANTS["full"]["url"]
+
+
+def test_caption_edit_keeps_the_image(monkeypatch):
+    stored = {"image_path": ORIGINAL, "image_variants": None}
+    released, updates = install(monkeypatch, stored)
+
+    assert edit_post(1, 7, "new caption")[0]
+
+    assert updates == [(ORIGINAL, ORIGINAL)]
+    assert released == []
+
+
+def test_image_is_released_only_after_the_post_is_deleted(monkeypatch):
+    released, _ = install(monkeypatch, {})
+    deleted = []
+    monkeypatch.setattr(
+        social_feed_management, "ds_delete_post", lambda post_id: bool(deleted)
+    )
+
+    assert not delete_post(1, 7)
+    assert released == [], "The row still points at its images"
+
+    deleted.append(7)
+    assert delete_post(1, 7)
+    assert released == [(ORIGINAL, None)]
+
+
+def test_deleting_someone_elses_post_releases_nothing(monkeypatch):
+    released, _ = install(monkeypatch, {})
+    monkeypatch.setattr(social_feed_management, "ds_delete_post", lambda post_id: True)
+
+    assert not delete_post(2, 7)
+    assert released == []
+
+
+class Ranking:
+    def __init__(self):
+        self.likes = {}
+
+    def on_like_changed(self, post_id, like_count):
+        self.likes[post_id] = like_count
+
+
+def test_ranking_sees_a_like_only_once_it_is_committed(monkeypatch):
+    ranking = Ranking()
+    pending = []
+    monkeypatch.setattr(social_feed_management, "get_featured_ranking", lambda: ranking)
+    monkeypatch.setattr(social_feed_management, "call_after_commit", pending.append)
+    monkeypatch.setattr(social_feed_management, "add_like", lambda post_id, user: 3)
+
+    assert like_post_control(7, 1) == (True, 3)
+    assert ranking.likes == {}, "The like may still roll back"
+
+    pending.pop()()
+    assert ranking.likes == {7: 3}
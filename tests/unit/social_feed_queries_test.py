@@ -0,0 +1,99 @@
+from data_source import social_feed_queries
+from data_source.social_feed_queries import attach_comments
+from tests.unit.fakes import FakeConnection
+
+
+class CommentConnection(FakeConnection):
+    def __init__(self, comments):
+        super().__init__()
+        self.comments = comments
+
+    def run(self, cursor, query, params):
+        cursor.rows = [c for c in self.comments if c["feed_id"] in params]
+
+
+def test_comments_loaded_in_chunks_and_grouped(monkeypatch):
+    monkeypatch.setattr(social_feed_queries, "COMMENT_BATCH_SIZE", 2)
+    comments = [
+        {"id": 1, "feed_id": 1, "comments": "a", "user_name": "x"},
+        {"id": 2, "feed_id": 3, "comments": "b", "user_name": "y"},
+        {"id": 3, "feed_id": 3, "comments": "c", "user_name": "z"},
+    ]
+    conn = CommentConnection(comments)
+    posts = [{"id": 3}, {"id": 2}, {"id": 1}]
+
+    attach_comments(conn, posts)
+
+    assert len(conn.executed) == 2, "Expected one query per chunk of post ids"
+    assert [c["content"] for c in posts[0]["comments"]] == ["b", "c"]
+    assert posts[1]["comments"] == []
+    assert posts[2]["comments"][0]["user"] == "x"
+
+
+def test_no_query_for_empty_feed():
+    conn = CommentConnection([])
+    assert attach_comments(conn, []) == []
+    assert conn.executed == []
+
+
+class LikeConnection(FakeConnection):
+    """Emulates post_like plus LAST_INSERT_ID(expr) on feed.like_count."""
+
+    def __init__(self, like_count, likes=()):
+        super().__init__()
+        self.like_count = like_count
+        self.likes = set(likes)
+
+    def run(self, cursor, query, params):
+        if query.startswith("INSERT IGNORE INTO post_like"):
+            new = params not in self.likes
+            self.likes.add(params)
+            cursor.rowcount = int(new)
+        elif query.startswith("DELETE FROM post_like"):
+            had = params in self.likes
+            self.likes.discard(params)
+            cursor.rowcount = int(had)
+        elif query.startswith("UPDATE feed SET like_count"):
+            if "like_count + 1" in query:
+                self.like_count += 1
+            else:
+                self.like_count = max(self.like_count - 1, 0)
+            cursor.rowcount = 1
+            cursor.lastrowid = self.like_count
+
+
+def test_like_returns_the_new_count_from_lastrowid(monkeypatch):
+    conn = LikeConnection(like_count=4)
+    monkeypatch.setattr(social_feed_queries, "get_connection", lambda: conn)
+
+    assert social_feed_queries.add_like(7, 1) == 5
+    assert conn.like_count == 5
+    assert not any(q.startswith("SELECT") for q in conn.queries)
+    assert conn.commits == 1
+
+
+def test_repeated_like_is_a_no_op(monkeypatch):
+    conn = LikeConnection(like_count=4, likes={(7, 1)})
+    monkeypatch.setattr(social_feed_queries, "get_connection", lambda: conn)
+
+    assert social_feed_queries.add_like(7, 1) is None
+    assert conn.like_count == 4
+    assert len(conn.executed) == 1, "No counter update without a new like row"
+
+
+def test_unlike_returns_the_new_count_from_lastrowid(monkeypatch):
+    conn = LikeConnection(like_count=5, likes={(7, 1)})
+    monkeypatch.setattr(social_feed_queries, "get_connection", lambda: conn)
+
+    assert social_feed_queries.remove_like(7, 1) == 4
+    assert conn.like_count == 4
+    assert conn.commits == 1
+
+
+def test_unlike_without_a_like_is_a_no_op(monkeypatch):
+    conn = LikeConnection(like_count=5)
+    monkeypatch.setattr(social_feed_queries, "get_connection", lambda: conn)
+
+    assert social_feed_queries.remove_like(7, 1) is None
+    assert conn.like_count == 5
+    assert len(conn.executed) == 1
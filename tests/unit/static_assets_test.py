@@ -0,0 +1,44 @@
+import os
+
+import pytest
+from flask import Flask
+
+from domain.control import static_assets
+from domain.control.static_assets import IMMUTABLE_CACHE_CONTROL, asset_url
+
+
+@pytest.fixture
+def app(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "site.css").write_text("body { color: red; }")
+    app = Flask(__name__, static_folder=str(tmp_path), static_url_path="/static")
+    static_assets.init_app(app)
+    return app
+
+
+def test_asset_url_changes_with_the_file_content(app, tmp_path):
+    css = tmp_path / "css" / "site.css"
+    with app.test_request_context():
+        first = asset_url("css/site.css")
+        assert first.startswith("/static/css/site.css?v=")
+        assert asset_url("css/site.css") == first
+
+        css.write_text("body { color: blue; }")
+        stat = css.stat()
+        os.utime(css, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert asset_url("css/site.css") != first
+
+
+def test_missing_files_fall_back_to_a_plain_url(app):
+    with app.test_request_context():
+        assert asset_url("css/missing.css") == "/static/css/missing.css"
+
+
+def test_fingerprinted_static_responses_are_immutable(app):
+    client = app.test_client()
+    with app.test_request_context():
+        url = asset_url("css/site.css")
+
+    assert client.get(url).headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    plain = client.get("/static/css/site.css").headers.get("Cache-Control", "")
+    assert "immutable" not in plain
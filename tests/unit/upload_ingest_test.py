@@ -0,0 +1,133 @@
+import io
+import struct
+
+import pytest
+from flask import Flask, request
+from PIL import Image
+
+from domain.control import upload_ingest
+from domain.control.upload_ingest import (
+    ImageDimensionsTooLarge,
+    UnsupportedImage,
+    UploadSpool,
+    UploadTooLarge,
+    get_upload_stats,
+    sniff_image,
+)
+
+
+def encode(image_format, size=(300, 200), **params):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "green").save(buffer, image_format, **params)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("image_format", ["JPEG", "PNG", "GIF", "WEBP"])
+def test_sniffs_format_and_size_from_the_header(image_format):
+    data = encode(image_format)
+
+    assert sniff_image(data[:1024]) == (image_format, 300, 200)
+
+
+def test_jpeg_frame_header_is_found_after_exif():
+    exif = Image.Exif()
+    exif[0x010E] = "x" * 20000  # ImageDescription
+    data = encode("JPEG", exif=exif)
+
+    assert sniff_image(data[:1024]) is None, "still inside the EXIF segment"
+    assert sniff_image(data[:30000]) == ("JPEG", 300, 200)
+
+
+def test_partial_headers_ask_for_more_and_others_are_rejected():
+    assert sniff_image(b"") is None
+    assert sniff_image(b"\x89PN") is None
+    with pytest.raises(UnsupportedImage):
+        sniff_image(b"<html><body>not an image</body></html>")
+    with pytest.raises(UnsupportedImage):
+        sniff_image(b"\xff\xd8\x00garbage")
+
+
+def png_header(width, height):
+    ihdr = struct.pack(">II", width, height) + b"\x08\x02\x00\x00\x00"
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + ihdr
+
+
+def test_spool_rejects_a_decompression_bomb_from_its_first_chunk():
+    spool = UploadSpool(max_bytes=1024 * 1024, max_pixels=50_000_000)
+
+    with pytest.raises(ImageDimensionsTooLarge):
+        spool.write(png_header(100_000, 100_000))
+
+
+def test_spool_stops_reading_once_over_the_size_limit():
+    spool = UploadSpool(max_bytes=1000, max_pixels=50_000_000)
+    spool.write(png_header(10, 10))
+
+    with pytest.raises(UploadTooLarge):
+        spool.write(b"\x00" * 1000)
+
+
+def test_spool_rejects_formats_the_forms_do_not_allow():
+    spool = UploadSpool(max_bytes=1024 * 1024, max_pixels=50_000_000)
+
+    with pytest.raises(UnsupportedImage):
+        spool.write(encode("GIF"))
+
+
+def test_spool_rejects_a_truncated_file_once_complete():
+    spool = UploadSpool(max_bytes=1024 * 1024, max_pixels=50_000_000)
+    spool.write(b"\xff\xd8\xff\xe0\x00")
+
+    with pytest.raises(UnsupportedImage):
+        spool.seek(0)
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    upload_ingest.init_app(app)
+
+    @app.route("/upload", methods=["POST"])
+    def upload():
+        file = request.files["image"]
+        return {"size": len(file.read()), "filename": file.filename}
+
+    return app.test_client()
+
+
+def post(client, data, filename="photo.png"):
+    return client.post(
+        "/upload",
+        data={"image": (io.BytesIO(data), filename)},
+        content_type="multipart/form-data",
+    )
+
+
+def test_accepted_uploads_are_timed(client):
+    before = get_upload_stats()
+    data = encode("PNG")
+
+    response = post(client, data)
+
+    assert response.json == {"size": len(data), "filename": "photo.png"}
+    stats = get_upload_stats()
+    assert stats["accepted"] == before["accepted"] + 1
+    assert stats["bytes"] == before["bytes"] + len(data)
+    assert stats["seconds"] >= before["seconds"]
+
+
+def test_rejected_uploads_fail_the_request(client):
+    before = get_upload_stats()
+
+    assert post(client, b"MZ\x90\x00 executable" * 10).status_code == 415
+    assert post(client, png_header(100_000, 100_000)).status_code == 413
+
+    stats = get_upload_stats()
+    assert stats["rejected_type"] == before["rejected_type"] + 1
+    assert stats["rejected_dimensions"] == before["rejected_dimensions"] + 1
+
+
+def test_an_empty_file_field_is_not_an_upload(client):
+    response = post(client, b"", filename="")
+
+    assert response.status_code == 200
@@ -0,0 +1,73 @@
+from data_source import user_queries
+from data_source.cache import LRUCache
+from data_source.user_queries import (
+    get_session_token,
+    get_session_user,
+    update_user_profile_by_id,
+    update_user_session_token,
+)
+from tests.unit.fakes import FakeConnection
+
+
+class UserConnection(FakeConnection):
+    """Every statement finds `row`."""
+
+    def __init__(self, row):
+        super().__init__()
+        self.row = row
+
+    def run(self, cursor, query, params):
+        cursor.rows = [dict(self.row)]
+        cursor.rowcount = 1
+
+
+def use_fake_db(monkeypatch, row):
+    conn = UserConnection(row)
+    monkeypatch.setattr(user_queries, "get_connection", lambda: conn)
+    monkeypatch.setattr(user_queries, "_user_cache", LRUCache(ttl=60))
+    monkeypatch.setattr(user_queries, "_token_cache", LRUCache(ttl=5))
+    return conn
+
+
+def test_session_user_is_cached_without_secrets(monkeypatch):
+    conn = use_fake_db(monkeypatch, {"id": 7, "name": "Ann"})
+
+    assert get_session_user("7")["name"] == "Ann"
+    assert get_session_user(7)["name"] == "Ann"
+    assert len(conn.executed) == 1, "Second lookup must come from the cache"
+    assert "password" not in conn.queries[0]
+    assert "otp_secret" not in conn.queries[0]
+    assert get_session_user("not-an-id") is None
+
+
+def test_database_outage_is_a_logged_out_user(monkeypatch):
+    use_fake_db(monkeypatch, {"id": 7, "name": "Ann"})
+    monkeypatch.setattr(user_queries, "get_connection", lambda: None)
+
+    assert get_session_user(7) is None
+
+
+def test_user_writes_invalidate_cached_row(monkeypatch):
+    conn = use_fake_db(monkeypatch, {"id": 7, "name": "Ann"})
+    get_session_user(7)
+
+    conn.row = {"id": 7, "name": "Bea"}
+    update_user_profile_by_id(7, "Bea", "hash")
+
+    assert get_session_user(7)["name"] == "Bea"
+
+
+def test_session_token_comes_from_the_user_lookup(monkeypatch):
+    conn = use_fake_db(
+        monkeypatch, {"id": 7, "name": "Ann", "current_session_token": "old"}
+    )
+    user = get_session_user(7)
+
+    assert "current_session_token" not in user
+    assert get_session_token(7) == "old"
+    assert len(conn.executed) == 1, "Token check must not query again"
+
+    # A login elsewhere replaces the token and must be seen at once
+    conn.row = {"current_session_token": "new"}
+    update_user_session_token(7, "new")
+    assert get_session_token(7) == "new"
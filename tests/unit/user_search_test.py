@@ -0,0 +1,50 @@
+from domain.control.user_search import UserSearchIndex, name_keys, normalize_name
+
+
+def make_index(rows, loads=None):
+    def loader():
+        if loads is not None:
+            loads.append(1)
+        return rows
+
+    return UserSearchIndex(loader)
+
+
+def user(user_id, name):
+    return {
+        "id": user_id,
+        "name": name,
+        "email": f"{user_id}@x.com",
+        "profile_picture": "",
+    }
+
+
+def test_normalized_keys_cover_every_word_start():
+    assert normalize_name("  Alice   TAN ") == "alice tan"
+    assert name_keys("Alice Tan Wei") == {"alice tan wei", "tan wei", "wei"}
+
+
+def test_prefix_search_matches_name_and_later_words():
+    index = make_index([user(1, "Alice Tan"), user(2, "Tanya"), user(3, "Bob")])
+
+    assert [u["id"] for u in index.search("TAN")] == [1, 2]
+    assert [u["id"] for u in index.search("al")] == [1]
+    assert index.search("zz") == []
+    assert len(index.search("a", limit=1)) == 1
+
+
+def test_hot_prefixes_come_from_cache_and_renames_apply_in_place():
+    loads = []
+    index = make_index([user(1, "Alice"), user(2, "Bob")], loads)
+    index.search("al")
+    index.search("al")
+    assert index.cache.hits == 1
+    assert len(loads) == 1
+
+    index.update(1, name="Zara")
+    assert index.search("al") == []
+    assert index.search("za")[0]["email"] == "1@x.com"
+
+    index.upsert(user(3, "Alan"))
+    assert [u["id"] for u in index.search("al")] == [3]
+    assert len(loads) == 1, "Local changes must not reload the whole index"